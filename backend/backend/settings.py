@@ -10,12 +10,20 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import json
 import os
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+from dotenv import load_dotenv
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Settings below read the environment, so pick up backend/.env first.
+# Variables already set in the environment win.
+load_dotenv(BASE_DIR / ".env")
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
@@ -44,6 +52,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "interview.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -78,11 +87,48 @@ WSGI_APPLICATION = "backend.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# DATABASE_PROFILE selects the database: "sqlite" (default, development) or
+# "postgres" (production, needs psycopg: pip install "psycopg[binary]").
+DATABASE_PROFILE = os.getenv("DATABASE_PROFILE", "sqlite")
+
+if DATABASE_PROFILE == "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.getenv("POSTGRES_DB", "interview"),
+            "USER": os.getenv("POSTGRES_USER", "postgres"),
+            "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
+            "HOST": os.getenv("POSTGRES_HOST", "localhost"),
+            "PORT": os.getenv("POSTGRES_PORT", "5432"),
+            # Keep connections open between requests, checking them before reuse
+            "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "600")),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "5")),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+            "OPTIONS": {
+                # Seconds a writer waits for the lock before "database is locked"
+                "timeout": 20,
+            },
+        }
     }
+
+# Applied to every new SQLite connection (see interview.signals). WAL lets
+# readers carry on while a turn is being written.
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "foreign_keys": "on",
+    "temp_store": "memory",
+    "cache_size": -64000,  # 64MB
+    "mmap_size": 256 * 1024 * 1024,
 }
 
 
@@ -126,6 +172,31 @@ STATIC_URL = "static/"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# "local" keeps uploads in MEDIA_ROOT; "s3" puts them in an S3-compatible
+# bucket (AWS S3, MinIO, ...), which also enables direct uploads
+MEDIA_STORAGE = os.getenv("MEDIA_STORAGE", "local")
+MEDIA_STORAGE_BACKENDS = {
+    "local": "django.core.files.storage.FileSystemStorage",
+    "s3": "interview.storage.S3Storage",
+}
+STORAGES = {
+    "default": {"BACKEND": MEDIA_STORAGE_BACKENDS[MEDIA_STORAGE]},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL", "https://s3.amazonaws.com")
+S3_BUCKET = os.getenv("S3_BUCKET", "interview-media")
+S3_REGION = os.getenv("S3_REGION", "us-east-1")
+S3_ACCESS_KEY_ID = os.getenv("S3_ACCESS_KEY_ID", "")
+S3_SECRET_ACCESS_KEY = os.getenv("S3_SECRET_ACCESS_KEY", "")
+# "path" (bucket in the URL path, as MinIO expects) or "virtual" (bucket host)
+S3_ADDRESSING_STYLE = os.getenv("S3_ADDRESSING_STYLE", "path")
+# Lifetime in seconds of pre-signed download and upload URLs
+S3_URL_EXPIRES = int(os.getenv("S3_URL_EXPIRES", "900"))
+# Largest image a client may upload, in bytes
+IMAGE_UPLOAD_MAX_BYTES = int(os.getenv("IMAGE_UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+# Largest image a client may upload, in pixels (width x height)
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", str(50_000_000)))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -140,6 +211,223 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# The chat clients send an Idempotency-Key with each message
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+
+# OpenAI client settings
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+# Connection pool for the shared OpenAI clients
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20")
+)
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))
+# Per attempt; LLM_DEADLINE bounds a call including queueing and retries
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+
+# LLM call scheduler (see interview/llm_scheduler.py), per process
+# Upstream calls in flight at once, in total and per model
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_MODEL_CONCURRENCY = int(os.getenv("LLM_MODEL_CONCURRENCY", "16"))
+# Provider rate limits per model, in requests and tokens per minute (0 for
+# none), with per-model overrides as JSON, e.g. {"gpt-4o": {"rpm": 500, "tpm": 30000}}
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+LLM_MODEL_RATE_LIMITS = json.loads(os.getenv("LLM_MODEL_RATE_LIMITS", "{}"))
+# Longest a call may wait for rate budget or a free slot before a 503, and
+# the most it may take overall, retries included
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "90"))
+# Retries of 429s, 5xxs and connection errors, with jittered backoff
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+# Consecutive failures that open a model's circuit breaker, and how long it
+# fails fast before letting a trial call through
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+# Idempotency keys for the send views (see interview/idempotency.py)
+# How long a key's stored response is replayed to retries, and how long an
+# identical request waits for the one already running before a 409
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", str(24 * 60 * 60)))
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "90"))
+
+# Request metrics
+# Per-view latency histograms, hot-path spans and LLM counters, exposed in
+# the Prometheus format on /metrics (see interview/metrics.py).
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# Who may scrape /metrics: clients sending "Authorization: Bearer <token>"
+# when METRICS_TOKEN is set, and clients connecting from these addresses or
+# networks (comma separated)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_ALLOWED_IPS = [
+    network.strip()
+    for network in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+    if network.strip()
+]
+
+# LLM gateway
+# Where completions come from, see interview/llm_backends.py: the OpenAI API,
+# a local fake with simulated latency for load tests, or recorded responses.
+LLM_BACKENDS = {
+    "openai": "interview.llm_backends.OpenAIBackend",
+    "fake": "interview.llm_backends.FakeBackend",
+    "record": "interview.llm_backends.RecordingBackend",
+    "replay": "interview.llm_backends.ReplayBackend",
+}
+LLM_BACKEND = LLM_BACKENDS[os.getenv("LLM_BACKEND", "openai")]
+LLM_INTERVIEW_MODEL = os.getenv("LLM_INTERVIEW_MODEL", "gpt-4o")
+LLM_ARTICLE_CHAT_MODEL = os.getenv("LLM_ARTICLE_CHAT_MODEL", "gpt-4")
+# Fake backend: seconds to first token, streaming rate and reply length
+LLM_FAKE_LATENCY = float(os.getenv("LLM_FAKE_LATENCY", "0.5"))
+LLM_FAKE_TOKENS_PER_SECOND = float(os.getenv("LLM_FAKE_TOKENS_PER_SECOND", "50"))
+LLM_FAKE_COMPLETION_TOKENS = int(os.getenv("LLM_FAKE_COMPLETION_TOKENS", "60"))
+# JSON lines file the record backend appends to and the replay backend reads
+LLM_REPLAY_PATH = os.getenv("LLM_REPLAY_PATH", str(BASE_DIR / "llm_recordings.jsonl"))
+
+# Caches
+# Set REDIS_URL to share caches (e.g. built conversations) between workers
+# Article chat replies are reused for repeated questions, see
+# interview/response_cache.py. Entries expire after the timeout and the
+# least recently used are evicted once the cache is full.
+ARTICLE_RESPONSE_CACHE_ENABLED = (
+    os.getenv("ARTICLE_RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+)
+ARTICLE_RESPONSE_CACHE_TIMEOUT = int(
+    os.getenv("ARTICLE_RESPONSE_CACHE_TIMEOUT", str(24 * 3600))
+)
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "article_responses": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "article-responses",
+        "TIMEOUT": ARTICLE_RESPONSE_CACHE_TIMEOUT,
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("ARTICLE_RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+        },
+    },
+}
+if os.getenv("REDIS_URL"):
+    CACHES["conversations"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("REDIS_URL"),
+    }
+    # Shared across workers; size is bounded by Redis' maxmemory LRU policy
+    CACHES["article_responses"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("REDIS_URL"),
+        "TIMEOUT": ARTICLE_RESPONSE_CACHE_TIMEOUT,
+        "KEY_PREFIX": "article-responses",
+    }
+
+# Conversation cache
+# Built interview conversations are cached so each turn only appends new
+# messages. Without a cache alias an in-process LRU bounded by size is used.
+CONVERSATION_CACHE_ALIAS = "conversations" if "conversations" in CACHES else None
+CONVERSATION_CACHE_MAX_BYTES = int(
+    os.getenv("CONVERSATION_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+)
+CONVERSATION_CACHE_TIMEOUT = int(os.getenv("CONVERSATION_CACHE_TIMEOUT", "3600"))
+
+# Interview context window
+# Once the unsummarized history exceeds CONTEXT_TOKEN_BUDGET tokens, the
+# oldest messages are folded into a rolling summary until CONTEXT_TOKEN_TARGET
+# tokens are left verbatim.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "12000"))
+CONTEXT_TOKEN_TARGET = int(os.getenv("CONTEXT_TOKEN_TARGET", "6000"))
+CONTEXT_SUMMARY_MODEL = os.getenv("CONTEXT_SUMMARY_MODEL", "gpt-4o-mini")
+CONTEXT_SUMMARY_MAX_TOKENS = int(os.getenv("CONTEXT_SUMMARY_MAX_TOKENS", "500"))
+# Opening messages never folded, so they stay in the cacheable prompt prefix
+CONTEXT_PINNED_MESSAGES = int(os.getenv("CONTEXT_PINNED_MESSAGES", "2"))
+
+# Article ingestion
+# Blog indexes crawled by `manage.py ingest_articles`. Links on an index page
+# matching ``article_pattern`` are fetched as articles.
+ARTICLE_SOURCES = {
+    "shopify": {
+        "index_url": "https://shopify.engineering/",
+        "article_pattern": r"^https://shopify\.engineering/[\w-]+/?$",
+    },
+    "robinhood": {
+        "index_url": "https://newsroom.aboutrobinhood.com/category/engineering/",
+        "article_pattern": r"^https://newsroom\.aboutrobinhood\.com/(?!category/)[\w-]+/?$",
+    },
+    "pinterest": {
+        "index_url": "https://medium.com/pinterest-engineering",
+        "article_pattern": r"^https://medium\.com/pinterest-engineering/[\w-]+-[0-9a-f]{8,}$",
+    },
+}
+ARTICLE_FETCH_WORKERS = int(os.getenv("ARTICLE_FETCH_WORKERS", "8"))
+ARTICLE_FETCH_TIMEOUT = float(os.getenv("ARTICLE_FETCH_TIMEOUT", "15"))
+ARTICLE_USER_AGENT = "SystemDesignPractice/1.0 (+article-ingestion)"
+
+# Background jobs
+# Handlers for each Job kind, run by `manage.py run_worker`
+JOB_HANDLERS = {
+    "summarize_articles": "interview.summaries.summarize_articles",
+    "embed_articles": "interview.recommendations.embed_articles",
+    "complete_interview_turn": "interview.completions.complete_interview_turn",
+    "complete_article_turn": "interview.completions.complete_article_turn",
+}
+# Most jobs of a kind running at once across all workers
+JOB_CONCURRENCY = {
+    "summarize_articles": int(os.getenv("ARTICLE_SUMMARY_CONCURRENCY", "2")),
+}
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_RETRY_BASE_DELAY = float(os.getenv("JOB_RETRY_BASE_DELAY", "10"))
+JOB_RETRY_MAX_DELAY = float(os.getenv("JOB_RETRY_MAX_DELAY", "900"))
+# Longest a GET on a job may wait for it to finish, in seconds
+JOB_LONG_POLL_TIMEOUT = float(os.getenv("JOB_LONG_POLL_TIMEOUT", "30"))
+
+# Interview WebSocket
+# Frames waiting for a slow client before new tokens are merged into them
+WEBSOCKET_SEND_BUFFER = int(os.getenv("WEBSOCKET_SEND_BUFFER", "64"))
+# Most images attached to one message sent over the socket
+WEBSOCKET_MAX_IMAGES = int(os.getenv("WEBSOCKET_MAX_IMAGES", "10"))
+# Largest frame a client may send, in bytes. Keep it at or below the ASGI
+# server's own message limit (16 MiB by default for uvicorn's
+# --ws-max-size), which drops the connection on larger frames. Clients are
+# told it when they connect and send larger images over HTTP instead.
+WEBSOCKET_MAX_FRAME_BYTES = int(
+    os.getenv("WEBSOCKET_MAX_FRAME_BYTES", str(16 * 1024 * 1024))
+)
+
+# Completion jobs, for messages sent with "Prefer: respond-async"
+# Threads per web process running them as soon as they're queued (0 leaves
+# them all to `manage.py run_worker`)
+COMPLETION_WORKERS = int(os.getenv("COMPLETION_WORKERS", "8"))
+COMPLETION_JOB_MAX_ATTEMPTS = int(os.getenv("COMPLETION_JOB_MAX_ATTEMPTS", "3"))
+
+# Article summaries
+ARTICLE_SUMMARY_MODEL = os.getenv("ARTICLE_SUMMARY_MODEL", "gpt-4o-mini")
+ARTICLE_SUMMARY_BATCH_SIZE = int(os.getenv("ARTICLE_SUMMARY_BATCH_SIZE", "10"))
+
+# Article recommendations
+# "interview.embeddings.HashingEmbedder" embeds locally without an API key
+EMBEDDING_BACKEND = os.getenv(
+    "EMBEDDING_BACKEND", "interview.embeddings.OpenAIEmbedder"
+)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "256"))
+# Characters of article or transcript text sent to be embedded
+EMBEDDING_INPUT_CHARS = int(os.getenv("EMBEDDING_INPUT_CHARS", "16000"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "50"))
+RECOMMENDED_ARTICLE_COUNT = int(os.getenv("RECOMMENDED_ARTICLE_COUNT", "5"))
+# How interviews are matched to articles when they end: rank_hybrid runs
+# locally in milliseconds, rank_by_embedding embeds each transcript
+ARTICLE_RECOMMENDER = os.getenv(
+    "ARTICLE_RECOMMENDER", "interview.recommendations.rank_hybrid"
+)
+# Search matches reranked per interview, and transcript keywords searched for
+RECOMMENDATION_CANDIDATES = int(os.getenv("RECOMMENDATION_CANDIDATES", "50"))
+RECOMMENDATION_KEYWORDS = int(os.getenv("RECOMMENDATION_KEYWORDS", "20"))
+# How long an interview question's search matches are reused
+RECOMMENDATION_CACHE_TIMEOUT = int(os.getenv("RECOMMENDATION_CACHE_TIMEOUT", "3600"))
+
 # REST Framework settings
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
@@ -20,8 +20,11 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from interview.views import export_metrics
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", export_metrics, name="metrics"),
     path("api/interview/", include("interview.urls")),
 ]
 
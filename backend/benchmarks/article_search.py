@@ -0,0 +1,83 @@
+"""Full-text article search latency on a large article table.
+
+Seeds the article table with synthetic titles and summaries drawn from a
+system design vocabulary and times ranked searches through the view. Runs
+on whichever database profile is configured. Run from the backend directory:
+
+    python -m benchmarks.article_search --articles 100000
+    DATABASE_PROFILE=postgres python -m benchmarks.article_search
+"""
+
+import argparse
+import random
+import statistics
+
+from .utils import percentile, setup_django, synthetic_text, time_calls
+
+QUERIES = [
+    "sharding mysql",
+    "rate limiter",
+    "kafka backpressure retries",
+    "vector embedding ranking",
+    "leader failover quorum",
+]
+
+
+def report(label, durations):
+    print(
+        f"{label:<36} mean {statistics.mean(durations) * 1000:>8.2f}ms "
+        f"p95 {percentile(durations, 95) * 1000:>8.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test import RequestFactory
+
+    from interview import views
+    from interview.models import Article
+
+    text = synthetic_text(random.Random(0))
+    for start in range(0, args.articles, 5000):
+        Article.objects.bulk_create(
+            Article(
+                title=text(6).capitalize(),
+                url=f"https://blog.example.com/articles/{index}",
+                source="benchmark",
+                summary=text(80),
+                key_highlights=text(4).split(),
+            )
+            for index in range(start, min(args.articles, start + 5000))
+        )
+
+    print(
+        f"{settings.DATABASE_PROFILE} profile ({connection.vendor}), "
+        f"{args.articles} articles"
+    )
+
+    factory = RequestFactory()
+    for query in QUERIES:
+
+        def search(page=1):
+            request = factory.get("/", {"q": query, "page": page})
+            response = views.search_articles(request)
+            assert response.status_code == 200
+            response.render()
+
+        report(f"{query!r}", time_calls(search, args.repeat))
+    report(
+        "'rate limiter' page 10",
+        time_calls(lambda: search(page=10), args.repeat),
+    )
+
+
+if __name__ == "__main__":
+    main()
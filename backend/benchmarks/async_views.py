@@ -0,0 +1,113 @@
+"""Concurrent interview throughput: sync send_message vs send_message_async.
+
+Drives both views directly (no HTTP server) against the fake LLM backend with
+a fixed latency, so the numbers reflect how many in-flight turns each stack
+can hold rather than model speed. Run from the backend directory:
+
+    python -m benchmarks.async_views --turns 200 --concurrency 50 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import setup_django, summarize
+
+
+def run_sync(views, interviews, turns, threads):
+    from django.db import connection
+    from django.test import RequestFactory
+
+    factory = RequestFactory()
+
+    def send(index):
+        interview = interviews[index % len(interviews)]
+        request = factory.post(
+            f"/api/interview/{interview.id}/send/",
+            {"content": f"Turn {index}"},
+            content_type="application/json",
+        )
+        started = time.perf_counter()
+        response = views.send_message(request, interview_id=interview.id)
+        assert response.status_code == 200, response.data
+        connection.close()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(send, range(turns)))
+    return time.perf_counter() - started, latencies
+
+
+async def run_async(views, interviews, turns, concurrency):
+    from django.test import RequestFactory
+
+    factory = RequestFactory()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def send(index):
+        interview = interviews[index % len(interviews)]
+        request = factory.post(
+            f"/api/interview/{interview.id}/send/async/",
+            {"content": f"Turn {index}"},
+            content_type="application/json",
+        )
+        async with limit:
+            started = time.perf_counter()
+            response = await views.send_message_async(
+                request, interview_id=interview.id
+            )
+            assert response.status_code == 200, response.content
+            return time.perf_counter() - started
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(send(index) for index in range(turns)))
+    return time.perf_counter() - started, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument(
+        "--sync-threads",
+        type=int,
+        nargs="+",
+        default=[4, 50],
+        help="thread counts to run the sync view with",
+    )
+    args = parser.parse_args()
+
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["LLM_FAKE_LATENCY"] = str(args.latency)
+    os.environ["LLM_FAKE_TOKENS_PER_SECOND"] = "0"
+    setup_django()
+
+    from interview import views
+    from interview.models import Interview
+
+    interviews = [
+        Interview.objects.create(question="Design a URL shortener")
+        for _ in range(args.concurrency)
+    ]
+
+    print(
+        f"{args.turns} turns, {args.concurrency} concurrent interviews, "
+        f"{args.latency * 1000:.0f}ms upstream latency"
+    )
+
+    for threads in args.sync_threads:
+        elapsed, latencies = run_sync(views, interviews, args.turns, threads)
+        print(summarize(f"sync ({threads} threads)", elapsed, latencies))
+
+    elapsed, latencies = asyncio.run(
+        run_async(views, interviews, args.turns, args.concurrency)
+    )
+    print(summarize("async (1 event loop)", elapsed, latencies))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,473 @@
+"""End-to-end load test of the interview API against local server processes.
+
+Starts WORKERS server processes on a fresh benchmark database with the fake
+LLM backend, then has USERS concurrent clients each run full interviews:
+start, N sends (every Kth with an image upload), end, then an article chat
+about a recommended article. Reports p50/p95/p99 latency, throughput and
+database queries per endpoint, plus peak memory per worker, and can write
+the results as JSON and compare them against an earlier run:
+
+    python -m benchmarks.load_test --users 20 --interviews 100 \\
+        --output results.json --baseline baseline.json
+"""
+
+import argparse
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import httpx
+
+from .utils import percentile, setup_django, synthetic_text
+
+# Lines users send during an interview
+USER_MESSAGES = [
+    "What scale should I design for, in reads and writes per second?",
+    "I'd put a cache in front of the database and shard by user id.",
+    "Writes go to a queue and a worker fans them out to follower timelines.",
+    "For consistency I'd accept eventual consistency on the feed.",
+    "The hot keys get replicated across cache nodes to spread the load.",
+    "On failover a replica is promoted once the leader misses heartbeats.",
+]
+
+ARTICLE_QUESTIONS = [
+    "What are the key takeaways?",
+    "How did they handle failures?",
+    "Would this approach work at a smaller scale?",
+]
+
+
+class QueryCountMiddleware:
+    """Report database queries and worker memory in response headers
+
+    Installed in the server processes started by this benchmark only.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from django.db import connection
+
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            response = self.get_response(request)
+
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != "darwin":
+            max_rss *= 1024
+        response["X-Query-Count"] = str(queries)
+        response["X-Worker-Pid"] = str(os.getpid())
+        response["X-Worker-Max-RSS"] = str(max_rss)
+        return response
+
+
+def serve(port, database_name, media_root):
+    """Run one threaded server process on ``port``"""
+    setup_django(database_name)
+
+    from django.conf import settings
+    from django.core.servers.basehttp import run
+    from django.core.wsgi import get_wsgi_application
+
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS.append("127.0.0.1")
+    settings.MEDIA_ROOT = media_root
+    settings.MIDDLEWARE.insert(0, "benchmarks.load_test.QueryCountMiddleware")
+    run("127.0.0.1", port, get_wsgi_application(), threading=True)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_workers(count, database_name, media_root, env):
+    """Start ``count`` server processes, returning ``(process, url)`` pairs"""
+    workers = []
+    for _ in range(count):
+        port = free_port()
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.load_test",
+                "--serve",
+                str(port),
+                "--database",
+                database_name,
+                "--media-root",
+                media_root,
+            ],
+            env=env,
+        )
+        workers.append((process, f"http://127.0.0.1:{port}"))
+
+    for process, url in workers:
+        deadline = time.monotonic() + 30
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server process for {url} exited")
+            try:
+                httpx.get(f"{url}/api/interview/list/", timeout=1)
+                break
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Server at {url} didn't start")
+                time.sleep(0.2)
+    return workers
+
+
+def stop_workers(workers):
+    for process, _ in workers:
+        process.terminate()
+    for process, _ in workers:
+        process.wait()
+
+
+def seed_articles(count):
+    from interview.models import Article
+
+    rng = random.Random(0)
+    text = synthetic_text(rng, filler_words=2000)
+    Article.objects.bulk_create(
+        Article(
+            title=text(6).capitalize(),
+            url=f"https://blog.example.com/articles/{index}",
+            source="benchmark",
+            summary=text(80),
+            key_highlights=text(4).split(),
+        )
+        for index in range(count)
+    )
+
+
+def png_image():
+    from PIL import Image
+
+    image = io.BytesIO()
+    Image.new("RGB", (64, 64), "white").save(image, format="PNG")
+    return image.getvalue()
+
+
+class Recorder:
+    """Latency, status and query count of every request, by endpoint"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.workers = {}
+
+    def request(self, client, endpoint, method, url, **kwargs):
+        started = time.perf_counter()
+        response = client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - started
+        queries = response.headers.get("X-Query-Count")
+        with self.lock:
+            if response.is_success:
+                self.samples[endpoint].append(
+                    (elapsed, int(queries) if queries is not None else None)
+                )
+            else:
+                self.errors[endpoint] += 1
+            if "X-Worker-Pid" in response.headers:
+                self.workers[response.headers["X-Worker-Pid"]] = int(
+                    response.headers["X-Worker-Max-RSS"]
+                )
+        response.raise_for_status()
+        return response.json()
+
+
+def run_interview(recorder, client, index, args, image):
+    """One user's interview, end to end, followed by an article chat"""
+    interview = recorder.request(
+        client,
+        "start_interview",
+        "POST",
+        "/api/interview/start/",
+        json={"question": "Design a news feed"},
+    )
+    interview_id = interview["id"]
+    for turn in range(args.messages):
+        content = USER_MESSAGES[(index + turn) % len(USER_MESSAGES)]
+        if args.image_every and (turn + 1) % args.image_every == 0:
+            recorder.request(
+                client,
+                "send_message (image)",
+                "POST",
+                f"/api/interview/{interview_id}/send/",
+                data={"content": content},
+                files={"images": ("diagram.png", image, "image/png")},
+            )
+        else:
+            recorder.request(
+                client,
+                "send_message",
+                "POST",
+                f"/api/interview/{interview_id}/send/",
+                json={"content": content},
+            )
+
+    ended = recorder.request(
+        client, "end_interview", "POST", f"/api/interview/{interview_id}/end/"
+    )
+    recommended = ended["interview"]["recommended_articles"]
+    if not recommended or not args.article_messages:
+        return
+
+    article_id = recommended[0]["article"]["id"]
+    chat = recorder.request(
+        client,
+        "start_article_chat",
+        "POST",
+        f"/api/interview/{interview_id}/articles/{article_id}/chat/",
+    )
+    for turn in range(args.article_messages):
+        recorder.request(
+            client,
+            "send_article_message",
+            "POST",
+            f"/api/interview/article-chat/{chat['id']}/send/",
+            json={"content": ARTICLE_QUESTIONS[turn % len(ARTICLE_QUESTIONS)]},
+        )
+
+
+def endpoint_results(recorder, elapsed):
+    results = {}
+    for endpoint in sorted(set(recorder.samples) | set(recorder.errors)):
+        samples = recorder.samples[endpoint]
+        latencies = [latency for latency, _ in samples]
+        queries = [count for _, count in samples if count is not None]
+        result = {
+            "requests": len(samples),
+            "errors": recorder.errors[endpoint],
+            "throughput": len(samples) / elapsed,
+        }
+        if latencies:
+            result.update(
+                p50_ms=percentile(latencies, 50) * 1000,
+                p95_ms=percentile(latencies, 95) * 1000,
+                p99_ms=percentile(latencies, 99) * 1000,
+            )
+        if queries:
+            result.update(
+                queries_mean=statistics.mean(queries), queries_max=max(queries)
+            )
+        results[endpoint] = result
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    run = results["run"]
+    print(
+        f"{run['interviews']} interviews, {run['users']} users, "
+        f"{run['workers']} workers, {run['latency'] * 1000:.0f}ms LLM latency: "
+        f"{run['requests']} requests in {run['elapsed']:.2f}s "
+        f"({run['throughput']:.1f} req/s, "
+        f"{run['interviews_per_second']:.2f} interviews/s)\n"
+    )
+    print(
+        f"{'endpoint':<24} {'requests':>8} {'errors':>6} {'req/s':>7} "
+        f"{'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8}"
+    )
+    for endpoint, result in results["endpoints"].items():
+        latencies = "".join(
+            f"{result[key]:>7.1f}ms" if key in result else f"{'-':>9}"
+            for key in ("p50_ms", "p95_ms", "p99_ms")
+        )
+        queries = f"{result['queries_mean']:>8.1f}" if "queries_mean" in result else "-"
+        print(
+            f"{endpoint:<24} {result['requests']:>8} {result['errors']:>6} "
+            f"{result['throughput']:>7.1f} {latencies} {queries}"
+        )
+    print()
+    for pid, max_rss in results["workers"].items():
+        print(f"worker {pid:<8} peak RSS {max_rss / 2**20:>8.1f}MB")
+
+
+def compare(results, baseline, tolerance):
+    """Print regressions against ``baseline``; returns whether there were any
+
+    Latency regresses when a p95 grows by more than ``tolerance`` (a
+    fraction); query counts regress when the mean per request grows at all.
+    """
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'}:")
+    regressed = False
+    for endpoint, result in results["endpoints"].items():
+        before = baseline["endpoints"].get(endpoint)
+        if before is None or "p95_ms" not in result or "p95_ms" not in before:
+            continue
+        change = result["p95_ms"] / before["p95_ms"] - 1
+        notes = []
+        if change > tolerance:
+            notes.append("p95 regressed")
+        if result.get("queries_mean", 0) > before.get("queries_mean", 0) + 0.01:
+            notes.append(
+                f"queries {before['queries_mean']:.1f} -> {result['queries_mean']:.1f}"
+            )
+        regressed = regressed or bool(notes)
+        print(
+            f"{endpoint:<24} p95 {before['p95_ms']:>7.1f}ms -> "
+            f"{result['p95_ms']:>7.1f}ms ({change:+.0%}) {', '.join(notes)}"
+        )
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10, help="concurrent clients")
+    parser.add_argument("--interviews", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=6, help="sends per interview")
+    parser.add_argument(
+        "--image-every",
+        type=int,
+        default=3,
+        help="attach an image to every Kth send (0 for none)",
+    )
+    parser.add_argument("--article-messages", type=int, default=2)
+    parser.add_argument("--articles", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=1, help="server processes")
+    parser.add_argument(
+        "--latency", type=float, default=0.2, help="fake LLM time to first token"
+    )
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="p95 growth over the baseline reported as a regression",
+    )
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--database", help=argparse.SUPPRESS)
+    parser.add_argument("--media-root", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["LLM_FAKE_LATENCY"] = str(args.latency)
+    os.environ["LLM_FAKE_TOKENS_PER_SECOND"] = "0"
+    if args.serve:
+        serve(args.serve, args.database, args.media_root)
+        return
+
+    setup_django()
+
+    from django.conf import settings
+
+    seed_articles(args.articles)
+    workers = start_workers(
+        args.workers,
+        str(settings.DATABASES["default"]["NAME"]),
+        tempfile.mkdtemp(prefix="benchmark-media-"),
+        dict(os.environ),
+    )
+    recorder = Recorder()
+    clients = [
+        httpx.Client(base_url=url, timeout=60)
+        for _, url in itertools.islice(itertools.cycle(workers), args.users)
+    ]
+    image = png_image()
+
+    def user(index):
+        run_interview(recorder, clients[index % args.users], index, args, image)
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.users) as pool:
+            failures = [
+                error
+                for error in pool.map(
+                    lambda index: capture(user, index), range(args.interviews)
+                )
+                if error is not None
+            ]
+        elapsed = time.perf_counter() - started
+    finally:
+        for client in clients:
+            client.close()
+        stop_workers(workers)
+
+    requests = sum(len(samples) for samples in recorder.samples.values())
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "database": settings.DATABASES["default"]["ENGINE"].rsplit(".", 1)[-1],
+        "run": {
+            "users": args.users,
+            "interviews": args.interviews,
+            "failed_interviews": len(failures),
+            "messages": args.messages,
+            "image_every": args.image_every,
+            "article_messages": args.article_messages,
+            "articles": args.articles,
+            "workers": args.workers,
+            "latency": args.latency,
+            "elapsed": elapsed,
+            "requests": requests,
+            "throughput": requests / elapsed,
+            "interviews_per_second": (args.interviews - len(failures)) / elapsed,
+        },
+        "endpoints": endpoint_results(recorder, elapsed),
+        "workers": recorder.workers,
+    }
+    print_results(results)
+    for error in failures[:5]:
+        print(f"failed interview: {error}")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            if compare(results, json.load(baseline), args.tolerance):
+                sys.exit(1)
+    if failures:
+        sys.exit(1)
+
+
+def capture(function, *args):
+    """Run ``function``, returning the exception it raised, if any"""
+    try:
+        function(*args)
+    except Exception as error:
+        return error
+
+
+if __name__ == "__main__":
+    main()
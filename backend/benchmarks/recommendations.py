@@ -0,0 +1,121 @@
+"""Article ranking latency for end-of-interview recommendations.
+
+Seeds the article table with synthetic text and random embeddings, then
+times the embedding recommender (loading the vector index and ranking
+every article, using the local hashing embedder so no API key is needed)
+and the hybrid full-text recommender. Run from the backend directory:
+
+    python -m benchmarks.recommendations --articles 10000 100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+from .utils import percentile, setup_django, synthetic_text, time_calls
+
+
+def report(label, durations):
+    print(
+        f"{label:<36} mean {statistics.mean(durations) * 1000:>8.2f}ms "
+        f"p95 {percentile(durations, 95) * 1000:>8.2f}ms"
+    )
+
+
+def seed_articles(count, start, dimensions):
+    from interview.embeddings import normalize, pack
+    from interview.models import Article
+
+    rng = random.Random(start)
+    text = synthetic_text(rng)
+    for offset in range(start, start + count, 5000):
+        batch = range(offset, min(start + count, offset + 5000))
+        Article.objects.bulk_create(
+            Article(
+                title=text(6).capitalize(),
+                url=f"https://blog.example.com/articles/{index}",
+                source="benchmark",
+                summary=text(80),
+                key_highlights=text(4).split(),
+                embedding=pack(normalize([rng.gauss(0, 1) for _ in range(dimensions)])),
+            )
+            for index in batch
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ.setdefault("EMBEDDING_BACKEND", "interview.embeddings.HashingEmbedder")
+    setup_django()
+
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.utils import timezone
+
+    from interview import recommendations
+    from interview.models import Article, Interview, Message
+
+    interview = Interview.objects.create(question="Design a URL shortener")
+    Message.objects.bulk_create(
+        Message(
+            interview=interview,
+            role="user" if index % 2 == 0 else "assistant",
+            content="We hash the long URL and store the mapping in a sharded "
+            "key-value store with a read-through cache in front of it.",
+        )
+        for index in range(40)
+    )
+
+    print(
+        f"{settings.EMBEDDING_DIMENSIONS} dimensions, "
+        f"{'numpy' if recommendations.np is not None else 'pure Python'} ranking"
+    )
+    seeded = 0
+    for count in sorted(args.articles):
+        seed_articles(count - seeded, seeded, settings.EMBEDDING_DIMENSIONS)
+        Article.objects.update(embedded_at=timezone.now())
+        seeded = count
+        print(f"\n{count} articles")
+
+        started = time.perf_counter()
+        index = recommendations.get_article_index()
+        print(f"{'load index':<36} {(time.perf_counter() - started) * 1000:>13.2f}ms")
+
+        vector = recommendations.get_embedder().embed(
+            [recommendations.interview_text(interview)]
+        )[0]
+        report(
+            "rank all articles (top 5)",
+            time_calls(lambda: index.search(vector, 5), args.repeat),
+        )
+        settings.ARTICLE_RECOMMENDER = "interview.recommendations.rank_by_embedding"
+        report(
+            "embedding recommender (end to end)",
+            time_calls(
+                lambda: recommendations.recommend_articles(interview), args.repeat
+            ),
+        )
+
+        settings.ARTICLE_RECOMMENDER = "interview.recommendations.rank_hybrid"
+
+        def cold():
+            cache.clear()
+            recommendations.recommend_articles(interview)
+
+        report("hybrid recommender (new question)", time_calls(cold, args.repeat))
+        report(
+            "hybrid recommender (memoized)",
+            time_calls(
+                lambda: recommendations.recommend_articles(interview), args.repeat
+            ),
+        )
+
+
+if __name__ == "__main__":
+    main()
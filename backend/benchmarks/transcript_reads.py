@@ -0,0 +1,108 @@
+"""Transcript read latency for a single very long interview.
+
+Seeds one interview with many messages and times the read paths that touch
+it. Runs on whichever database profile is configured, so it can compare the
+SQLite and Postgres profiles. Run from the backend directory:
+
+    python -m benchmarks.transcript_reads --messages 10000
+    DATABASE_PROFILE=postgres python -m benchmarks.transcript_reads --messages 10000
+"""
+
+import argparse
+import statistics
+
+from .utils import percentile, setup_django, time_calls
+
+
+def report(label, durations):
+    print(
+        f"{label:<32} mean {statistics.mean(durations) * 1000:>8.2f}ms "
+        f"p95 {percentile(durations, 95) * 1000:>8.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--explain", action="store_true", help="print the query plans used"
+    )
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test import RequestFactory
+
+    from interview import views
+    from interview.models import Interview, Message
+
+    # Other interviews' messages share the table, as they would in production
+    for _ in range(10):
+        filler = Interview.objects.create(question="Design YouTube")
+        Message.objects.bulk_create(
+            Message(interview=filler, role="user", content="Filler message")
+            for _ in range(args.messages // 10)
+        )
+    interview = Interview.objects.create(question="Design a URL shortener")
+    Message.objects.bulk_create(
+        Message(
+            interview=interview,
+            role="user" if index % 2 == 0 else "assistant",
+            content=f"Message {index} " + "lorem ipsum " * 20,
+        )
+        for index in range(args.messages)
+    )
+    near_end = interview.messages.order_by("-timestamp")[5]
+
+    print(
+        f"{settings.DATABASE_PROFILE} profile ({connection.vendor}), "
+        f"{args.messages} messages in one interview"
+    )
+
+    factory = RequestFactory()
+
+    def get(view, path, **kwargs):
+        response = view(factory.get(path), **kwargs)
+        assert response.status_code == 200
+        response.render()
+
+    report(
+        "interview detail (get_interview)",
+        time_calls(
+            lambda: get(views.get_interview, "/", interview_id=interview.id),
+            args.repeat,
+        ),
+    )
+    report(
+        "first transcript page",
+        time_calls(
+            lambda: get(views.list_messages, "/", interview_id=interview.id),
+            args.repeat,
+        ),
+    )
+    report(
+        "messages since (last 5)",
+        time_calls(
+            lambda: get(
+                views.list_messages_since,
+                f"/?after={near_end.id}",
+                interview_id=interview.id,
+            ),
+            args.repeat,
+        ),
+    )
+    report(
+        "interview list",
+        time_calls(lambda: get(views.list_interviews, "/"), args.repeat),
+    )
+
+    if args.explain:
+        since = interview.messages.filter(timestamp__gt=near_end.timestamp)
+        print("\nmessages since plan:\n" + since.explain())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Write throughput of chat turns under concurrent sessions.
+
+Each session is a thread sending turns one after another to its own
+interview (with ``--images`` attached) or article chat through the sync
+views. The model's reply is stubbed out, since even the fake LLM backend
+spends most of a turn in the OpenAI client building the request, so the
+numbers reflect how fast turns are persisted. Every image is the same small
+PNG, so after the first turn no image work is left either. Run from the
+backend directory:
+
+    python -m benchmarks.turn_writes --sessions 1 8 32 --turns 20 --images 2
+"""
+
+import argparse
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from .utils import setup_django, summarize
+
+
+def make_image():
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), "white").save(buffer, format="PNG")
+    return SimpleUploadedFile("diagram.png", buffer.getvalue())
+
+
+def send_turn(views, factory, kind, target, index, images):
+    if kind == "interview":
+        data = {
+            "content": f"Turn {index}",
+            "images": [make_image() for _ in range(images)],
+        }
+        request = factory.post(f"/api/interview/{target.id}/send/", data)
+        return views.send_message(request, interview_id=target.id)
+    request = factory.post(
+        f"/api/articles/chat/{target.id}/send/",
+        # No cached replies, so every turn is written the same way
+        {"content": f"Turn {index}", "cache": False},
+        content_type="application/json",
+    )
+    return views.send_article_message(request, chat_id=target.id)
+
+
+def make_targets(kind, count):
+    from interview.models import Article, ArticleChat, Interview
+
+    interviews = [
+        Interview.objects.create(question="Design a URL shortener")
+        for _ in range(count)
+    ]
+    if kind == "interview":
+        return interviews
+    article, _ = Article.objects.get_or_create(
+        url="https://example.com/sharding",
+        defaults={"title": "Sharding", "source": "example"},
+    )
+    return [
+        ArticleChat.objects.create(interview=interview, article=article)
+        for interview in interviews
+    ]
+
+
+def write_transactions(views, factory, kind, images):
+    """Writes one turn makes and how many transactions they're spread over"""
+    from django.db import connection
+
+    # Each write's outermost atomic block, or None for an autocommit write,
+    # which is a transaction of its own
+    blocks = []
+
+    def record(execute, sql, params, many, context):
+        if sql.split()[0].upper() in ("INSERT", "UPDATE", "DELETE"):
+            blocks.append(
+                connection.atomic_blocks[0] if connection.atomic_blocks else None
+            )
+        return execute(sql, params, many, context)
+
+    (target,) = make_targets(kind, 1)
+    with connection.execute_wrapper(record):
+        send_turn(views, factory, kind, target, 0, images)
+    transactions = blocks.count(None) + len(
+        {id(block) for block in blocks if block is not None}
+    )
+    return len(blocks), transactions
+
+
+def run(views, kind, sessions, turns, images):
+    from django.db import connection
+    from django.test import RequestFactory
+
+    factory = RequestFactory()
+    targets = make_targets(kind, sessions)
+
+    def session(target):
+        latencies = []
+        for index in range(turns):
+            started = time.perf_counter()
+            response = send_turn(views, factory, kind, target, index, images)
+            assert response.status_code == 200, response.data
+            latencies.append(time.perf_counter() - started)
+        connection.close()
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        latencies = [
+            latency for result in pool.map(session, targets) for latency in result
+        ]
+    return time.perf_counter() - started, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--turns", type=int, default=20, help="turns per session")
+    parser.add_argument("--images", type=int, default=2, help="images per turn")
+    parser.add_argument(
+        "--kinds", nargs="+", choices=["interview", "article"], default=["interview"]
+    )
+    args = parser.parse_args()
+
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["LLM_FAKE_LATENCY"] = "0"
+    os.environ["LLM_FAKE_TOKENS_PER_SECOND"] = "0"
+    setup_django()
+
+    from django.conf import settings
+    from django.test import RequestFactory
+
+    from interview import views
+
+    settings.MEDIA_ROOT = tempfile.mkdtemp(prefix="benchmark-media-")
+    mock.patch.object(views, "interview_reply", return_value="Noted.").start()
+    mock.patch.object(views, "article_reply", return_value=("Noted.", "bypass")).start()
+
+    for kind in args.kinds:
+        images = args.images if kind == "interview" else 0
+        writes, transactions = write_transactions(views, RequestFactory(), kind, images)
+        print(
+            f"{kind} turns, {images} images each: "
+            f"{writes} writes in {transactions} transactions per turn"
+        )
+        for sessions in args.sessions:
+            elapsed, latencies = run(views, kind, sessions, args.turns, images)
+            print(summarize(f"{kind} ({sessions} sessions)", elapsed, latencies))
+
+
+if __name__ == "__main__":
+    main()
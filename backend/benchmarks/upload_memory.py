@@ -0,0 +1,195 @@
+"""Peak memory of image uploads through send_message.
+
+Each upload runs in a fresh process: a multipart message with ``--count``
+large images is built up front, then posted through the full Django request
+stack (upload handlers, serializer validation, preprocessing and storage)
+against the fake LLM backend. The reported figure is how far the process's
+peak RSS rose above its RSS just before the request. Run from the backend
+directory:
+
+    python -m benchmarks.upload_memory --count 3 --runs 3
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BOUNDARY = "BenchmarkBoundary"
+
+KINDS = {
+    # A phone photo of a whiteboard: noisy, so it stays large as a JPEG
+    "photo": ("JPEG", ".jpg", "image/jpeg"),
+    # An exported diagram: flat colours and lines, compact as a PNG
+    "diagram": ("PNG", ".png", "image/png"),
+}
+
+
+def make_image(path, kind, size, seed):
+    from PIL import Image, ImageDraw
+
+    format, _, _ = KINDS[kind]
+    if kind == "photo":
+        image = Image.frombytes(
+            "RGB", size, random.Random(seed).randbytes(size[0] * size[1] * 3)
+        )
+        image.save(path, format, quality=90)
+        return
+    rng = random.Random(seed)
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for _ in range(400):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        colour = tuple(rng.randrange(256) for _ in range(3))
+        draw.rectangle(
+            (x, y, x + rng.randrange(400), y + rng.randrange(200)),
+            outline=colour,
+            width=4,
+        )
+        draw.line(
+            (x, y, rng.randrange(size[0]), rng.randrange(size[1])), fill=colour, width=3
+        )
+    image.save(path, format)
+
+
+def read_status(field):
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) * 1024
+    raise KeyError(field)
+
+
+def reset_peak_rss():
+    """Reset the peak RSS high-water mark, where Linux allows it"""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def current_rss():
+    try:
+        return read_status("VmRSS")
+    except (OSError, KeyError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def peak_rss():
+    try:
+        return read_status("VmHWM")
+    except (OSError, KeyError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def measure_upload(paths, content_type):
+    """Post one message with ``paths`` attached; returns the peak RSS rise"""
+    import gc
+
+    from benchmarks.utils import setup_django
+
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    os.environ.setdefault("LLM_FAKE_LATENCY", "0")
+    os.environ.setdefault("LLM_FAKE_TOKENS_PER_SECOND", "0")
+    setup_django()
+
+    from django.conf import settings
+    from django.test import Client
+    from django.test.client import encode_multipart
+
+    from interview.models import Interview
+
+    settings.MEDIA_ROOT = tempfile.mkdtemp(prefix="benchmark-media-")
+    interview = Interview.objects.create(question="Design a photo sharing service")
+    url = f"/api/interview/{interview.id}/send/"
+    client = Client()
+    # Warm up imports and connections with a text-only turn
+    response = client.post(url, {"content": "Hello"}, content_type="application/json")
+    assert response.status_code == 200, response.content
+
+    files = []
+    for path in paths:
+        upload = open(path, "rb")
+        upload.content_type = content_type
+        files.append(upload)
+    body = encode_multipart(BOUNDARY, {"content": "My design", "images": files})
+    for upload in files:
+        upload.close()
+
+    gc.collect()
+    exact = reset_peak_rss()
+    before = current_rss() if exact else peak_rss()
+    response = client.post(
+        url, body, content_type=f"multipart/form-data; boundary={BOUNDARY}"
+    )
+    peak = peak_rss()
+    assert response.status_code == 200, response.content
+    return {"peak_rise": peak - before, "body": len(body), "exact": exact}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=list(KINDS))
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--count", type=int, default=3, help="images per message")
+    parser.add_argument("--runs", type=int, default=3, help="uploads per kind")
+    parser.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        content_type, *paths = args.child
+        print(json.dumps(measure_upload(paths, content_type)))
+        return
+
+    workdir = tempfile.mkdtemp(prefix="benchmark-uploads-")
+    print(
+        f"{args.count} x {args.width}x{args.height} images per message, "
+        f"{args.runs} uploads each, one process per upload"
+    )
+    print(f"{'kind':<8} {'body MB':>8} {'peak rise MB':>13} {'per image MB':>13}")
+    for kind in args.kinds:
+        _, extension, content_type = KINDS[kind]
+        rises = []
+        for run in range(args.runs):
+            # Fresh images every run, so no upload is deduplicated
+            paths = []
+            for index in range(args.count):
+                path = os.path.join(workdir, f"{kind}-{run}-{index}{extension}")
+                make_image(
+                    path, kind, (args.width, args.height), seed=run * 1000 + index
+                )
+                paths.append(path)
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.upload_memory",
+                    "--child",
+                    content_type,
+                    *paths,
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            rises.append(result["peak_rise"])
+        rise = statistics.median(rises) / 2**20
+        print(
+            f"{kind:<8} {result['body'] / 2**20:>8.1f} {rise:>13.1f} "
+            f"{rise / args.count:>13.1f}"
+        )
+    if not result["exact"]:
+        print("Peak RSS couldn't be reset, so rises are measured from the process peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Shared setup for the benchmark scripts.
+
+Benchmarks run against a throwaway SQLite database and the fake LLM
+backend, so they need neither an API key nor network access.
+"""
+
+import atexit
+import itertools
+import os
+import statistics
+import tempfile
+import time
+
+import django
+
+
+def setup_django(database_name=None):
+    """Configure Django against a fresh, migrated benchmark database
+
+    With the SQLite profile this is a throwaway file; with the Postgres
+    profile (DATABASE_PROFILE=postgres) a test database is created on the
+    configured server and dropped on exit. Pass ``database_name`` to attach
+    to a database another benchmark process already set up.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+    from django.conf import settings
+
+    # Views are driven with RequestFactory requests
+    settings.ALLOWED_HOSTS.append("testserver")
+
+    database = settings.DATABASES["default"]
+    if database_name is not None:
+        database["NAME"] = database_name
+        django.setup()
+        return
+
+    sqlite = database["ENGINE"].endswith("sqlite3")
+    if sqlite:
+        db_dir = tempfile.mkdtemp(prefix="benchmark-")
+        database["NAME"] = os.path.join(db_dir, "db.sqlite3")
+    django.setup()
+
+    if sqlite:
+        from django.core.management import call_command
+
+        call_command("migrate", verbosity=0)
+    else:
+        from django.db import connection
+
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        atexit.register(connection.creation.destroy_test_db, old_name, verbosity=0)
+
+
+VOCABULARY = (
+    "cache shard replica queue stream partition index ledger feed search "
+    "consistency latency throughput failover leader quorum snapshot compaction "
+    "rate limiter gateway cdn blob storage schema migration backfill kafka "
+    "redis postgres mysql cassandra elasticsearch vector embedding ranking "
+    "notification fanout timeline payments idempotency retries backpressure"
+).split()
+
+
+def synthetic_text(rng, filler_words=20000):
+    """A function returning ``k`` random words of article-like text
+
+    Word frequencies follow Zipf's law, as in real text: the system design
+    terms are spread through a long tail of filler words.
+    """
+    words = VOCABULARY + [f"word{index}" for index in range(filler_words)]
+    rng.shuffle(words)
+    cum_weights = list(
+        itertools.accumulate(1 / rank for rank in range(1, len(words) + 1))
+    )
+
+    def text(k):
+        return " ".join(rng.choices(words, cum_weights=cum_weights, k=k))
+
+    return text
+
+
+def percentile(values, pct):
+    """The ``pct`` percentile of ``values`` (nearest rank)"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(label, elapsed, latencies):
+    """Format one result row"""
+    return (
+        f"{label:<28} {len(latencies):>6} turns {elapsed:>8.2f}s "
+        f"{len(latencies) / elapsed:>9.1f} turns/s "
+        f"p50 {statistics.median(latencies) * 1000:>7.1f}ms "
+        f"p95 {percentile(latencies, 95) * 1000:>7.1f}ms"
+    )
+
+
+def time_calls(function, repeat):
+    """Call ``function`` ``repeat`` times, returning each call's duration"""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - started)
+    return durations
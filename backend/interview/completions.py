@@ -0,0 +1,157 @@
+"""Chat completions, in the request or handed off to a job
+
+A send request with a ``Prefer: respond-async`` header saves the user's
+message, queues a completion job for the reply and gets a 202 right away;
+the client then long-polls the job for the reply. Once the request commits,
+the job is dispatched to a pool of COMPLETION_WORKERS threads in the same
+process. The job lives in the Job table, so ``run_worker`` retries it if
+the call fails and takes over if the process dies holding it.
+"""
+
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .conversation import build_article_conversation, build_conversation
+from .jobs import claim_job, enqueue, run_job
+from .llm import get_client
+from .metrics import llm_call
+from .models import ArticleMessage, Message
+from .prompts import ARTICLE_CHAT_PROMPT, INTERVIEW_PROMPT, record_usage
+from .response_cache import cache_response, get_cached_response, response_key
+from .serializers import ArticleMessageSerializer, MessageSerializer
+
+# Job kinds whose results clients may poll for
+COMPLETION_JOBS = ("complete_interview_turn", "complete_article_turn")
+
+
+def prefers_async(request):
+    """Whether the client asked for a 202 and a job instead of the reply"""
+    preferences = request.headers.get("Prefer", "")
+    return any(
+        preference.split(";")[0].strip().lower() == "respond-async"
+        for preference in preferences.split(",")
+    )
+
+
+def interview_reply(interview, conversation):
+    """The interviewer's reply to a conversation"""
+    with llm_call("interview"):
+        response = get_client().chat.completions.create(
+            model=settings.LLM_INTERVIEW_MODEL,
+            messages=conversation,
+            max_tokens=500,
+            temperature=0.7,
+            prompt_cache_key=f"interview:{interview.id}",
+        )
+    record_usage(INTERVIEW_PROMPT, response.usage)
+    return response.choices[0].message.content
+
+
+def article_reply(chat, conversation, use_cache):
+    """The reply in an article chat, and its X-Response-Cache status"""
+    cache_key = response_key(chat.article_id, conversation) if use_cache else None
+    if cache_key:
+        content = get_cached_response(cache_key)
+        if content is not None:
+            return content, "hit"
+
+    with llm_call("article_chat"):
+        response = get_client().chat.completions.create(
+            model=settings.LLM_ARTICLE_CHAT_MODEL,
+            messages=conversation,
+            max_tokens=500,
+            temperature=0.7,
+            prompt_cache_key=f"article:{chat.article_id}",
+        )
+    record_usage(ARTICLE_CHAT_PROMPT, response.usage)
+    content = response.choices[0].message.content
+    if cache_key:
+        cache_response(cache_key, content)
+    return content, "miss" if cache_key else "bypass"
+
+
+def saved_reply(messages, user_message):
+    """The reply already saved for ``user_message``, if a retried job saved one"""
+    following = (
+        messages.filter(timestamp__gt=user_message.timestamp)
+        .order_by("timestamp")
+        .first()
+    )
+    if following is not None and following.role == "assistant":
+        return following
+    return None
+
+
+def complete_interview_turn(payload):
+    """Job handler: the interviewer's reply to a message sent with respond-async"""
+    user_message = Message.objects.select_related("interview").get(
+        id=payload["user_message_id"]
+    )
+    interview = user_message.interview
+    ai_message = saved_reply(interview.messages, user_message)
+    if ai_message is None:
+        content = interview_reply(interview, build_conversation(interview))
+        ai_message = Message.objects.create(
+            interview=interview, role="assistant", content=content
+        )
+    return {"ai_response": MessageSerializer(ai_message).data}
+
+
+def complete_article_turn(payload):
+    """Job handler: the reply to an article chat message sent with respond-async"""
+    user_message = ArticleMessage.objects.select_related("chat__article").get(
+        id=payload["user_message_id"]
+    )
+    chat = user_message.chat
+    ai_message = saved_reply(chat.messages, user_message)
+    cache_status = None
+    if ai_message is None:
+        content, cache_status = article_reply(
+            chat, build_article_conversation(chat), payload["use_cache"]
+        )
+        ai_message = ArticleMessage.objects.create(
+            chat=chat, role="assistant", content=content
+        )
+    return {
+        "ai_response": ArticleMessageSerializer(ai_message).data,
+        "response_cache": cache_status,
+    }
+
+
+@lru_cache(maxsize=None)
+def get_pool():
+    """This process's completion threads, or None to leave jobs to run_worker"""
+    if settings.COMPLETION_WORKERS <= 0:
+        return None
+    return ThreadPoolExecutor(
+        max_workers=settings.COMPLETION_WORKERS, thread_name_prefix="completion"
+    )
+
+
+def run_locally(job_id):
+    """Run a completion job in this process, unless a worker got to it first"""
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:web"
+    try:
+        job = claim_job(job_id, worker_id)
+        if job is not None:
+            run_job(job, worker_id)
+    finally:
+        close_old_connections()
+
+
+def dispatch(job_id):
+    pool = get_pool()
+    if pool is not None:
+        pool.submit(run_locally, job_id)
+
+
+def enqueue_completion(kind, payload):
+    """Queue a completion job and dispatch it once the transaction commits"""
+    job = enqueue(kind, payload, max_attempts=settings.COMPLETION_JOB_MAX_ATTEMPTS)
+    transaction.on_commit(lambda: dispatch(job.id))
+    return job
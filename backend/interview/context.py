@@ -0,0 +1,94 @@
+import logging
+
+from django.conf import settings
+
+from .llm import get_client
+from .metrics import llm_call
+from .prompts import interview_prompt
+
+logger = logging.getLogger(__name__)
+
+# Rough cost of one image at the resolution uploads are downscaled to
+IMAGE_TOKENS = 765
+
+SUMMARY_PROMPT = """You maintain running notes on a System Design mock interview so the interviewer can continue it without the full transcript.
+Update the notes with the new turns below. Keep the requirements and assumptions agreed so far, the components and design decisions the candidate has proposed, the interviewer's open questions and any feedback already given.
+Be concise and factual. Reply with the updated notes only."""
+
+
+def estimate_tokens(text):
+    """Estimate the number of tokens in ``text`` (about four characters each)"""
+    return len(text) // 4 + 1
+
+
+def message_tokens(msg):
+    """Tokens a Message and its prefetched images take up in the prompt"""
+    if msg.token_count is None:
+        msg.token_count = estimate_tokens(msg.content)
+    return msg.token_count + IMAGE_TOKENS * len(msg.images.all())
+
+
+def message_text(message):
+    """Plain text of an OpenAI chat message, with images as placeholders"""
+    content = message["content"]
+    if isinstance(content, str):
+        return content
+    return " ".join(part.get("text") or "[image]" for part in content)
+
+
+def summarize_turns(summary, messages):
+    """Fold ``messages`` into the running interview ``summary``"""
+    transcript = "\n".join(
+        f"{message['role']}: {message_text(message)}" for message in messages
+    )
+    with llm_call("context_summary"):
+        response = get_client().chat.completions.create(
+            model=settings.CONTEXT_SUMMARY_MODEL,
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {
+                    "role": "user",
+                    "content": f"Notes so far:\n{summary or '(none)'}\n\nNew turns:\n{transcript}",
+                },
+            ],
+            max_tokens=settings.CONTEXT_SUMMARY_MAX_TOKENS,
+            temperature=0,
+        )
+    return response.choices[0].message.content
+
+
+def fit_context(interview, messages, tokens):
+    """Build the prompt for an interview within the context token budget
+
+    The first CONTEXT_PINNED_MESSAGES messages are always kept verbatim as
+    part of the interview's cacheable prompt prefix, as are the most recent
+    ones. Once the whole outgrows CONTEXT_TOKEN_BUDGET, the oldest unpinned
+    messages are folded into ``interview.summary`` until CONTEXT_TOKEN_TARGET
+    is left, so folding happens in batches rather than on every turn and the
+    prompt stays the same size however long the interview runs.
+    """
+    pinned = min(settings.CONTEXT_PINNED_MESSAGES, len(messages))
+    start = max(interview.summarized_message_count, pinned)
+    remaining = sum(tokens[:pinned]) + sum(tokens[start:])
+
+    if remaining > settings.CONTEXT_TOKEN_BUDGET:
+        fold_to = start
+        # Always keep the latest message verbatim
+        while remaining > settings.CONTEXT_TOKEN_TARGET and fold_to < len(messages) - 1:
+            remaining -= tokens[fold_to]
+            fold_to += 1
+
+        try:
+            interview.summary = summarize_turns(
+                interview.summary, messages[start:fold_to]
+            )
+            interview.summarized_message_count = fold_to
+            interview.save(update_fields=["summary", "summarized_message_count"])
+        except Exception:
+            # Keep the prompt bounded anyway; the fold is retried next turn
+            logger.exception("Failed to summarize interview %s", interview.id)
+        start = fold_to
+
+    return interview_prompt(
+        interview, messages[:pinned], interview.summary, messages[start:]
+    )
@@ -0,0 +1,204 @@
+import base64
+import logging
+import mimetypes
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .context import fit_context, message_tokens
+from .metrics import span
+from .prompts import article_chat_prompt
+
+logger = logging.getLogger(__name__)
+
+
+@span("image_encoding")
+def encode_image_to_base64(image):
+    """Encode a stored image to base64 for OpenAI API"""
+    with image.open("rb") as image_file:
+        return base64.b64encode(image_file.read()).decode("utf-8")
+
+
+def message_to_openai(msg):
+    """Convert a Message and its images to an OpenAI chat message"""
+    message_content = [{"type": "text", "text": msg.content}]
+
+    # Add images to the message if any
+    for img in msg.images.all():
+        try:
+            if img.encoded_data:
+                base64_image = img.encoded_data
+            else:
+                # Uploaded before payloads were cached on the row
+                base64_image = encode_image_to_base64(img.image)
+            mime_type = (
+                img.mime_type or mimetypes.guess_type(img.image.name)[0] or "image/jpeg"
+            )
+            message_content.append(
+                {
+                    "type": "image_url",
+                    "image_url": {"url": f"data:{mime_type};base64,{base64_image}"},
+                }
+            )
+        except Exception:
+            logger.exception("Error processing image %s", img.id)
+
+    return {"role": msg.role, "content": message_content}
+
+
+def openai_message_size(message):
+    """Approximate size in bytes of an OpenAI chat message"""
+    content = message["content"]
+    if isinstance(content, str):
+        return len(content)
+    return sum(len(part.get("text") or part["image_url"]["url"]) for part in content)
+
+
+class LRUConversationCache:
+    """In-process LRU of built conversations, bounded by their total size in bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._discard(key)
+            if entry["size"] > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self.size += entry["size"]
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted["size"]
+
+    def delete(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry["size"]
+
+
+class DjangoConversationCache:
+    """Conversation cache kept in a configured Django cache, e.g. Redis"""
+
+    def __init__(self, alias, timeout):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key):
+        return self.cache.get(f"conversation:{key}")
+
+    def set(self, key, entry):
+        self.cache.set(f"conversation:{key}", entry, self.timeout)
+
+    def delete(self, key):
+        self.cache.delete(f"conversation:{key}")
+
+
+_conversation_cache = None
+
+
+def get_conversation_cache():
+    """Return the conversation cache configured in settings"""
+    global _conversation_cache
+    if _conversation_cache is None:
+        if settings.CONVERSATION_CACHE_ALIAS:
+            _conversation_cache = DjangoConversationCache(
+                settings.CONVERSATION_CACHE_ALIAS, settings.CONVERSATION_CACHE_TIMEOUT
+            )
+        else:
+            _conversation_cache = LRUConversationCache(
+                settings.CONVERSATION_CACHE_MAX_BYTES
+            )
+    return _conversation_cache
+
+
+def reset_conversation_cache():
+    """Drop the configured conversation cache, e.g. between tests"""
+    global _conversation_cache
+    _conversation_cache = None
+
+
+def invalidate_conversation(interview_id):
+    """Forget the cached conversation for an interview"""
+    get_conversation_cache().delete(str(interview_id))
+
+
+def cached_message_ids(interview_id):
+    """Ids of the messages already in the cached conversation for an interview"""
+    entry = get_conversation_cache().get(str(interview_id))
+    return entry["message_ids"] if entry else ()
+
+
+@span("conversation")
+def build_conversation(interview):
+    """Build the OpenAI conversation for an interview from its message history
+
+    The history built on earlier turns is cached, so only messages added
+    since then are queried and have their images encoded. The history is
+    then fitted to the context budget, see ``fit_context``.
+    """
+    cache = get_conversation_cache()
+    key = str(interview.id)
+    entry = cache.get(key) or {
+        "messages": [],
+        "message_ids": [],
+        "tokens": [],
+        "size": 0,
+    }
+
+    # Messages are only ever appended (edits and deletes invalidate the
+    # cache), so everything past the cached count is new.
+    new_messages = interview.messages.prefetch_related("images")[
+        len(entry["message_ids"]) :
+    ]
+    messages = list(entry["messages"])
+    message_ids = list(entry["message_ids"])
+    tokens = list(entry["tokens"])
+    size = entry["size"]
+    for msg in new_messages:
+        message = message_to_openai(msg)
+        messages.append(message)
+        message_ids.append(str(msg.id))
+        tokens.append(message_tokens(msg))
+        size += openai_message_size(message)
+
+    cache.set(
+        key,
+        {
+            "messages": messages,
+            "message_ids": message_ids,
+            "tokens": tokens,
+            "size": size,
+        },
+    )
+    return fit_context(interview, messages, tokens)
+
+
+@span("conversation")
+def build_article_conversation(chat, pending=None):
+    """Build the OpenAI conversation for an article chat from its message history
+
+    ``pending`` is the content of a user message that isn't saved yet.
+    """
+    conversation = [article_chat_prompt(chat.article)]
+    for msg in chat.messages.all():
+        conversation.append({"role": msg.role, "content": msg.content})
+    if pending is not None:
+        conversation.append({"role": "user", "content": pending})
+    return conversation
@@ -0,0 +1,29 @@
+"""Transactions for units of writes
+
+SQLite allows one writer at a time, and a connection waiting for the write
+lock polls for it, sleeping up to 100ms between tries. Under concurrent
+turns those sleeps, not the writes, dominate tail latency, so on SQLite
+``write_transaction`` also queues the threads of a process on a lock of
+its own, which wakes the next writer as soon as the last one commits.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+
+_sqlite_writer = threading.Lock()
+
+
+@contextmanager
+def write_transaction(using=None):
+    """``transaction.atomic()`` for a unit of writes, queued per process on SQLite"""
+    connection = transaction.get_connection(using)
+    # Inside an outer transaction this thread may already hold SQLite's write
+    # lock, so waiting on the queue could stall whoever is first in it
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+    with _sqlite_writer, transaction.atomic(using=using):
+        yield
@@ -0,0 +1,79 @@
+import functools
+import hashlib
+import math
+import re
+from array import array
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .llm import get_client
+from .metrics import llm_call
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(vector):
+    """Scale ``vector`` to unit length so dot products are cosine similarities"""
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector] if norm else list(vector)
+
+
+class OpenAIEmbedder:
+    """Embeddings from the OpenAI embeddings API"""
+
+    def __init__(self, dimensions):
+        self.dimensions = dimensions
+
+    def embed(self, texts):
+        with llm_call("embeddings"):
+            response = get_client().embeddings.create(
+                model=settings.EMBEDDING_MODEL,
+                input=texts,
+                dimensions=self.dimensions,
+            )
+        return [normalize(item.embedding) for item in response.data]
+
+
+class HashingEmbedder:
+    """Deterministic local embeddings for offline development and tests
+
+    Words and adjacent word pairs are hashed into signed buckets, so texts
+    sharing vocabulary land close together without any model or network.
+    """
+
+    def __init__(self, dimensions):
+        self.dimensions = dimensions
+
+    def features(self, text):
+        words = WORD_RE.findall(text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed_one(self, text):
+        vector = [0.0] * self.dimensions
+        for feature in self.features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        return normalize(vector)
+
+    def embed(self, texts):
+        return [self.embed_one(text) for text in texts]
+
+
+@functools.lru_cache(maxsize=None)
+def get_embedder():
+    """Return the embedding backend configured by EMBEDDING_BACKEND"""
+    return import_string(settings.EMBEDDING_BACKEND)(settings.EMBEDDING_DIMENSIONS)
+
+
+def pack(vector):
+    """Serialize a vector as compact float32 bytes"""
+    return array("f", vector).tobytes()
+
+
+def unpack(data):
+    """Read back a vector serialized by ``pack``"""
+    vector = array("f")
+    vector.frombytes(data)
+    return vector
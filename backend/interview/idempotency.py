@@ -0,0 +1,269 @@
+"""Idempotency-Key support for the send views
+
+A client sends the same ``Idempotency-Key`` header with every attempt at one
+logical request. The first attempt claims the key in the database and runs
+the view; identical attempts that arrive while it runs wait for it, and later
+ones get its stored response, so double-clicks and retries neither save the
+user's message twice nor pay for a second completion. Keys live in the
+database, so this holds across worker processes.
+
+Failed attempts aren't replayed. If one had already saved the user's
+message, the key remembers it and the next attempt takes the key over and
+only redoes the completion.
+"""
+
+import functools
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+
+# Seconds between checks for the outcome of an in-flight request
+POLL_INTERVAL = 0.1
+
+
+class KeyConflict(Exception):
+    """A request can't be run or replayed under the key it was sent with"""
+
+    def __init__(self, message, status_code, headers=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def fingerprint(data):
+    """Hash of a request's data, uploaded files by content"""
+    digest = hashlib.sha256()
+    for name in sorted(data.keys()):
+        values = data.getlist(name) if hasattr(data, "getlist") else [data[name]]
+        for value in values:
+            digest.update(f"{name}\0".encode())
+            if isinstance(value, UploadedFile):
+                for chunk in value.chunks():
+                    digest.update(chunk)
+                value.seek(0)
+            else:
+                digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def claim(key, scope, request_fingerprint):
+    """Claim ``key`` for a request, or find the earlier request holding it
+
+    Returns ``(record, claimed)``, or ``(None, False)`` if the holder let go
+    of the key in the meantime.
+    """
+    now = timezone.now()
+    IdempotencyKey.objects.filter(scope=scope, key=key, expires_at__lte=now).delete()
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(
+                key=key,
+                scope=scope,
+                fingerprint=request_fingerprint,
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+            )
+        return record, True
+    except IntegrityError:
+        record = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+
+    if record is not None and record.fingerprint != request_fingerprint:
+        raise KeyConflict(
+            f"{HEADER} was already used for a different request",
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    if record is not None and record.released:
+        # Take over from the failed attempt, unless another retry just did
+        taken = IdempotencyKey.objects.filter(id=record.id, released=True).update(
+            released=False
+        )
+        if taken:
+            record.released = False
+            return record, True
+    return record, False
+
+
+def wait_for_response(record, deadline):
+    """Wait for the request holding ``record`` to store its response
+
+    Returns the record, or None if that request failed and let go of the key.
+    """
+    while record.status_code is None and not record.released:
+        if time.monotonic() >= deadline:
+            raise KeyConflict(
+                f"A request with this {HEADER} is still in progress",
+                status.HTTP_409_CONFLICT,
+                {"Retry-After": "1"},
+            )
+        time.sleep(POLL_INTERVAL)
+        try:
+            record.refresh_from_db(fields=["status_code", "response", "released"])
+        except IdempotencyKey.DoesNotExist:
+            return None
+    return None if record.released else record
+
+
+def begin(key, scope, data):
+    """Claim ``key`` for a request, or wait for the request already holding it
+
+    Returns ``(record, claimed)``: run the view and ``complete`` the record if
+    it was claimed, otherwise replay its stored response. Raises KeyConflict
+    if neither is possible.
+    """
+    if len(key) > IdempotencyKey._meta.get_field("key").max_length:
+        raise KeyConflict(f"{HEADER} is too long", status.HTTP_400_BAD_REQUEST)
+    request_fingerprint = fingerprint(data)
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+    while True:
+        record, claimed = claim(key, scope, request_fingerprint)
+        if claimed:
+            return record, True
+        if record is not None and wait_for_response(record, deadline):
+            return record, False
+
+
+def release(record):
+    """Let a retry have the key of a request that failed
+
+    The key is forgotten, unless the request saved the user's message: then
+    it's kept along with the message for the retry to take over.
+    """
+    if record.message_id is None:
+        record.delete()
+        return
+    record.released = True
+    record.save(update_fields=["released"])
+
+
+def complete(record, status_code, response):
+    """Store the response for ``record``, or release the key if it failed
+
+    Server errors aren't stored, so a retry with the same key runs again.
+    """
+    if status_code >= 500:
+        release(record)
+        return
+    record.status_code = status_code
+    record.response = response
+    record.save(update_fields=["status_code", "response"])
+
+
+def idempotent(scope):
+    """Make a send view honour Idempotency-Key headers
+
+    ``scope`` is formatted with the view's URL kwargs, e.g.
+    ``"interview:{interview_id}"``, so a key only replays for the same
+    resource. Works on DRF and on plain async views returning JSON.
+    """
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+
+            @functools.wraps(view)
+            async def async_wrapper(request, **kwargs):
+                key = request.headers.get(HEADER)
+                if not key:
+                    return await view(request, **kwargs)
+                try:
+                    data = parse_request_data(request)
+                    record, claimed = await sync_to_async(begin)(
+                        key, scope.format(**kwargs), data
+                    )
+                except KeyConflict as conflict:
+                    return JsonResponse(
+                        {"error": str(conflict)},
+                        status=conflict.status_code,
+                        headers=conflict.headers,
+                    )
+                except ValueError:
+                    return await view(request, **kwargs)
+                if not claimed:
+                    return JsonResponse(
+                        record.response,
+                        status=record.status_code,
+                        headers={"Idempotent-Replayed": "true"},
+                    )
+                request.idempotency_key = record
+                try:
+                    response = await view(request, **kwargs)
+                except BaseException:
+                    await sync_to_async(release)(record)
+                    raise
+                await sync_to_async(complete)(
+                    record, response.status_code, json.loads(response.content)
+                )
+                return response
+
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return view(request, **kwargs)
+            try:
+                record, claimed = begin(key, scope.format(**kwargs), request.data)
+            except KeyConflict as conflict:
+                return Response(
+                    {"error": str(conflict)},
+                    status=conflict.status_code,
+                    headers=conflict.headers,
+                )
+            if not claimed:
+                return Response(
+                    record.response,
+                    status=record.status_code,
+                    headers={"Idempotent-Replayed": "true"},
+                )
+            request.idempotency_key = record
+            try:
+                response = view(request, **kwargs)
+            except BaseException:
+                release(record)
+                raise
+            complete(record, response.status_code, response.data)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def saved_message(key_record, messages):
+    """The user's message an earlier attempt with this key saved, if any
+
+    ``messages`` is the conversation's message manager.
+    """
+    if key_record is None or key_record.message_id is None:
+        return None
+    return messages.filter(id=key_record.message_id).first()
+
+
+def remember_message(key_record, message):
+    """Record the user's message on its request's key, if it was sent with one"""
+    if key_record is not None:
+        key_record.message_id = message.id
+        key_record.save(update_fields=["message_id"])
+
+
+def parse_request_data(request):
+    """Read form (with files) or JSON data from a plain Django request"""
+    if request.content_type == "application/json":
+        return json.loads(request.body or "{}")
+    data = request.POST.copy()
+    data.update(request.FILES)
+    return data
@@ -0,0 +1,204 @@
+import base64
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .metrics import span
+
+# The vision model fits images within 2048x2048 and then scales the shortest
+# side down to 768px, so anything larger is wasted upload and encoding work.
+MAX_LONG_SIDE = 2048
+MAX_SHORT_SIDE = 768
+JPEG_QUALITY = 85
+
+MIME_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg"}
+
+# Formats the vision model accepts
+UPLOAD_FORMATS = ("PNG", "JPEG", "GIF", "WEBP")
+# How much of an upload is read looking for its format and dimensions; JPEG
+# headers can sit behind large EXIF and ICC blocks
+HEADER_BYTES = 256 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+class InvalidImage(ValueError):
+    """The file couldn't be read as an image, at least from what's arrived"""
+
+
+def inspect_image(file):
+    """The ``(format, size)`` of an image, from its header alone
+
+    Nothing is decoded, so this is cheap however large the image is. Raises
+    InvalidImage if the file can't be read as an image and ValueError if it
+    isn't one the model accepts or has more than IMAGE_MAX_PIXELS pixels.
+    """
+    try:
+        with Image.open(file) as image:
+            format, (width, height) = image.format, image.size
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        raise InvalidImage("Upload a valid image")
+    if format not in UPLOAD_FORMATS:
+        raise ValueError(f"{format} images aren't supported")
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ValueError(f"Images may have at most {settings.IMAGE_MAX_PIXELS} pixels")
+    return format, (width, height)
+
+
+def file_sha256(file):
+    """SHA-256 of a file's content, read in chunks"""
+    file.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def target_size(size):
+    """The largest size the vision model makes use of for an image of ``size``"""
+    width, height = size
+    scale = min(
+        1, MAX_LONG_SIDE / max(width, height), MAX_SHORT_SIDE / min(width, height)
+    )
+    return (max(1, round(width * scale)), max(1, round(height * scale)))
+
+
+def has_alpha(image):
+    return image.mode in ("RGBA", "LA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+
+
+def encode(image, format, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **options)
+    return buffer.getvalue()
+
+
+def compress_image(file):
+    """Downscale and re-encode an image file, returning ``(data, mime_type)``
+
+    Images with transparency are kept as PNG. Otherwise both PNG (best for
+    flat diagrams) and JPEG (best for photos of whiteboards) are tried and the
+    smaller one wins.
+    """
+    image = Image.open(file)
+    # Let JPEG decoding skip straight to a reduced scale where it can. The
+    # box is square since EXIF orientation may still swap width and height.
+    side = max(target_size(image.size))
+    image.draft("RGB", (side, side))
+
+    # Rotate the decoded frame itself rather than keeping a rotated copy
+    # alongside it; the full-size frame is released once it's resized
+    ImageOps.exif_transpose(image, in_place=True)
+    size = target_size(image.size)
+    if size != image.size:
+        image = image.resize(size, Image.LANCZOS)
+
+    if image.mode not in ("1", "L", "LA", "P", "RGB", "RGBA"):
+        image = image.convert("RGBA" if has_alpha(image) else "RGB")
+
+    candidates = [(encode(image, "PNG", optimize=True), "PNG")]
+    if not has_alpha(image):
+        jpeg = encode(image.convert("RGB"), "JPEG", quality=JPEG_QUALITY, optimize=True)
+        candidates.append((jpeg, "JPEG"))
+
+    data, format = min(candidates, key=lambda candidate: len(candidate[0]))
+    return data, MIME_TYPES[format]
+
+
+def staged_name(content_hash):
+    """Where a client uploads an image straight to storage, by its SHA-256"""
+    return f"uploads/{content_hash}"
+
+
+def reuse_stored_image(upload):
+    """Point ``upload`` at the stored image of an identical earlier upload
+
+    Returns whether there was one.
+    """
+    existing = (
+        type(upload)
+        .objects.filter(content_hash=upload.content_hash)
+        .exclude(encoded_data="")
+        .only("image", "mime_type", "encoded_data")
+        .first()
+    )
+    if existing is None:
+        return False
+    upload.image = existing.image.name
+    upload.mime_type = existing.mime_type
+    upload.encoded_data = existing.encoded_data
+    return True
+
+
+def store_image(upload, file):
+    """Compress ``file``, store it under its content hash and cache its payload"""
+    file.seek(0)
+    data, upload.mime_type = compress_image(file)
+    upload.encoded_data = base64.b64encode(data).decode("utf-8")
+    extension = upload.mime_type.split("/")[1].replace("jpeg", "jpg")
+    field = type(upload)._meta.get_field("image")
+    name = field.generate_filename(upload, f"{upload.content_hash}.{extension}")
+    if not field.storage.exists(name):
+        name = field.storage.save(name, ContentFile(data))
+    upload.image = name
+
+
+@span("image_encoding")
+def prepare_image_upload(upload):
+    """Preprocess a new ImageUpload before it's first saved
+
+    The uploaded file is replaced by its compressed version and the base64
+    payload sent to the model is cached on the row. Uploads identical to an
+    earlier one reuse its stored file and payload without any image work.
+    Files streamed in by ImageUploadHandler were hashed as they arrived.
+    """
+    source = upload.image.file
+    upload.content_hash = getattr(source, "sha256", None) or file_sha256(source)
+    if not reuse_stored_image(upload):
+        store_image(upload, source)
+
+
+def check_direct_upload(content_hash, storage):
+    """Check that an image was uploaded straight to storage under ``content_hash``
+
+    The staged copy is read back once to check it matches its hash and
+    starts like an image. Nothing is stored or deleted, so a request that
+    fails validation can be retried with the same hash. Raises ValueError
+    if there's no such image.
+    """
+    try:
+        staged = storage.open(staged_name(content_hash))
+    except FileNotFoundError:
+        raise ValueError("No image was uploaded with this hash")
+    with staged:
+        if file_sha256(staged) != content_hash:
+            raise ValueError("The uploaded file doesn't match its hash")
+        staged.seek(0)
+        try:
+            inspect_image(staged)
+        except (InvalidImage, OSError):
+            raise ValueError("The uploaded file isn't a valid image")
+
+
+@span("image_encoding")
+def prepare_direct_upload(upload):
+    """Preprocess an image a client uploaded straight to storage
+
+    ``upload.content_hash`` names the upload, which check_direct_upload has
+    vouched for. It's stored like any other upload. Returns the name of the
+    staged copy, for the caller to delete once the upload's row is saved,
+    or None if an identical image was stored already.
+    """
+    if reuse_stored_image(upload):
+        return None
+
+    storage = type(upload)._meta.get_field("image").storage
+    name = staged_name(upload.content_hash)
+    with storage.open(name) as staged:
+        store_image(upload, staged)
+    return name
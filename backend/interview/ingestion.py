@@ -0,0 +1,177 @@
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urldefrag, urljoin
+
+import requests
+from bs4 import BeautifulSoup
+from django.conf import settings
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from .models import Article
+from .recommendations import enqueue_article_embeddings
+from .summaries import content_hash, enqueue_article_summaries
+
+logger = logging.getLogger(__name__)
+
+# Longest article body kept, in characters
+MAX_CONTENT_LENGTH = 50000
+
+# Fields refreshed when an already ingested article is fetched again
+UPDATE_FIELDS = [
+    "title",
+    "source",
+    "content",
+    "content_hash",
+    "etag",
+    "last_modified",
+    "fetched_at",
+]
+
+
+def make_session(pool_size):
+    """A requests session whose connection pool fits ``pool_size`` threads"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = settings.ARTICLE_USER_AGENT
+    return session
+
+
+def discover_article_urls(session, source):
+    """Article URLs linked from a source's index page, in page order"""
+    response = session.get(source["index_url"], timeout=settings.ARTICLE_FETCH_TIMEOUT)
+    response.raise_for_status()
+
+    pattern = re.compile(source["article_pattern"])
+    soup = BeautifulSoup(response.text, "html.parser")
+    urls = {}
+    for link in soup.find_all("a", href=True):
+        url = urldefrag(urljoin(response.url, link["href"]))[0].split("?")[0]
+        if pattern.match(url):
+            urls[url] = True
+    return list(urls)
+
+
+def extract_article(html):
+    """Extract ``(title, content)`` from an article page"""
+    soup = BeautifulSoup(html, "html.parser")
+
+    og_title = soup.find("meta", property="og:title")
+    if og_title and og_title.get("content"):
+        title = og_title["content"].strip()
+    else:
+        heading = soup.find("h1") or soup.title
+        title = heading.get_text(strip=True) if heading else ""
+
+    body = soup.find("article") or soup.find("main") or soup.body or soup
+    for tag in body(["script", "style", "nav", "header", "footer", "aside"]):
+        tag.decompose()
+    blocks = (
+        block.get_text(" ", strip=True)
+        for block in body.find_all(["h2", "h3", "p", "li", "pre"])
+    )
+    content = "\n\n".join(block for block in blocks if block)
+    return title, content[:MAX_CONTENT_LENGTH]
+
+
+def fetch_article(session, url, source_name, known=None):
+    """Fetch and parse one article
+
+    Sends the ETag/Last-Modified validators of a previous fetch, if any, and
+    returns None when the server says the article hasn't changed.
+    """
+    headers = {}
+    if known is not None:
+        if known.etag:
+            headers["If-None-Match"] = known.etag
+        if known.last_modified:
+            headers["If-Modified-Since"] = known.last_modified
+
+    response = session.get(url, headers=headers, timeout=settings.ARTICLE_FETCH_TIMEOUT)
+    if response.status_code == 304:
+        return None
+    response.raise_for_status()
+
+    title, content = extract_article(response.text)
+    return Article(
+        url=url,
+        source=source_name,
+        title=(title or url)[:500],
+        content=content,
+        content_hash=content_hash(content),
+        etag=response.headers.get("ETag", "")[:200],
+        last_modified=response.headers.get("Last-Modified", "")[:100],
+        fetched_at=timezone.now(),
+    )
+
+
+def ingest_articles(source_names=None, workers=None):
+    """Crawl the configured blog indexes and upsert their articles
+
+    Article pages are fetched concurrently over a pooled session, then all
+    new or changed articles are written with a single bulk upsert keyed by
+    URL, and summarization and embedding jobs are queued for those whose
+    content changed.
+    Returns counts of what happened.
+    """
+    sources = settings.ARTICLE_SOURCES
+    if source_names:
+        sources = {name: sources[name] for name in source_names}
+    workers = workers or settings.ARTICLE_FETCH_WORKERS
+    stats = {"discovered": 0, "fetched": 0, "unchanged": 0, "failed": 0}
+
+    with make_session(workers) as session:
+        targets = {}
+        for name, source in sources.items():
+            try:
+                urls = discover_article_urls(session, source)
+            except requests.RequestException:
+                logger.exception("Failed to crawl the %s index", name)
+                stats["failed"] += 1
+                continue
+            targets.update((url, name) for url in urls if url not in targets)
+        stats["discovered"] = len(targets)
+
+        known = Article.objects.filter(url__in=list(targets)).only(
+            "url", "etag", "last_modified"
+        )
+        known = {article.url: article for article in known}
+
+        def fetch(target):
+            url, name = target
+            try:
+                return fetch_article(session, url, name, known.get(url))
+            except requests.RequestException:
+                logger.exception("Failed to fetch article %s", url)
+                return False
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(fetch, targets.items()))
+
+    articles = [result for result in results if result]
+    stats["fetched"] = len(articles)
+    stats["unchanged"] = results.count(None)
+    stats["failed"] += results.count(False)
+
+    Article.objects.bulk_create(
+        articles,
+        update_conflicts=True,
+        unique_fields=["url"],
+        update_fields=UPDATE_FIELDS,
+    )
+    summary_jobs = enqueue_article_summaries(
+        Article.objects.filter(url__in=[article.url for article in articles])
+    )
+    stats["summary_jobs"] = len(summary_jobs)
+    embedding_jobs = enqueue_article_embeddings(
+        Article.objects.filter(
+            url__in=[article.url for article in articles]
+        ).values_list("id", flat=True)
+    )
+    stats["embedding_jobs"] = len(embedding_jobs)
+    return stats
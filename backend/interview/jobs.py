@@ -0,0 +1,125 @@
+import logging
+import random
+import traceback
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(kind, payload, max_attempts=5):
+    """Queue a job for the workers"""
+    if kind not in settings.JOB_HANDLERS:
+        raise ValueError(f"No handler configured for {kind} jobs")
+    return Job.objects.create(kind=kind, payload=payload, max_attempts=max_attempts)
+
+
+def ready_jobs(now):
+    """Queued jobs that are due, and running jobs whose worker lost its lease"""
+    return Job.objects.filter(
+        Q(status="queued", run_after__lte=now)
+        | Q(status="running", lease_expires_at__lt=now)
+    )
+
+
+def lease(jobs, worker_id, now):
+    """Mark ``jobs`` as running under ``worker_id``; returns how many were leased"""
+    return jobs.update(
+        status="running",
+        leased_by=worker_id,
+        lease_expires_at=now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+        attempts=F("attempts") + 1,
+        updated_at=now,
+    )
+
+
+def claim_jobs(worker_id, limit):
+    """Lease up to ``limit`` ready jobs for ``worker_id``
+
+    Each job is claimed with a conditional UPDATE, so concurrent workers
+    never run the same job, on SQLite as well as Postgres. Kinds listed in
+    JOB_CONCURRENCY are capped at that many running jobs across all workers.
+    """
+    now = timezone.now()
+    running = Counter(
+        Job.objects.filter(status="running", lease_expires_at__gte=now).values_list(
+            "kind", flat=True
+        )
+    )
+    candidates = ready_jobs(now).order_by("run_after").values_list("id", "kind")
+
+    claimed = []
+    for job_id, kind in candidates[: limit * 4]:
+        if len(claimed) >= limit:
+            break
+        if running[kind] >= settings.JOB_CONCURRENCY.get(kind, limit):
+            continue
+        if lease(ready_jobs(now).filter(id=job_id), worker_id, now):
+            claimed.append(job_id)
+            running[kind] += 1
+
+    return list(Job.objects.filter(id__in=claimed).order_by("run_after"))
+
+
+def claim_job(job_id, worker_id):
+    """Lease one ready job by id, or return None if it isn't ready
+
+    For dispatching a job straight away instead of waiting for a worker to
+    poll; JOB_CONCURRENCY limits don't apply.
+    """
+    now = timezone.now()
+    if lease(ready_jobs(now).filter(id=job_id), worker_id, now):
+        return Job.objects.get(id=job_id)
+    return None
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter before retrying a failed job"""
+    delay = settings.JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1)
+    return min(settings.JOB_RETRY_MAX_DELAY, delay) * random.uniform(0.5, 1)
+
+
+def run_job(job, worker_id):
+    """Run a leased job and record the outcome
+
+    Failed jobs are re-queued with backoff until they run out of attempts.
+    Outcomes, including what the handler returned, are only recorded while
+    the worker still holds the lease.
+    """
+    now = timezone.now()
+    leased = Job.objects.filter(id=job.id, status="running", leased_by=worker_id)
+
+    try:
+        if job.attempts > job.max_attempts:
+            raise RuntimeError("Lease expired on the final attempt")
+        handler = import_string(settings.JOB_HANDLERS[job.kind])
+        result = handler(job.payload)
+    except Exception:
+        logger.exception("%s job %s failed", job.kind, job.id)
+        now = timezone.now()
+        if job.attempts >= job.max_attempts:
+            updates = {"status": "failed"}
+        else:
+            updates = {
+                "status": "queued",
+                "run_after": now + timedelta(seconds=retry_delay(job.attempts)),
+            }
+        leased.update(
+            last_error=traceback.format_exc(),
+            lease_expires_at=None,
+            updated_at=now,
+            **updates,
+        )
+        return False
+
+    leased.update(
+        status="done", result=result, lease_expires_at=None, updated_at=timezone.now()
+    )
+    return True
@@ -0,0 +1,52 @@
+import math
+import re
+from collections import Counter
+
+WORD_RE = re.compile(r"[a-z][a-z0-9]+")
+
+STOPWORDS = frozenset("""
+    a about above after again against all also am an and any are as at be
+    because been before being below between both but by can could did do does
+    doing down during each else few for from further get got had has have
+    having he her here hers him his how i if in into is it its itself just
+    let like ll me might more most much must my no nor not now of off on once
+    only or other our ours out over own re really same say says she should so
+    some such than that the their theirs them then there these they this
+    those through to too under until up us use used using ve very want was we
+    well were what when where which while who whom why will with would yeah
+    yes you your yours okay ok sure think thing things going make need one two
+    first next way good great right
+    design system interview question answer
+    """.split())
+
+
+def tokenize(text):
+    """Lower-cased words of ``text`` without stopwords"""
+    return [
+        word
+        for word in WORD_RE.findall(text.lower())
+        if word not in STOPWORDS and len(word) > 2
+    ]
+
+
+def tfidf_keywords(documents, limit):
+    """The ``limit`` most characteristic words of ``documents`` with weights
+
+    Each document (e.g. a message) counts once towards a word's document
+    frequency, so filler repeated in every turn ranks below the topics that
+    were actually discussed. Returns ``(word, weight)`` pairs, best first.
+    """
+    counts = [Counter(tokenize(document)) for document in documents]
+    term_frequency = Counter()
+    document_frequency = Counter()
+    for count in counts:
+        term_frequency.update(count)
+        document_frequency.update(count.keys())
+
+    total = len(counts)
+    scores = {
+        word: (1 + math.log(frequency))
+        * (math.log((1 + total) / (1 + document_frequency[word])) + 1)
+        for word, frequency in term_frequency.items()
+    }
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
@@ -0,0 +1,100 @@
+import asyncio
+import functools
+import weakref
+
+import httpx
+from django.conf import settings
+from django.utils.module_loading import import_string
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+from . import metrics
+from .llm_scheduler import AsyncScheduledTransport, ScheduledTransport, Scheduler
+
+# One pooled client per event loop: httpx connections are bound to the loop
+# that opened them, and the WSGI dev server runs each async view in a fresh one.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+@functools.lru_cache(maxsize=None)
+def get_backend():
+    """Return the upstream backend configured by LLM_BACKEND"""
+    return import_string(settings.LLM_BACKEND)()
+
+
+@functools.lru_cache(maxsize=None)
+def get_scheduler():
+    """Return the scheduler shared by every upstream call in this process"""
+    return Scheduler()
+
+
+def reset_clients():
+    """Drop the shared clients and backend, e.g. after settings change"""
+    get_backend.cache_clear()
+    get_scheduler.cache_clear()
+    get_client.cache_clear()
+    _async_clients.clear()
+
+
+def connection_limits():
+    """Connection pool limits for upstream LLM calls, from settings"""
+    return httpx.Limits(
+        max_connections=settings.OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_client():
+    """Return the shared OpenAI client for sync code
+
+    Retries are left to the scheduler, which knows about every call in flight.
+    """
+    backend = get_backend()
+    transport = backend.transport() or httpx.HTTPTransport(limits=connection_limits())
+    return OpenAI(
+        api_key=backend.api_key,
+        timeout=settings.OPENAI_TIMEOUT,
+        max_retries=0,
+        http_client=DefaultHttpxClient(
+            transport=ScheduledTransport(transport, get_scheduler())
+        ),
+    )
+
+
+def get_async_client():
+    """Return the shared AsyncOpenAI client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    async_client = _async_clients.get(loop)
+    if async_client is None:
+        backend = get_backend()
+        transport = backend.async_transport() or httpx.AsyncHTTPTransport(
+            limits=connection_limits()
+        )
+        async_client = AsyncOpenAI(
+            api_key=backend.api_key,
+            timeout=settings.OPENAI_TIMEOUT,
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(
+                transport=AsyncScheduledTransport(transport, get_scheduler())
+            ),
+        )
+        _async_clients[loop] = async_client
+    return async_client
+
+
+@metrics.collector
+def scheduler_metrics():
+    in_flight, breakers = get_scheduler().state()
+    yield from metrics.gauge_lines(
+        "interview_llm_in_flight",
+        "Upstream LLM calls in flight, by model",
+        ["model"],
+        {(model,): count for model, count in in_flight.items()},
+    )
+    yield from metrics.gauge_lines(
+        "interview_llm_circuit_open",
+        "Whether a model's circuit breaker is failing calls fast (1) or not (0)",
+        ["model"],
+        {(model,): int(state == "open") for model, state in breakers.items()},
+    )
@@ -0,0 +1,309 @@
+"""Upstream backends for the LLM gateway in ``interview.llm``
+
+Backends plug in at the HTTP transport of the OpenAI SDK, so every call
+site, streaming included, runs through the real client whichever backend is
+configured with LLM_BACKEND:
+
+- ``OpenAIBackend`` talks to the OpenAI API.
+- ``FakeBackend`` answers locally and deterministically after a configurable
+  time to first token and token rate, for load tests without a paid API.
+- ``RecordingBackend`` talks to the OpenAI API and appends every exchange to
+  LLM_REPLAY_PATH, which ``ReplayBackend`` then serves back offline.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+
+import httpx
+from django.conf import settings
+
+from .embeddings import HashingEmbedder
+
+FAKE_WORDS = (
+    "Good question. What scale are we designing for, and which operations "
+    "dominate? Think about how the data is partitioned, where you would cache "
+    "it, and what happens when a node fails. Walk me through the write path "
+    "first, then the read path, and call out the consistency trade-offs."
+).split()
+
+
+def request_key(request):
+    """Identify a request by its endpoint and canonicalized JSON body
+
+    Options that don't change the reply, like the per-interview prompt cache
+    key, are left out so recordings replay across interviews.
+    """
+    body = json.loads(request.content or b"{}")
+    for option in ("prompt_cache_key", "stream_options", "user"):
+        body.pop(option, None)
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{request.url.path}\n{canonical}".encode()).hexdigest()
+
+
+def replayable_headers(response):
+    """Headers of a response whose body has been read and decoded"""
+    return {
+        name: value
+        for name, value in response.headers.items()
+        if name.lower()
+        not in ("content-encoding", "content-length", "transfer-encoding")
+    }
+
+
+def sse_body(chunks):
+    return [f"data: {json.dumps(chunk)}\n\n".encode() for chunk in chunks] + [
+        b"data: [DONE]\n\n"
+    ]
+
+
+class OpenAIBackend:
+    """The OpenAI API, over the SDK's default pooled transport"""
+
+    @property
+    def api_key(self):
+        return settings.OPENAI_API_KEY or None
+
+    def transport(self):
+        return None
+
+    def async_transport(self):
+        return None
+
+
+class FakeBackend:
+    """Deterministic local replies with simulated upstream latency
+
+    Each reply waits LLM_FAKE_LATENCY seconds before its first token, then
+    produces LLM_FAKE_COMPLETION_TOKENS words (capped by ``max_tokens``) at
+    LLM_FAKE_TOKENS_PER_SECOND. The same request always gets the same reply.
+    """
+
+    api_key = "fake"
+
+    def __init__(self):
+        self.latency = settings.LLM_FAKE_LATENCY
+        self.tokens_per_second = settings.LLM_FAKE_TOKENS_PER_SECOND
+        self.completion_tokens = settings.LLM_FAKE_COMPLETION_TOKENS
+
+    def reply(self, body):
+        """The reply words, prompt token count and delay per word for a request"""
+        canonical = json.dumps(body.get("messages", []), sort_keys=True)
+        seed = int(hashlib.sha256(canonical.encode()).hexdigest()[:8], 16)
+        count = min(self.completion_tokens, body.get("max_tokens") or 4096)
+        words = [FAKE_WORDS[(seed + index) % len(FAKE_WORDS)] for index in range(count)]
+        prompt_tokens = len(canonical) // 4 + 1
+        delay = 1 / self.tokens_per_second if self.tokens_per_second else 0
+        return words, prompt_tokens, delay
+
+    def usage(self, prompt_tokens, completion_tokens):
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def completion(self, body, words, prompt_tokens):
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": " ".join(words)},
+                }
+            ],
+            "usage": self.usage(prompt_tokens, len(words)),
+        }
+
+    def chunks(self, body, words, prompt_tokens):
+        for index, word in enumerate(words):
+            yield {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "delta": {"content": word if index == 0 else f" {word}"},
+                        "finish_reason": None,
+                    }
+                ],
+            }
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [],
+                "usage": self.usage(prompt_tokens, len(words)),
+            }
+
+    def embeddings(self, body):
+        inputs = body["input"]
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        embedder = HashingEmbedder(body.get("dimensions") or 256)
+        return {
+            "object": "list",
+            "model": body.get("model", "fake"),
+            "data": [
+                {"object": "embedding", "index": index, "embedding": vector}
+                for index, vector in enumerate(embedder.embed(inputs))
+            ],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        }
+
+    def transport(self):
+        def handler(request):
+            body = json.loads(request.content)
+            if request.url.path.endswith("/embeddings"):
+                return httpx.Response(200, json=self.embeddings(body))
+
+            words, prompt_tokens, delay = self.reply(body)
+            time.sleep(self.latency)
+            if not body.get("stream"):
+                time.sleep(delay * len(words))
+                return httpx.Response(
+                    200, json=self.completion(body, words, prompt_tokens)
+                )
+
+            def stream():
+                for frame in sse_body(self.chunks(body, words, prompt_tokens)):
+                    yield frame
+                    time.sleep(delay)
+
+            return httpx.Response(
+                200, headers={"content-type": "text/event-stream"}, content=stream()
+            )
+
+        return httpx.MockTransport(handler)
+
+    def async_transport(self):
+        async def handler(request):
+            body = json.loads(request.content)
+            if request.url.path.endswith("/embeddings"):
+                return httpx.Response(200, json=self.embeddings(body))
+
+            words, prompt_tokens, delay = self.reply(body)
+            await asyncio.sleep(self.latency)
+            if not body.get("stream"):
+                await asyncio.sleep(delay * len(words))
+                return httpx.Response(
+                    200, json=self.completion(body, words, prompt_tokens)
+                )
+
+            async def stream():
+                for frame in sse_body(self.chunks(body, words, prompt_tokens)):
+                    yield frame
+                    await asyncio.sleep(delay)
+
+            return httpx.Response(
+                200, headers={"content-type": "text/event-stream"}, content=stream()
+            )
+
+        return httpx.MockTransport(handler)
+
+
+class ReplayBackend:
+    """Serve responses recorded by RecordingBackend from LLM_REPLAY_PATH
+
+    Requests are matched on endpoint and body. Unrecorded requests get a 404
+    so they fail loudly instead of reaching the real API.
+    """
+
+    api_key = "replay"
+
+    def __init__(self):
+        self.recordings = {}
+        with open(settings.LLM_REPLAY_PATH) as recordings:
+            for line in recordings:
+                if line.strip():
+                    recording = json.loads(line)
+                    self.recordings[recording["key"]] = recording
+
+    def respond(self, request):
+        recording = self.recordings.get(request_key(request))
+        if recording is None:
+            return httpx.Response(
+                404, json={"error": {"message": "No recorded response for request"}}
+            )
+        return httpx.Response(
+            recording["status"],
+            headers={"content-type": recording["content_type"]},
+            content=recording["body"].encode(),
+        )
+
+    def transport(self):
+        return httpx.MockTransport(self.respond)
+
+    def async_transport(self):
+        async def handler(request):
+            return self.respond(request)
+
+        return httpx.MockTransport(handler)
+
+
+class RecordingBackend(OpenAIBackend):
+    """The OpenAI API, appending each exchange to LLM_REPLAY_PATH"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def upstream_transport(self):
+        return httpx.HTTPTransport()
+
+    def upstream_async_transport(self):
+        return httpx.AsyncHTTPTransport()
+
+    def record(self, request, response, body):
+        recording = {
+            "key": request_key(request),
+            "path": request.url.path,
+            "status": response.status_code,
+            "content_type": response.headers.get("content-type", "application/json"),
+            "body": body.decode(),
+        }
+        with self.lock, open(settings.LLM_REPLAY_PATH, "a") as recordings:
+            recordings.write(json.dumps(recording) + "\n")
+
+    def transport(self):
+        backend = self
+        upstream = self.upstream_transport()
+
+        class Transport(httpx.BaseTransport):
+            def handle_request(self, request):
+                response = upstream.handle_request(request)
+                body = response.read()
+                backend.record(request, response, body)
+                return httpx.Response(
+                    response.status_code,
+                    headers=replayable_headers(response),
+                    content=body,
+                )
+
+        return Transport()
+
+    def async_transport(self):
+        backend = self
+        upstream = self.upstream_async_transport()
+
+        class Transport(httpx.AsyncBaseTransport):
+            async def handle_async_request(self, request):
+                response = await upstream.handle_async_request(request)
+                body = await response.aread()
+                backend.record(request, response, body)
+                return httpx.Response(
+                    response.status_code,
+                    headers=replayable_headers(response),
+                    content=body,
+                )
+
+        return Transport()
@@ -0,0 +1,536 @@
+"""Admission control for upstream LLM calls
+
+Every request the OpenAI clients make passes through ``ScheduledTransport``
+(or its async twin), which, in order:
+
+1. fails fast with a 503 while the model's circuit breaker is open;
+2. reserves the request's estimated tokens and one request from the
+   model's per-minute token buckets, waiting for budget if needed;
+3. takes a slot under the process-wide and per-model concurrency limits;
+4. sends the request, retrying 429s, 5xxs and connection errors with
+   jittered exponential backoff (honouring Retry-After);
+
+all within LLM_DEADLINE seconds of the call starting. Requests that can't
+get budget or a slot within LLM_QUEUE_TIMEOUT are turned away with a 503
+rather than piling up, so tail latency and the number of workers stuck on
+the upstream stay bounded during provider incidents. A call turned away
+after admission gives back its rate budget and, if it was the breaker's
+half-open trial, the trial.
+
+Limits are per process: divide the provider's RPM/TPM by the number of
+worker processes.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+
+import httpx
+from django.conf import settings
+
+from . import metrics
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+SCHEDULER_EVENTS = metrics.Counter(
+    "interview_llm_scheduler_events_total",
+    "Upstream LLM calls retried or turned away by the scheduler, by reason",
+    ["model", "event"],
+)
+
+
+class Rejected(Exception):
+    """The scheduler won't send a request now; try again after ``retry_after``"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """A per-minute budget that refills continuously
+
+    ``reserve`` debits the bucket straight away, possibly into the red, and
+    returns how long the caller must wait before its reservation is covered,
+    so concurrent callers queue up fairly without polling.
+    """
+
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, amount, max_wait):
+        """Reserve ``amount``, returning the wait; None if it's over ``max_wait``"""
+        # Requests larger than the whole bucket could never be covered
+        amount = min(amount, self.capacity)
+        with self.lock:
+            now = time.monotonic()
+            self.level = min(
+                self.capacity, self.level + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            wait = max(0.0, (amount - self.level) / self.rate)
+            if wait > max_wait:
+                return None
+            self.level -= amount
+            return wait
+
+    def refund(self, amount):
+        with self.lock:
+            self.level = min(self.capacity, self.level + min(amount, self.capacity))
+
+
+class CircuitBreaker:
+    """Stop calling a failing upstream for a while
+
+    Opens after ``threshold`` consecutive failures. Once ``cooldown`` has
+    passed, one trial call is let through: success closes the breaker,
+    failure opens it again.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_started = None
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self.lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return "open"
+            return "half_open"
+
+    def allow(self):
+        """Seconds until a call may be made, and whether it's the half-open trial
+
+        0 seconds means the call may be made now.
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return 0, False
+            now = time.monotonic()
+            remaining = self.opened_at + self.cooldown - now
+            if remaining > 0:
+                return remaining, False
+            # Half open: one trial at a time, unless the last one went missing
+            if self.trial_started and now - self.trial_started < self.cooldown:
+                return self.cooldown, False
+            self.trial_started = now
+            return 0, True
+
+    def cancel_trial(self):
+        """Let another call be the trial, as this one never reached the upstream"""
+        with self.lock:
+            self.trial_started = None
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = self.trial_started = None
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_started or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+                self.trial_started = None
+
+
+def request_tokens(body):
+    """Estimate the tokens a request uses, prompt and completion"""
+    from .context import IMAGE_TOKENS, estimate_tokens
+
+    tokens = body.get("max_tokens") or 0
+    inputs = body.get("input", [])
+    for text in [inputs] if isinstance(inputs, str) else inputs:
+        tokens += estimate_tokens(str(text))
+    for message in body.get("messages", []):
+        content = message.get("content") or ""
+        if isinstance(content, str):
+            tokens += estimate_tokens(content)
+            continue
+        for part in content:
+            if part.get("type") == "image_url":
+                tokens += IMAGE_TOKENS
+            else:
+                tokens += estimate_tokens(part.get("text", ""))
+    return tokens
+
+
+class Call:
+    """One upstream request making its way through the scheduler"""
+
+    def __init__(self, request):
+        try:
+            body = json.loads(request.content or b"{}")
+        except ValueError:
+            body = {}
+        self.model = body.get("model", "")
+        self.tokens = request_tokens(body)
+        self.started = time.monotonic()
+        self.deadline = self.started + settings.LLM_DEADLINE
+        self.queue_deadline = self.started + min(
+            settings.LLM_QUEUE_TIMEOUT, settings.LLM_DEADLINE
+        )
+        self.slot = None
+        # (bucket, amount) rate budget reserved for the call
+        self.reserved = []
+        # Whether the call is its model's half-open breaker trial
+        self.trial = False
+
+    def remaining(self):
+        return self.deadline - time.monotonic()
+
+
+class Scheduler:
+    """Concurrency, rate limits, retries and circuit breakers per model"""
+
+    def __init__(self):
+        self.max_concurrency = settings.LLM_MAX_CONCURRENCY
+        self.model_concurrency = settings.LLM_MODEL_CONCURRENCY
+        self.in_flight = 0
+        self.model_in_flight = {}
+        self.condition = threading.Condition()
+        # (loop, event) for each async caller waiting for a slot
+        self.async_waiters = set()
+        self.buckets = {}
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def rate_limits(self, model):
+        limits = settings.LLM_MODEL_RATE_LIMITS.get(model, {})
+        return (
+            limits.get("rpm", settings.LLM_REQUESTS_PER_MINUTE),
+            limits.get("tpm", settings.LLM_TOKENS_PER_MINUTE),
+        )
+
+    def model_buckets(self, model):
+        with self.lock:
+            if model not in self.buckets:
+                self.buckets[model] = [
+                    TokenBucket(limit) if limit else None
+                    for limit in self.rate_limits(model)
+                ]
+            return self.buckets[model]
+
+    def breaker(self, model):
+        with self.lock:
+            if model not in self.breakers:
+                self.breakers[model] = CircuitBreaker(
+                    settings.LLM_BREAKER_THRESHOLD, settings.LLM_BREAKER_COOLDOWN
+                )
+            return self.breakers[model]
+
+    def reject(self, call, reason, retry_after):
+        self.abandon(call)
+        SCHEDULER_EVENTS.inc(call.model, reason)
+        raise Rejected(reason, retry_after)
+
+    def abandon(self, call):
+        """Undo admission for a call that won't be sent
+
+        Refunds its rate budget and, if it was the breaker's half-open
+        trial, lets the next call be the trial rather than waiting out
+        another cooldown.
+        """
+        for bucket, amount in call.reserved:
+            bucket.refund(amount)
+        call.reserved = []
+        if call.trial:
+            self.breaker(call.model).cancel_trial()
+            call.trial = False
+
+    def admit(self, call):
+        """Check the breaker and reserve rate budget; returns the wait for it"""
+        cooldown, call.trial = self.breaker(call.model).allow()
+        if cooldown:
+            self.reject(call, "circuit_open", cooldown)
+
+        max_wait = call.queue_deadline - time.monotonic()
+        wait = 0.0
+        for bucket, amount in zip(self.model_buckets(call.model), (1, call.tokens)):
+            if bucket is None:
+                continue
+            delay = bucket.reserve(amount, max_wait)
+            if delay is None:
+                self.reject(call, "rate_limited", 60 * amount / bucket.capacity)
+            call.reserved.append((bucket, amount))
+            wait = max(wait, delay)
+        return wait
+
+    def try_acquire(self, call):
+        with self.condition:
+            if self.in_flight >= self.max_concurrency:
+                return False
+            if self.model_in_flight.get(call.model, 0) >= self.model_concurrency:
+                return False
+            self.in_flight += 1
+            self.model_in_flight[call.model] = (
+                self.model_in_flight.get(call.model, 0) + 1
+            )
+            call.slot = True
+            return True
+
+    def acquire(self, call):
+        with self.condition:
+            while not self.try_acquire(call):
+                timeout = call.queue_deadline - time.monotonic()
+                if timeout <= 0:
+                    self.reject(call, "queue_timeout", 1)
+                self.condition.wait(timeout)
+
+    async def acquire_async(self, call):
+        """Wait for a slot without blocking the event loop
+
+        Slots are released from worker threads as well as the loop, so the
+        releasing side wakes async waiters through their own loop.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            waiter = (loop, asyncio.Event())
+            with self.condition:
+                if self.try_acquire(call):
+                    return
+                self.async_waiters.add(waiter)
+            try:
+                timeout = call.queue_deadline - time.monotonic()
+                if timeout <= 0:
+                    self.reject(call, "queue_timeout", 1)
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), timeout)
+                except asyncio.TimeoutError:
+                    self.reject(call, "queue_timeout", 1)
+            finally:
+                with self.condition:
+                    self.async_waiters.discard(waiter)
+
+    def release(self, call):
+        with self.condition:
+            if not call.slot:
+                return
+            call.slot = False
+            self.in_flight -= 1
+            self.model_in_flight[call.model] -= 1
+            self.condition.notify_all()
+            for loop, event in self.async_waiters:
+                loop.call_soon_threadsafe(event.set)
+
+    def retry_delay(self, call, attempt, response=None):
+        """Backoff before retrying ``attempt``, or None to give up
+
+        Full jitter keeps the workers that failed together from retrying in
+        lockstep; a longer Retry-After from the upstream wins.
+        """
+        if attempt >= settings.LLM_MAX_RETRIES:
+            return None
+        delay = random.uniform(
+            0,
+            min(
+                settings.LLM_RETRY_MAX_DELAY,
+                settings.LLM_RETRY_BASE_DELAY * 2**attempt,
+            ),
+        )
+        if response is not None:
+            try:
+                delay = max(delay, float(response.headers.get("retry-after", 0)))
+            except ValueError:
+                pass
+        if delay >= call.remaining():
+            return None
+        SCHEDULER_EVENTS.inc(call.model, "retry")
+        return delay
+
+    def record(self, call, response=None):
+        """Feed the outcome of the final attempt to the model's breaker"""
+        if response is None or response.status_code in RETRY_STATUSES:
+            self.breaker(call.model).failure()
+        else:
+            self.breaker(call.model).success()
+
+    def bound_timeout(self, call, request):
+        """Cap the attempt's timeouts at the time left before the deadline"""
+        remaining = max(call.remaining(), 0.001)
+        timeout = request.extensions.get("timeout") or {}
+        request.extensions["timeout"] = {
+            key: remaining if value is None else min(value, remaining)
+            for key, value in {
+                "connect": None,
+                "read": None,
+                "write": None,
+                "pool": None,
+                **timeout,
+            }.items()
+        }
+
+    def state(self):
+        """In-flight calls and breaker states, for metrics"""
+        with self.condition:
+            in_flight = dict(self.model_in_flight)
+        with self.lock:
+            breakers = dict(self.breakers)
+        return in_flight, {model: breaker.state for model, breaker in breakers.items()}
+
+
+def rejection(error):
+    """The response a rejected call gets instead of reaching the upstream"""
+    return httpx.Response(
+        503,
+        headers={"retry-after": str(max(1, round(error.retry_after)))},
+        json={
+            "error": {
+                "message": f"LLM upstream unavailable ({error.reason})",
+                "type": "upstream_unavailable",
+                "code": error.reason,
+            }
+        },
+    )
+
+
+class ReleasingStream(httpx.SyncByteStream):
+    """Response body that gives the call's slot back once it's closed"""
+
+    def __init__(self, stream, release):
+        self.stream = stream
+        self.release = release
+
+    def __iter__(self):
+        yield from self.stream
+
+    def close(self):
+        try:
+            self.stream.close()
+        finally:
+            self.release()
+
+
+class AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream, release):
+        self.stream = stream
+        self.release = release
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self.stream.aclose()
+        finally:
+            self.release()
+
+
+class ScheduledTransport(httpx.BaseTransport):
+    def __init__(self, transport, scheduler):
+        self.transport = transport
+        self.scheduler = scheduler
+
+    def handle_request(self, request):
+        scheduler = self.scheduler
+        call = Call(request)
+        try:
+            time.sleep(scheduler.admit(call))
+            scheduler.acquire(call)
+        except Rejected as error:
+            return rejection(error)
+        except BaseException:
+            scheduler.abandon(call)
+            raise
+
+        try:
+            attempt = 0
+            while True:
+                scheduler.bound_timeout(call, request)
+                try:
+                    response = self.transport.handle_request(request)
+                except httpx.TransportError:
+                    delay = scheduler.retry_delay(call, attempt)
+                    if delay is None:
+                        scheduler.record(call)
+                        raise
+                else:
+                    delay = None
+                    if response.status_code in RETRY_STATUSES:
+                        delay = scheduler.retry_delay(call, attempt, response)
+                    if delay is None:
+                        scheduler.record(call, response)
+                        if isinstance(response.stream, httpx.ByteStream):
+                            # Already in memory, so nothing left to wait for
+                            scheduler.release(call)
+                        else:
+                            response.stream = ReleasingStream(
+                                response.stream, lambda: scheduler.release(call)
+                            )
+                        return response
+                    response.close()
+                time.sleep(delay)
+                attempt += 1
+        except BaseException:
+            scheduler.release(call)
+            raise
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncScheduledTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport, scheduler):
+        self.transport = transport
+        self.scheduler = scheduler
+
+    async def handle_async_request(self, request):
+        scheduler = self.scheduler
+        call = Call(request)
+        try:
+            await asyncio.sleep(scheduler.admit(call))
+            await scheduler.acquire_async(call)
+        except Rejected as error:
+            return rejection(error)
+        except BaseException:
+            scheduler.abandon(call)
+            raise
+
+        try:
+            attempt = 0
+            while True:
+                scheduler.bound_timeout(call, request)
+                try:
+                    response = await self.transport.handle_async_request(request)
+                except httpx.TransportError:
+                    delay = scheduler.retry_delay(call, attempt)
+                    if delay is None:
+                        scheduler.record(call)
+                        raise
+                else:
+                    delay = None
+                    if response.status_code in RETRY_STATUSES:
+                        delay = scheduler.retry_delay(call, attempt, response)
+                    if delay is None:
+                        scheduler.record(call, response)
+                        if isinstance(response.stream, httpx.ByteStream):
+                            # Already in memory, so nothing left to wait for
+                            scheduler.release(call)
+                        else:
+                            response.stream = AsyncReleasingStream(
+                                response.stream, lambda: scheduler.release(call)
+                            )
+                        return response
+                    await response.aclose()
+                await asyncio.sleep(delay)
+                attempt += 1
+        except BaseException:
+            scheduler.release(call)
+            raise
+
+    async def aclose(self):
+        await self.transport.aclose()
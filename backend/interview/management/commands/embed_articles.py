@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from interview.models import Article
+from interview.recommendations import enqueue_article_embeddings
+
+
+class Command(BaseCommand):
+    help = "Queue embedding jobs for every article, e.g. after changing model"
+
+    def handle(self, *args, **options):
+        jobs = enqueue_article_embeddings(Article.objects.values_list("id", flat=True))
+        self.stdout.write(self.style.SUCCESS(f"Queued {len(jobs)} embedding jobs"))
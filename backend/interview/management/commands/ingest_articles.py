@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from interview.ingestion import ingest_articles
+
+
+class Command(BaseCommand):
+    help = "Crawl the engineering blogs in ARTICLE_SOURCES into the Article table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            action="append",
+            choices=sorted(settings.ARTICLE_SOURCES),
+            help="only crawl this source (can be repeated)",
+        )
+        parser.add_argument("--workers", type=int, help="concurrent article fetches")
+
+    def handle(self, *args, **options):
+        stats = ingest_articles(options["source"], options["workers"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Discovered {discovered} articles: {fetched} fetched, "
+                "{unchanged} unchanged, {failed} failed; "
+                "queued {summary_jobs} summary and {embedding_jobs} embedding jobs".format(
+                    **stats
+                )
+            )
+        )
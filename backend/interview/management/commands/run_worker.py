@@ -0,0 +1,101 @@
+import functools
+import os
+import socket
+import time
+import uuid
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from interview.jobs import claim_jobs, run_job
+
+
+class InlineExecutor(Executor):
+    """Runs submitted calls straight away in the calling thread"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the Job table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="jobs run at once (1 runs them in the main thread)",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="seconds to wait when no jobs are ready",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="exit once no jobs are ready instead of polling",
+        )
+
+    def handle(self, *args, **options):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        concurrency = options["concurrency"]
+        self.stdout.write(f"Worker {worker_id} running {concurrency} jobs at a time")
+
+        def run_in_thread(job):
+            try:
+                return run_job(job, worker_id)
+            finally:
+                # Worker threads each hold their own database connection
+                close_old_connections()
+
+        if concurrency == 1:
+            pool = InlineExecutor()
+            run = functools.partial(run_job, worker_id=worker_id)
+        else:
+            pool = ThreadPoolExecutor(max_workers=concurrency)
+            run = run_in_thread
+
+        succeeded = failed = 0
+        in_flight = set()
+        with pool:
+            try:
+                while True:
+                    free = concurrency - len(in_flight)
+                    jobs = claim_jobs(worker_id, free) if free else []
+                    in_flight.update(pool.submit(run, job) for job in jobs)
+
+                    if not in_flight:
+                        if options["once"]:
+                            break
+                        time.sleep(options["poll_interval"])
+                        continue
+
+                    done, in_flight = wait(
+                        in_flight,
+                        timeout=options["poll_interval"],
+                        return_when=FIRST_COMPLETED,
+                    )
+                    for future in done:
+                        if future.result():
+                            succeeded += 1
+                        else:
+                            failed += 1
+            except KeyboardInterrupt:
+                self.stdout.write("Stopping, waiting for running jobs to finish")
+
+        self.stdout.write(self.style.SUCCESS(f"Ran {succeeded} jobs, {failed} failed"))
@@ -0,0 +1,299 @@
+"""In-process request metrics in the Prometheus text format
+
+``MetricsMiddleware`` times every request by view. Inside a request,
+``span(name)`` adds the time spent in a section (database queries, image
+encoding, conversation building, upstream LLM calls) to the request's
+totals, which are observed once per request when it finishes. Everything
+is exposed on ``/metrics``, to scrapers that ``may_scrape``.
+
+Metrics live in module-level registries with preallocated buckets, so
+observing costs a lock and a few additions, and are per process: scrape
+each worker.
+"""
+
+import bisect
+import hmac
+import ipaddress
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+# Upper bounds in seconds, from a fast query to a slow completion
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+)
+
+REGISTRY = []
+COLLECTORS = []
+
+# Span totals of the request being handled, if any
+_request_spans = ContextVar("request_spans", default=None)
+
+
+def escape(value):
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values))
+    return f"{{{pairs}}}"
+
+
+def sample_lines(name, documentation, kind, labelnames, values):
+    """Exposition lines for a metric, from a dict of label values to samples"""
+    yield f"# HELP {name} {documentation}"
+    yield f"# TYPE {name} {kind}"
+    for labels, value in sorted(values.items()):
+        yield f"{name}{format_labels(labelnames, labels)} {value}"
+
+
+def counter_lines(name, documentation, labelnames, values):
+    return sample_lines(name, documentation, "counter", labelnames, values)
+
+
+def gauge_lines(name, documentation, labelnames, values):
+    return sample_lines(name, documentation, "gauge", labelnames, values)
+
+
+class Counter:
+    """A monotonically increasing count per label set"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+        return counter_lines(self.name, self.documentation, self.labelnames, values)
+
+
+class Histogram:
+    """Observations bucketed by upper bound, per label set"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket (plus +Inf), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            return sum(series[0]) if series else 0
+
+    def render(self):
+        with self._lock:
+            series = sorted(
+                (labels, list(counts), total)
+                for labels, (counts, total) in self._series.items()
+            )
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        names = self.labelnames + ("le",)
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket{format_labels(names, labels + (bound,))} "
+                    f"{cumulative}"
+                )
+            suffix = format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{suffix} {total}"
+            yield f"{self.name}_count{suffix} {cumulative}"
+
+
+def collector(function):
+    """Register a function yielding exposition lines on each scrape
+
+    For stats other modules already keep, so they aren't counted twice.
+    """
+    COLLECTORS.append(function)
+    return function
+
+
+REQUEST_DURATION = Histogram(
+    "interview_http_request_duration_seconds",
+    "Time to handle a request, by view",
+    ["view", "method", "status"],
+)
+SPAN_DURATION = Histogram(
+    "interview_http_request_span_seconds",
+    "Time a request spent in each instrumented section, by view",
+    ["view", "span"],
+)
+LLM_REQUESTS = Counter(
+    "interview_llm_requests_total",
+    "Upstream LLM calls by operation and outcome (ok or the error raised)",
+    ["operation", "outcome"],
+)
+
+
+@contextmanager
+def span(name):
+    """Add the time spent in the block to the current request's ``name`` total
+
+    Spans may nest (the ORM queries of conversation building also count as
+    "db"), and outside a request they cost next to nothing. Usable as a
+    decorator.
+    """
+    spans = _request_spans.get()
+    if spans is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans[name] = spans.get(name, 0.0) + time.perf_counter() - started
+
+
+@contextmanager
+def llm_call(operation):
+    """Time an upstream LLM call as the "llm" span and count its outcome"""
+    with span("llm"):
+        try:
+            yield
+        except Exception as error:
+            LLM_REQUESTS.inc(operation, type(error).__name__)
+            raise
+    LLM_REQUESTS.inc(operation, "ok")
+
+
+def time_query(execute, sql, params, many, context):
+    """Database execute wrapper timing queries as the "db" span"""
+    spans = _request_spans.get()
+    if spans is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        spans["db"] = spans.get("db", 0.0) + time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """Time each request and observe its span totals once it's handled
+
+    Streaming responses are timed until their headers are ready.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        spans = {}
+        token = _request_spans.set(spans)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_spans.reset(token)
+        self.observe(request, response, time.perf_counter() - started, spans)
+        return response
+
+    async def __acall__(self, request):
+        spans = {}
+        token = _request_spans.set(spans)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_spans.reset(token)
+        self.observe(request, response, time.perf_counter() - started, spans)
+        return response
+
+    def observe(self, request, response, duration, spans):
+        match = request.resolver_match
+        view = match.url_name if match and match.url_name else "unmatched"
+        REQUEST_DURATION.observe(
+            duration, view, request.method, str(response.status_code)
+        )
+        for name, seconds in spans.items():
+            SPAN_DURATION.observe(seconds, view, name)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for function in COLLECTORS:
+        lines.extend(function())
+    return "\n".join(lines) + "\n"
+
+
+def may_scrape(request):
+    """Whether ``request`` may read /metrics
+
+    Scrapers either send ``Authorization: Bearer <METRICS_TOKEN>`` or
+    connect from an address in METRICS_ALLOWED_IPS. Behind a proxy the
+    connecting address is the proxy's, so use a token there.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        sent = request.headers.get("Authorization", "")
+        if hmac.compare_digest(sent.encode(), expected.encode()):
+            return True
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in settings.METRICS_ALLOWED_IPS
+    )
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.23 on 2026-10-18 00:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interview", "0003_article_articlechat_articlemessage_interviewarticle"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="imageupload",
+            name="content_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="imageupload",
+            name="encoded_data",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="imageupload",
+            name="mime_type",
+            field=models.CharField(blank=True, max_length=50),
+        ),
+    ]
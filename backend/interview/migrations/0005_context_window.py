@@ -0,0 +1,28 @@
+# Generated by Django 4.2.23 on 2026-10-18 00:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interview", "0004_imageupload_preprocessing"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="interview",
+            name="summarized_message_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="interview",
+            name="summary",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="message",
+            name="token_count",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
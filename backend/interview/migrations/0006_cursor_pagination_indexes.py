@@ -0,0 +1,29 @@
+# Generated by Django 4.2.23 on 2026-10-18 00:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interview", "0005_context_window"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="articlemessage",
+            index=models.Index(
+                fields=["chat", "timestamp"], name="articlemsg_chat_ts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="interview",
+            index=models.Index(fields=["-created_at"], name="interview_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["interview", "timestamp"], name="message_interview_ts_idx"
+            ),
+        ),
+    ]
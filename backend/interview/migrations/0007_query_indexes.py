@@ -0,0 +1,25 @@
+# Generated by Django 4.2.23 on 2026-10-18 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interview", "0006_cursor_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="articlechat",
+            index=models.Index(
+                fields=["interview", "article"], name="articlechat_lookup_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="interview",
+            index=models.Index(
+                fields=["is_active", "-created_at"], name="interview_active_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.23 on 2026-10-18 01:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interview", "0007_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="content",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="etag",
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="fetched_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="last_modified",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name="article",
+            name="url",
+            field=models.URLField(max_length=500, unique=True),
+        ),
+    ]
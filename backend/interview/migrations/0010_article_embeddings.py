@@ -0,0 +1,28 @@
+# Generated by Django 4.2.23 on 2026-10-18 01:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interview", "0009_job_queue"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="embedded_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="embedding",
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="embedding_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
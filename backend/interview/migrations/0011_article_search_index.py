@@ -0,0 +1,93 @@
+# Generated by Django 4.2.23 on 2026-10-18 01:09
+
+from django.db import migrations
+
+# The full-text index as of this migration. It's spelled out here rather
+# than imported from interview.search, so later changes there don't change
+# what this migration does.
+SQLITE_INDEX_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS interview_article_fts USING fts5(
+        title, summary, key_highlights,
+        content='interview_article', content_rowid='rowid',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS interview_article_fts_insert AFTER INSERT ON interview_article
+    BEGIN
+        INSERT INTO interview_article_fts (rowid, title, summary, key_highlights)
+        VALUES (new.rowid, new.title, new.summary, new.key_highlights);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS interview_article_fts_delete AFTER DELETE ON interview_article
+    BEGIN
+        INSERT INTO interview_article_fts
+            (interview_article_fts, rowid, title, summary, key_highlights)
+        VALUES ('delete', old.rowid, old.title, old.summary, old.key_highlights);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS interview_article_fts_update
+    AFTER UPDATE OF title, summary, key_highlights ON interview_article
+    BEGIN
+        INSERT INTO interview_article_fts
+            (interview_article_fts, rowid, title, summary, key_highlights)
+        VALUES ('delete', old.rowid, old.title, old.summary, old.key_highlights);
+        INSERT INTO interview_article_fts (rowid, title, summary, key_highlights)
+        VALUES (new.rowid, new.title, new.summary, new.key_highlights);
+    END
+    """,
+    "INSERT INTO interview_article_fts (interview_article_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS interview_article_fts_update",
+    "DROP TRIGGER IF EXISTS interview_article_fts_delete",
+    "DROP TRIGGER IF EXISTS interview_article_fts_insert",
+    "DROP TABLE IF EXISTS interview_article_fts",
+]
+
+POSTGRES_INDEX_SQL = [
+    """
+    ALTER TABLE interview_article ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', title), 'A')
+        || setweight(to_tsvector('english', summary), 'B')
+        || setweight(to_tsvector('english', key_highlights::text), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS interview_article_search_idx ON interview_article "
+    "USING GIN (search_vector)",
+]
+
+POSTGRES_DROP_SQL = [
+    "DROP INDEX IF EXISTS interview_article_search_idx",
+    "ALTER TABLE interview_article DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run(schema_editor, statements):
+    with schema_editor.connection.cursor() as cursor:
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            cursor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    run(schema_editor, {"sqlite": SQLITE_INDEX_SQL, "postgresql": POSTGRES_INDEX_SQL})
+
+
+def drop_search_index(apps, schema_editor):
+    run(schema_editor, {"sqlite": SQLITE_DROP_SQL, "postgresql": POSTGRES_DROP_SQL})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interview", "0010_article_embeddings"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.23 on 2026-10-18 01:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interview", "0012_idempotency_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="result",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
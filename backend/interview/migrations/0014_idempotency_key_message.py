@@ -0,0 +1,23 @@
+# Generated by Django 4.2.23 on 2026-10-18 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interview", "0013_job_result"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="idempotencykey",
+            name="message_id",
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="idempotencykey",
+            name="released",
+            field=models.BooleanField(default=False),
+        ),
+    ]
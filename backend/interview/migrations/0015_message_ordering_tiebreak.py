@@ -0,0 +1,21 @@
+# Generated by Django 4.2.23 on 2026-10-18 02:27
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interview", "0014_idempotency_key_message"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="articlemessage",
+            options={"ordering": ["timestamp", "id"]},
+        ),
+        migrations.AlterModelOptions(
+            name="message",
+            options={"ordering": ["timestamp", "id"]},
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.23 on 2026-10-18 02:41
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def estimate_tokens(text):
+    # The estimate as of this migration, about four characters a token
+    return len(text) // 4 + 1
+
+
+def backfill_token_counts(apps, schema_editor):
+    """Count tokens for messages saved before Message.token_count existed"""
+    Message = apps.get_model("interview", "Message")
+    pending = Message.objects.filter(token_count__isnull=True).only("id", "content")
+    while True:
+        batch = list(pending[:BATCH_SIZE])
+        if not batch:
+            break
+        for message in batch:
+            message.token_count = estimate_tokens(message.content)
+        Message.objects.bulk_update(batch, ["token_count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interview", "0015_message_ordering_tiebreak"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_token_counts, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,10 @@
 import uuid
 
 from django.db import models
+from django.utils import timezone
+
+from .context import estimate_tokens
+from .images import prepare_image_upload
 
 
 class Interview(models.Model):
@@ -9,6 +13,19 @@ class Interview(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
     question = models.TextField(blank=True)
+    # Rolling summary of the oldest messages, which are no longer sent verbatim
+    summary = models.TextField(blank=True)
+    summarized_message_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Cursor pagination over the interview list
+            models.Index(fields=["-created_at"], name="interview_created_idx"),
+            # Active interviews, newest first
+            models.Index(
+                fields=["is_active", "-created_at"], name="interview_active_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"Interview {self.id} - {self.created_at}"
@@ -27,13 +44,41 @@ class Message(models.Model):
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
     content = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
+    token_count = models.PositiveIntegerField(null=True, blank=True)
 
     class Meta:
-        ordering = ["timestamp"]
+        ordering = ["timestamp", "id"]
+        indexes = [
+            # Transcript reads and cursor pagination within an interview
+            models.Index(
+                fields=["interview", "timestamp"], name="message_interview_ts_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.role}: {self.content[:50]}..."
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Content as loaded, so saving only re-counts tokens when it changed
+        instance._saved_content = instance.__dict__.get("content")
+        return instance
+
+    def save(self, *args, **kwargs):
+        content_loaded = "content" not in self.get_deferred_fields()
+        if content_loaded and (
+            self.token_count is None
+            or self.content != getattr(self, "_saved_content", None)
+        ):
+            self.token_count = estimate_tokens(self.content)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "token_count" not in update_fields:
+                kwargs["update_fields"] = [*update_fields, "token_count"]
+        super().save(*args, **kwargs)
+        if content_loaded:
+            self._saved_content = self.content
+
 
 class ImageUpload(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -42,19 +87,41 @@ class ImageUpload(models.Model):
     )
     image = models.ImageField(upload_to="interview_images/")
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    mime_type = models.CharField(max_length=50, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    # Base64 payload sent to the model, cached so turns do no image I/O
+    encoded_data = models.TextField(blank=True)
 
     def __str__(self):
         return f"Image for {self.message.role} message"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.image and not self.encoded_data:
+            prepare_image_upload(self)
+        super().save(*args, **kwargs)
+
 
 class Article(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=500)
-    url = models.URLField()
+    url = models.URLField(max_length=500, unique=True)
     source = models.CharField(max_length=100)  # shopify, robinhood, pinterest
     summary = models.TextField()
     key_highlights = models.JSONField(default=list)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Scraped article body and the validators for conditional re-fetches
+    content = models.TextField(blank=True)
+    etag = models.CharField(max_length=200, blank=True)
+    last_modified = models.CharField(max_length=100, blank=True)
+    fetched_at = models.DateTimeField(null=True, blank=True)
+    # Hash of ``content``, and of the content the summary was generated from
+    content_hash = models.CharField(max_length=64, blank=True)
+    summarized_hash = models.CharField(max_length=64, blank=True)
+    # float32 embedding used for recommendations, and the hash of the text
+    # and model it's from
+    embedding = models.BinaryField(null=True, editable=False)
+    embedding_hash = models.CharField(max_length=64, blank=True)
+    embedded_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.title} - {self.source}"
@@ -87,6 +154,14 @@ class ArticleChat(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # start_article_chat's get_or_create lookup
+            models.Index(
+                fields=["interview", "article"], name="articlechat_lookup_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"Chat for {self.article.title}"
 
@@ -106,7 +181,78 @@ class ArticleMessage(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ["timestamp"]
+        ordering = ["timestamp", "id"]
+        indexes = [
+            # Transcript reads and cursor pagination within an article chat
+            models.Index(fields=["chat", "timestamp"], name="articlemsg_chat_ts_idx"),
+        ]
 
     def __str__(self):
         return f"{self.role}: {self.content[:50]}..."
+
+
+class Job(models.Model):
+    """A unit of background work, run by `manage.py run_worker`"""
+
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=100)  # a key of settings.JOB_HANDLERS
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    leased_by = models.CharField(max_length=100, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    result = models.JSONField(null=True, blank=True)  # what the handler returned
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="job_ready_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} job {self.id} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """The outcome of a request sent with an Idempotency-Key header
+
+    ``response`` stays empty while the first request with the key is being
+    handled; identical requests wait for it and then get the same response.
+    If it fails after saving the user's message, the key is ``released`` to
+    the next attempt rather than forgotten.
+    """
+
+    key = models.CharField(max_length=255)
+    scope = models.CharField(max_length=200)  # the view and the resource it acts on
+    fingerprint = models.CharField(max_length=64)  # hash of the request data
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True)
+    # The user's message saved under the key. It's kept when the reply fails,
+    # so a retry only redoes the completion instead of saving it again.
+    message_id = models.UUIDField(null=True, blank=True)
+    # The request holding the key failed after saving the message; the next
+    # attempt with the key takes it over
+    released = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scope", "key"], name="idempotency_key_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.key} for {self.scope}"
@@ -0,0 +1,19 @@
+from rest_framework.pagination import CursorPagination
+
+
+class InterviewCursorPagination(CursorPagination):
+    """Newest interviews first, keyed on created_at"""
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "-created_at"
+
+
+class MessageCursorPagination(CursorPagination):
+    """Transcript messages oldest first, keyed on timestamp"""
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = "timestamp"
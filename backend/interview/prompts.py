@@ -0,0 +1,183 @@
+import functools
+import logging
+import string
+import threading
+from collections import defaultdict
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# System prompt for the interviewer
+SYSTEM_PROMPT = """You are an interviewer for a System Design loop. Your role is to simulate a real-world interview. Follow these instructions closely:
+	1.	Introduction:
+	•	Start by introducing yourself as the interviewer.
+	•	Present a concise, ambiguous problem statement, e.g., "Design YouTube," "Build a URL shortener," or "Create a global code deployment system."
+	2.	Interview Style:
+	•	The candidate (user) will drive the conversation by asking clarifying questions.
+	•	You should reply concisely, giving only the information specifically requested.
+	•	Avoid over-explaining or volunteering details unless explicitly asked.
+	3.	Active Interviewing:
+	•	If the candidate overlooks a key area (e.g., scaling, data modeling, consistency trade-offs, APIs, caching, monitoring, etc.), you may jump in to ask about gaps in their design, just as a real interviewer would.
+	•	Keep these interruptions natural and occasional.
+	4.	Tone & Flow:
+	•	Be professional but approachable.
+	•	Keep the session structured, realistic, and time-aware.
+	5.	Image Analysis:
+	•	If the candidate shares images (diagrams, sketches, etc.), analyze them and provide feedback on their system design approach.
+	•	Ask clarifying questions about the design elements shown in the images.
+
+Goal: Simulate a realistic, back-and-forth system design interview where the candidate must drive the design, clarify assumptions, and think through trade-offs, while you keep them honest with follow-ups.
+
+Do not volunteer feedback unless asked for it. If you see a gap in the design, ask about it. However, ask one question at a time.
+
+When providing feedback and questions about the design, provide feedback that is specific. Only tackle ONE specific issue at a time. 
+Don't overwhelm the interviewee with too many questions or feedback at once. Address one issue at a time. 
+
+"""
+
+
+class PromptTemplate:
+    """A named, versioned prompt template
+
+    Templates are parsed once when defined, and rendered prompts are
+    memoized, so every request for the same interview or article gets a
+    byte-identical string and the provider's prompt cache keeps hitting.
+    Bump the version whenever the text changes so usage can be compared
+    across versions.
+    """
+
+    def __init__(self, name, version, text):
+        self.name = name
+        self.version = version
+        self.text = text
+        self.fields = frozenset(
+            field for _, field, _, _ in string.Formatter().parse(text) if field
+        )
+        self._render = functools.lru_cache(maxsize=1024)(self._format)
+
+    def __str__(self):
+        return f"{self.name}@{self.version}"
+
+    def _format(self, values):
+        return self.text.format(**dict(values))
+
+    def render(self, **values):
+        if values.keys() != self.fields:
+            raise KeyError(f"{self} expects {sorted(self.fields)}")
+        return self._render(tuple(sorted(values.items())))
+
+
+INTERVIEW_PROMPT = PromptTemplate(
+    "interview",
+    2,
+    SYSTEM_PROMPT.replace("{", "{{").replace("}", "}}")
+    + "\nToday's question: {question}\n",
+)
+
+ARTICLE_CHAT_PROMPT = PromptTemplate(
+    "article_chat",
+    2,
+    """You are a helpful assistant discussing the article: {title}. Use the following context to answer questions:
+Article: {title}
+Summary: {summary}
+Key Highlights: {key_highlights}
+URL: {url}
+""",
+)
+
+SUMMARY_MESSAGE = "Summary of the interview so far:\n{summary}"
+
+
+def interview_prompt(interview, pinned, summary, recent):
+    """Assemble the messages sent for an interview turn
+
+    The system prompt with the question and the pinned opening turns never
+    change for an interview, so they form a stable prefix the provider can
+    cache. The running summary follows, then the recent turns.
+    """
+    conversation = [
+        {
+            "role": "system",
+            "content": INTERVIEW_PROMPT.render(question=interview.question),
+        }
+    ]
+    conversation.extend(pinned)
+    if summary:
+        conversation.append(
+            {"role": "system", "content": SUMMARY_MESSAGE.format(summary=summary)}
+        )
+    return conversation + list(recent)
+
+
+def article_chat_prompt(article):
+    """The system message for a chat about ``article``"""
+    return {
+        "role": "system",
+        "content": ARTICLE_CHAT_PROMPT.render(
+            title=article.title,
+            summary=article.summary,
+            key_highlights=", ".join(article.key_highlights),
+            url=article.url,
+        ),
+    }
+
+
+_usage_lock = threading.Lock()
+_usage = defaultdict(
+    lambda: {
+        "requests": 0,
+        "prompt_tokens": 0,
+        "cached_tokens": 0,
+        "completion_tokens": 0,
+    }
+)
+
+
+def record_usage(template, usage):
+    """Tally the prompt tokens of a completion, and how many hit the prompt cache"""
+    if usage is None:
+        return
+    details = usage.prompt_tokens_details
+    cached = (details.cached_tokens or 0) if details else 0
+    with _usage_lock:
+        totals = _usage[str(template)]
+        totals["requests"] += 1
+        totals["prompt_tokens"] += usage.prompt_tokens
+        totals["cached_tokens"] += cached
+        totals["completion_tokens"] += usage.completion_tokens
+    logger.info(
+        "%s: %d prompt tokens (%d cached, %d uncached), %d completion tokens",
+        template,
+        usage.prompt_tokens,
+        cached,
+        usage.prompt_tokens - cached,
+        usage.completion_tokens,
+    )
+
+
+def prompt_usage_stats():
+    """Token usage per prompt template version in this process"""
+    with _usage_lock:
+        return {template: dict(totals) for template, totals in _usage.items()}
+
+
+@metrics.collector
+def usage_metrics():
+    usage = prompt_usage_stats()
+    yield from metrics.counter_lines(
+        "interview_llm_tokens_total",
+        "Tokens used by upstream LLM completions, by prompt template",
+        ["template", "kind"],
+        {
+            (template, kind): totals[f"{kind}_tokens"]
+            for template, totals in usage.items()
+            for kind in ("prompt", "cached", "completion")
+        },
+    )
+    yield from metrics.counter_lines(
+        "interview_llm_completions_total",
+        "Upstream LLM completions that reported usage, by prompt template",
+        ["template"],
+        {(template,): totals["requests"] for template, totals in usage.items()},
+    )
@@ -0,0 +1,281 @@
+import hashlib
+import heapq
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .embeddings import get_embedder, pack, unpack
+from .jobs import enqueue
+from .keywords import tfidf_keywords, tokenize
+from .models import Article, InterviewArticle
+from .search import rank_articles
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - ranking falls back to pure Python
+    np = None
+
+_index_lock = threading.Lock()
+_index = None
+
+
+def embedding_text(article):
+    """The text an article is embedded from"""
+    return "\n".join(
+        [
+            article.title,
+            article.summary,
+            " ".join(article.key_highlights),
+            article.content[: settings.EMBEDDING_INPUT_CHARS],
+        ]
+    )
+
+
+def interview_text(interview):
+    """The text a finished interview is embedded from
+
+    Long transcripts are cut to their latest turns, the question and the
+    running summary cover the rest.
+    """
+    transcript = "\n".join(interview.messages.values_list("content", flat=True))
+    parts = [
+        interview.question,
+        interview.summary,
+        transcript[-settings.EMBEDDING_INPUT_CHARS :],
+    ]
+    return "\n".join(part for part in parts if part)
+
+
+def embedding_hash(text):
+    """Hash of the text an embedding is made from and the model making it
+
+    Changing EMBEDDING_BACKEND, EMBEDDING_MODEL or EMBEDDING_DIMENSIONS
+    changes every hash, so ``embed_articles`` redoes every article.
+    """
+    digest = hashlib.sha256()
+    for part in (
+        settings.EMBEDDING_BACKEND,
+        settings.EMBEDDING_MODEL,
+        str(settings.EMBEDDING_DIMENSIONS),
+        text,
+    ):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def enqueue_article_embeddings(article_ids):
+    """Queue embed_articles jobs for ``article_ids``"""
+    article_ids = [str(id) for id in article_ids]
+    batch_size = settings.EMBEDDING_BATCH_SIZE
+    return [
+        enqueue("embed_articles", {"article_ids": article_ids[i : i + batch_size]})
+        for i in range(0, len(article_ids), batch_size)
+    ]
+
+
+def embed_articles(payload):
+    """Job handler: embed a batch of articles
+
+    Articles whose text and embedding model haven't changed since they were
+    last embedded are skipped, so each version of an article is only
+    embedded once per model.
+    """
+    pending = []
+    for article in Article.objects.filter(id__in=payload["article_ids"]):
+        text = embedding_text(article)
+        text_hash = embedding_hash(text)
+        if article.embedding_hash != text_hash:
+            article.embedding_hash = text_hash
+            pending.append((article, text))
+    if not pending:
+        return
+
+    vectors = get_embedder().embed([text for _, text in pending])
+    now = timezone.now()
+    for (article, _), vector in zip(pending, vectors):
+        article.embedding = pack(vector)
+        article.embedded_at = now
+    Article.objects.bulk_update(
+        [article for article, _ in pending],
+        ["embedding", "embedding_hash", "embedded_at"],
+    )
+
+
+class ArticleIndex:
+    """Unit-length float32 article embeddings held in one contiguous matrix
+
+    Ranking every article is a single matrix-vector product followed by a
+    partial sort, without NumPy it falls back to a plain Python scan.
+    """
+
+    def __init__(self, ids, vectors, dimensions):
+        self.ids = ids
+        if np is not None:
+            self.matrix = np.frombuffer(b"".join(vectors), dtype=np.float32)
+            self.matrix = self.matrix.reshape(len(ids), dimensions)
+        else:
+            self.matrix = [unpack(vector) for vector in vectors]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, vector, k):
+        """The ``k`` closest articles to ``vector`` as ``(id, score)`` pairs"""
+        k = min(k, len(self.ids))
+        if k == 0:
+            return []
+        if np is None:
+            scores = (
+                (sum(a * b for a, b in zip(row, vector)), index)
+                for index, row in enumerate(self.matrix)
+            )
+            return [
+                (self.ids[index], score) for score, index in heapq.nlargest(k, scores)
+            ]
+
+        scores = self.matrix @ np.asarray(vector, dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[index], float(scores[index])) for index in top]
+
+
+def load_article_index():
+    """Build an ArticleIndex from every article embedded at the current size"""
+    dimensions = settings.EMBEDDING_DIMENSIONS
+    rows = (
+        Article.objects.exclude(embedding=None)
+        .order_by("id")
+        .values_list("id", "embedding")
+    )
+    ids, vectors = [], []
+    for article_id, embedding in rows:
+        # Skip vectors left over from a different embedding size
+        if len(embedding) == dimensions * 4:
+            ids.append(article_id)
+            vectors.append(bytes(embedding))
+    return ArticleIndex(ids, vectors, dimensions)
+
+
+def get_article_index():
+    """Return this process's ArticleIndex, reloading it once articles change
+
+    Checking for changes is a single aggregate query, so the matrix is only
+    read back from the database after articles are embedded or deleted.
+    """
+    global _index
+    stats = Article.objects.exclude(embedding=None).aggregate(
+        count=Count("id"), latest=Max("embedded_at")
+    )
+    version = (stats["count"], stats["latest"], settings.EMBEDDING_DIMENSIONS)
+    with _index_lock:
+        if _index is None or _index[0] != version:
+            _index = (version, load_article_index())
+        return _index[1]
+
+
+def rank_by_embedding(interview, limit):
+    """Rank every article by embedding similarity to the interview
+
+    Embeds the interview with EMBEDDING_BACKEND, which is a network call for
+    the OpenAI backend.
+    """
+    index = get_article_index()
+    if not len(index):
+        return []
+    vector = get_embedder().embed([interview_text(interview)])[0]
+    return index.search(vector, limit)
+
+
+def normalized(matches):
+    """``(id, score)`` pairs as a dict of scores scaled to at most 1"""
+    top = max((score for _, score in matches), default=0) or 1
+    return {article_id: score / top for article_id, score in matches}
+
+
+def question_candidates(question):
+    """Search matches for an interview question, memoized per question text
+
+    Many interviews share a question, so its candidates are computed once
+    and reused until RECOMMENDATION_CACHE_TIMEOUT passes.
+    """
+    terms = " ".join(tokenize(question))
+    key = "recommendations:" + hashlib.sha256(terms.encode("utf-8")).hexdigest()
+    matches = cache.get(key)
+    if matches is None:
+        matches = rank_articles(terms, settings.RECOMMENDATION_CANDIDATES)
+        cache.set(key, matches, settings.RECOMMENDATION_CACHE_TIMEOUT)
+    return matches
+
+
+def rank_hybrid(interview, limit):
+    """Rank articles for an interview locally, without any LLM or network call
+
+    Candidates come from the full-text index, searched with the question
+    (memoized) and with TF-IDF keywords of the transcript. They are
+    reranked by both search scores plus how many of the keywords appear in
+    an article's title and highlights, while spreading picks across sources.
+    """
+    keywords = dict(
+        tfidf_keywords(
+            interview.messages.values_list("content", flat=True),
+            settings.RECOMMENDATION_KEYWORDS,
+        )
+    )
+    by_question = normalized(question_candidates(interview.question))
+    by_transcript = normalized(
+        rank_articles(" ".join(keywords), settings.RECOMMENDATION_CANDIDATES)
+        if keywords
+        else []
+    )
+    candidates = Article.objects.filter(
+        id__in=by_question.keys() | by_transcript.keys()
+    ).only("id", "source", "title", "key_highlights")
+
+    keyword_total = sum(keywords.values()) or 1
+    scores, sources = {}, {}
+    for article in candidates:
+        words = set(tokenize(article.title + " " + " ".join(article.key_highlights)))
+        coverage = sum(keywords.get(word, 0) for word in words) / keyword_total
+        scores[article.id] = (
+            0.5 * by_transcript.get(article.id, 0)
+            + 0.3 * by_question.get(article.id, 0)
+            + 0.2 * coverage
+        )
+        sources[article.id] = article.source
+
+    ranked = []
+    while scores and len(ranked) < limit:
+        article_id = max(scores, key=scores.get)
+        ranked.append((article_id, scores.pop(article_id)))
+        # Favour sources that haven't been picked yet
+        for other in scores:
+            if sources[other] == sources[article_id]:
+                scores[other] *= 0.85
+    return ranked
+
+
+def recommend_articles(interview, limit=None):
+    """Rank articles against a finished interview and save the top matches
+
+    Ranking uses ARTICLE_RECOMMENDER. Replaces any earlier recommendations
+    for the interview and returns the new InterviewArticle rows, best match
+    first.
+    """
+    rank = import_string(settings.ARTICLE_RECOMMENDER)
+    matches = rank(interview, limit or settings.RECOMMENDED_ARTICLE_COUNT)
+    recommendations = [
+        InterviewArticle(
+            interview=interview, article_id=article_id, relevance_score=score
+        )
+        for article_id, score in matches
+    ]
+    with transaction.atomic():
+        InterviewArticle.objects.filter(interview=interview).delete()
+        InterviewArticle.objects.bulk_create(recommendations)
+    return recommendations
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import re
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import metrics
+
+CACHE_ALIAS = "article_responses"
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0}
+
+
+def normalize_question(text):
+    """Fold case, whitespace and trailing punctuation out of a question
+
+    So "What are the key takeaways?" and "what are the  key takeaways"
+    share a cache entry.
+    """
+    return re.sub(r"\s+", " ", text.lower()).strip().rstrip("?!. ")
+
+
+def response_key(article_id, conversation):
+    """Cache key for the reply to the last message of an article conversation
+
+    Keyed by article, normalized question and a fingerprint of the history
+    before it. The system message carries the article's title, summary and
+    highlights, so entries for an article stop matching as soon as its
+    summary changes.
+    """
+    *history, question = conversation
+    fingerprint = hashlib.sha256(
+        json.dumps(
+            [[message["role"], message["content"]] for message in history]
+            + [normalize_question(question["content"])]
+        ).encode("utf-8")
+    ).hexdigest()
+    return f"article:{article_id}:{fingerprint}"
+
+
+def record(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def get_cached_response(key):
+    """The cached reply for ``key``, or None on a miss"""
+    content = caches[CACHE_ALIAS].get(key)
+    record("misses" if content is None else "hits")
+    return content
+
+
+def cache_response(key, content):
+    caches[CACHE_ALIAS].set(key, content)
+    record("stores")
+
+
+def response_cache_stats():
+    """Hits, misses and stores in this process since it started"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+@metrics.collector
+def response_cache_metrics():
+    return metrics.counter_lines(
+        "interview_article_response_cache_total",
+        "Article chat response cache lookups and stores, by event",
+        ["event"],
+        {(event,): count for event, count in response_cache_stats().items()},
+    )
+
+
+def use_response_cache(validated_data):
+    """Whether a send request may be answered from the cache
+
+    Clients opt out per message with ``"cache": false``, and
+    ARTICLE_RESPONSE_CACHE_ENABLED turns caching off altogether.
+    """
+    return settings.ARTICLE_RESPONSE_CACHE_ENABLED and validated_data["cache"]
@@ -0,0 +1,105 @@
+import re
+import uuid
+
+from django.db import connection
+
+# Full-text index over Article.title, summary and key_highlights, kept
+# current by the database itself: an external-content FTS5 table maintained
+# by triggers on SQLite, a generated tsvector column with a GIN index on
+# Postgres. Migration 0011 creates it; these are the SQLite triggers, and
+# a rebuild of the index, for when a schema change drops them.
+SQLITE_TRIGGER_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS interview_article_fts_insert AFTER INSERT ON interview_article
+    BEGIN
+        INSERT INTO interview_article_fts (rowid, title, summary, key_highlights)
+        VALUES (new.rowid, new.title, new.summary, new.key_highlights);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS interview_article_fts_delete AFTER DELETE ON interview_article
+    BEGIN
+        INSERT INTO interview_article_fts
+            (interview_article_fts, rowid, title, summary, key_highlights)
+        VALUES ('delete', old.rowid, old.title, old.summary, old.key_highlights);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS interview_article_fts_update
+    AFTER UPDATE OF title, summary, key_highlights ON interview_article
+    BEGIN
+        INSERT INTO interview_article_fts
+            (interview_article_fts, rowid, title, summary, key_highlights)
+        VALUES ('delete', old.rowid, old.title, old.summary, old.key_highlights);
+        INSERT INTO interview_article_fts (rowid, title, summary, key_highlights)
+        VALUES (new.rowid, new.title, new.summary, new.key_highlights);
+    END
+    """,
+    "INSERT INTO interview_article_fts (interview_article_fts) VALUES ('rebuild')",
+]
+
+
+# Column weights for BM25: matches in titles count most
+SQLITE_SEARCH_SQL = """
+    SELECT article.id, -bm25(interview_article_fts, 10.0, 4.0, 2.0) AS score
+    FROM interview_article_fts
+    JOIN interview_article AS article ON article.rowid = interview_article_fts.rowid
+    WHERE interview_article_fts MATCH %s
+    ORDER BY score DESC
+    LIMIT %s OFFSET %s
+"""
+
+POSTGRES_SEARCH_SQL = """
+    SELECT id, ts_rank_cd(search_vector, query, 32) AS score
+    FROM interview_article, to_tsquery('english', %s) AS query
+    WHERE search_vector @@ query
+    ORDER BY score DESC
+    LIMIT %s OFFSET %s
+"""
+
+WORD_RE = re.compile(r"\w+")
+
+
+def match_any(text, vendor):
+    """A full-text query matching any word of ``text``, free of query syntax"""
+    words = WORD_RE.findall(text.lower())
+    if vendor == "sqlite":
+        return " OR ".join(f'"{word}"' for word in words)
+    return " | ".join(words)
+
+
+def rank_articles(text, limit, offset=0):
+    """Article ids matching ``text`` as ``(id, score)`` pairs, best first
+
+    Uses the database's full-text index, so it stays fast on large article
+    tables and is cheap enough to generate recommendation candidates.
+    """
+    queries = {"sqlite": SQLITE_SEARCH_SQL, "postgresql": POSTGRES_SEARCH_SQL}
+    if connection.vendor not in queries:
+        raise NotImplementedError(f"No article search for {connection.vendor}")
+    query = match_any(text, connection.vendor)
+    if not query:
+        return []
+
+    with connection.cursor() as cursor:
+        cursor.execute(queries[connection.vendor], [query, limit, offset])
+        # SQLite hands back UUIDs as hex strings
+        return [(uuid.UUID(str(id)), score) for id, score in cursor.fetchall()]
+
+
+def restore_search_triggers(connection):
+    """Recreate the SQLite index triggers if a schema change dropped them
+
+    Django rebuilds SQLite tables for some schema changes, which drops their
+    triggers but leaves the FTS table behind, out of date.
+    """
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN "
+            "('interview_article_fts', 'interview_article_fts_insert')"
+        )
+        if [name for name, in cursor.fetchall()] == ["interview_article_fts"]:
+            for sql in SQLITE_TRIGGER_SQL:
+                cursor.execute(sql)
@@ -1,5 +1,7 @@
+from django.conf import settings
 from rest_framework import serializers
 
+from .images import check_direct_upload, inspect_image, reuse_stored_image
 from .models import (
     Article,
     ArticleChat,
@@ -7,14 +9,21 @@ from .models import (
     ImageUpload,
     Interview,
     InterviewArticle,
+    Job,
     Message,
 )
 
+SHA256_PATTERN = r"^[0-9a-f]{64}$"
+
+# Most messages inlined in an interview or article chat. Clients fetch the
+# rest from messages/since/, starting after messages_cursor.
+INLINE_MESSAGES_LIMIT = 50
+
 
 class ImageUploadSerializer(serializers.ModelSerializer):
     class Meta:
         model = ImageUpload
-        fields = ["id", "image", "uploaded_at"]
+        fields = ["id", "image", "mime_type", "uploaded_at"]
 
 
 class MessageSerializer(serializers.ModelSerializer):
@@ -53,17 +62,40 @@ class ArticleMessageSerializer(serializers.ModelSerializer):
         fields = ["id", "role", "content", "timestamp"]
 
 
-class ArticleChatSerializer(serializers.ModelSerializer):
-    messages = ArticleMessageSerializer(many=True, read_only=True)
+class TranscriptSerializerMixin:
+    """Inline the first page of a transcript, with a cursor for the rest
+
+    ``messages`` holds at most INLINE_MESSAGES_LIMIT messages, oldest first.
+    ``messages_cursor`` is the id of the last of them and ``has_more_messages``
+    says whether messages/since/ has more after it. Views prefetch one
+    message past the limit so this takes no queries of its own.
+    """
+
+    message_serializer_class = None
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        page = list(instance.messages.all()[: INLINE_MESSAGES_LIMIT + 1])
+        data["has_more_messages"] = len(page) > INLINE_MESSAGES_LIMIT
+        page = page[:INLINE_MESSAGES_LIMIT]
+        data["messages"] = self.message_serializer_class(
+            page, many=True, context=self.context
+        ).data
+        data["messages_cursor"] = str(page[-1].id) if page else None
+        return data
+
+
+class ArticleChatSerializer(TranscriptSerializerMixin, serializers.ModelSerializer):
+    message_serializer_class = ArticleMessageSerializer
     article = ArticleSerializer(read_only=True)
 
     class Meta:
         model = ArticleChat
-        fields = ["id", "article", "messages", "created_at", "is_active"]
+        fields = ["id", "article", "created_at", "is_active"]
 
 
-class InterviewSerializer(serializers.ModelSerializer):
-    messages = MessageSerializer(many=True, read_only=True)
+class InterviewSerializer(TranscriptSerializerMixin, serializers.ModelSerializer):
+    message_serializer_class = MessageSerializer
     recommended_articles = InterviewArticleSerializer(many=True, read_only=True)
 
     class Meta:
@@ -74,23 +106,138 @@ class InterviewSerializer(serializers.ModelSerializer):
             "updated_at",
             "is_active",
             "question",
-            "messages",
             "recommended_articles",
         ]
 
 
+class InterviewSummarySerializer(serializers.ModelSerializer):
+    """Lightweight interview listing, built from an annotated queryset"""
+
+    message_count = serializers.IntegerField(read_only=True)
+    last_message_preview = serializers.CharField(read_only=True, allow_null=True)
+    last_message_at = serializers.DateTimeField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = Interview
+        fields = [
+            "id",
+            "created_at",
+            "updated_at",
+            "is_active",
+            "question",
+            "message_count",
+            "last_message_preview",
+            "last_message_at",
+        ]
+
+
 class CreateInterviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = Interview
         fields = ["question"]
 
 
+class ImageUploadField(serializers.FileField):
+    """An uploaded image, checked from its header rather than decoded
+
+    Files streamed in by ImageUploadHandler were checked as they arrived;
+    anything else is checked here.
+    """
+
+    def to_internal_value(self, data):
+        error = getattr(data, "upload_error", None)
+        if error:
+            raise serializers.ValidationError(error)
+        file = super().to_internal_value(data)
+        if getattr(file, "image_info", None) is None:
+            if file.size > settings.IMAGE_UPLOAD_MAX_BYTES:
+                raise serializers.ValidationError(
+                    f"Images may be at most {settings.IMAGE_UPLOAD_MAX_BYTES} bytes"
+                )
+            try:
+                file.image_info = inspect_image(file)
+            except ValueError as error:
+                raise serializers.ValidationError(str(error))
+            finally:
+                file.seek(0)
+        return file
+
+
 class SendMessageSerializer(serializers.Serializer):
     content = serializers.CharField(max_length=10000, required=False, allow_blank=True)
     images = serializers.ListField(
-        child=serializers.ImageField(), required=False, allow_empty=True
+        child=ImageUploadField(), required=False, allow_empty=True
+    )
+    # Images uploaded straight to storage, by SHA-256 (see request_image_upload)
+    image_hashes = serializers.ListField(
+        child=serializers.RegexField(SHA256_PATTERN), required=False, allow_empty=True
     )
 
+    def validate_image_hashes(self, hashes):
+        """Unsaved ImageUploads for the directly uploaded images
+
+        They're only checked here; save_user_message stores them.
+        """
+        storage = ImageUpload._meta.get_field("image").storage
+        uploads = []
+        for content_hash in dict.fromkeys(hashes):
+            upload = ImageUpload(content_hash=content_hash)
+            if not reuse_stored_image(upload):
+                try:
+                    check_direct_upload(content_hash, storage)
+                except ValueError as error:
+                    raise serializers.ValidationError(f"{content_hash}: {error}")
+            uploads.append(upload)
+        return uploads
+
+
+class ImageUploadRequestSerializer(serializers.Serializer):
+    sha256 = serializers.RegexField(SHA256_PATTERN)
+    size = serializers.IntegerField(min_value=1)
+    content_type = serializers.ChoiceField(
+        choices=["image/png", "image/jpeg", "image/gif", "image/webp"]
+    )
+
+    def validate_size(self, size):
+        if size > settings.IMAGE_UPLOAD_MAX_BYTES:
+            raise serializers.ValidationError(
+                f"Images may be at most {settings.IMAGE_UPLOAD_MAX_BYTES} bytes"
+            )
+        return size
+
 
 class SendArticleMessageSerializer(serializers.Serializer):
     content = serializers.CharField(max_length=10000)
+    # Set to false to always get a fresh reply rather than a cached one
+    cache = serializers.BooleanField(default=True)
+
+
+class MessagesSinceSerializer(serializers.Serializer):
+    after = serializers.UUIDField(required=False)
+
+
+class ArticleSearchSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=500)
+    page = serializers.IntegerField(min_value=1, default=1)
+    page_size = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class ArticleSearchResultSerializer(ArticleSerializer):
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(ArticleSerializer.Meta):
+        fields = ArticleSerializer.Meta.fields + ["score"]
+
+
+class JobSerializer(serializers.ModelSerializer):
+    error = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = ["id", "kind", "status", "attempts", "result", "error", "updated_at"]
+
+    def get_error(self, job):
+        """The exception the last attempt raised, without its traceback"""
+        if job.status == "done" or not job.last_error:
+            return None
+        return job.last_error.strip().splitlines()[-1]
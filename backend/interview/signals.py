@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .conversation import cached_message_ids, invalidate_conversation
+from .embeddings import get_embedder
+from .llm import reset_clients
+from .metrics import time_query
+from .models import ImageUpload, Interview, Message
+from .search import restore_search_triggers
+
+
+def reset_history(interview_id):
+    """Rebuild an interview's cached conversation and summary from scratch"""
+    invalidate_conversation(interview_id)
+    Interview.objects.filter(id=interview_id).update(
+        summary="", summarized_message_count=0
+    )
+
+
+@receiver(post_save, sender=Message)
+def message_saved(sender, instance, created, **kwargs):
+    """Edited messages invalidate the cached conversation; new ones are appended"""
+    if not created:
+        reset_history(instance.interview_id)
+
+
+@receiver(post_delete, sender=Message)
+def message_deleted(sender, instance, **kwargs):
+    reset_history(instance.interview_id)
+
+
+@receiver(post_save, sender=ImageUpload)
+@receiver(post_delete, sender=ImageUpload)
+def image_changed(sender, instance, **kwargs):
+    """Image changes only matter once their message is already cached"""
+    try:
+        message = instance.message
+    except Message.DoesNotExist:
+        return
+    if str(message.id) in cached_message_ids(message.interview_id):
+        invalidate_conversation(message.interview_id)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    """Time queries made during a request as its "db" span"""
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Apply SQLITE_PRAGMAS to each new SQLite connection"""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+
+
+@receiver(setting_changed)
+def llm_settings_changed(sender, setting, **kwargs):
+    """Pick up new upstream backends, e.g. under override_settings"""
+    if setting.startswith("EMBEDDING_"):
+        get_embedder.cache_clear()
+    if setting.startswith(("LLM_", "OPENAI_")):
+        reset_clients()
+
+
+@receiver(post_migrate)
+def restore_search_index(sender, app_config, using, **kwargs):
+    if app_config.label == "interview":
+        restore_search_triggers(connections[using])
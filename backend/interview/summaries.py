@@ -0,0 +1,77 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.db.models import F
+
+from .jobs import enqueue
+from .llm import get_client
+from .metrics import llm_call
+from .models import Article
+from .recommendations import enqueue_article_embeddings
+
+SUMMARY_PROMPT = """You summarize engineering blog posts for engineers preparing for System Design interviews.
+Reply with a JSON object with two keys: "summary", a paragraph of 3-5 sentences on the problem and the approach taken, and "key_highlights", a list of 3-6 short strings naming the main techniques, trade-offs and results."""
+
+
+def content_hash(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def needs_summary(articles):
+    """Articles whose summary wasn't generated from their current content"""
+    return articles.exclude(content="").exclude(summarized_hash=F("content_hash"))
+
+
+def enqueue_article_summaries(articles):
+    """Queue summarize_articles jobs for the articles that need a summary"""
+    article_ids = [
+        str(id) for id in needs_summary(articles).values_list("id", flat=True)
+    ]
+    batch_size = settings.ARTICLE_SUMMARY_BATCH_SIZE
+    return [
+        enqueue("summarize_articles", {"article_ids": article_ids[i : i + batch_size]})
+        for i in range(0, len(article_ids), batch_size)
+    ]
+
+
+def summarize_article(article):
+    """Generate ``(summary, key_highlights)`` for an article with the LLM"""
+    with llm_call("article_summary"):
+        response = get_client().chat.completions.create(
+            model=settings.ARTICLE_SUMMARY_MODEL,
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {
+                    "role": "user",
+                    "content": f"Title: {article.title}\n\n{article.content}",
+                },
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=600,
+            temperature=0.2,
+        )
+    result = json.loads(response.choices[0].message.content)
+    return result["summary"], [str(item) for item in result["key_highlights"]]
+
+
+def summarize_articles(payload):
+    """Job handler: summarize a batch of articles
+
+    Articles whose content hasn't changed since their last summary are
+    skipped. Summaries finished before a failure are still saved, so a
+    retry only redoes the rest.
+    """
+    articles = needs_summary(Article.objects.filter(id__in=payload["article_ids"]))
+    summarized = []
+    try:
+        for article in articles:
+            article.summary, article.key_highlights = summarize_article(article)
+            article.summarized_hash = article.content_hash
+            summarized.append(article)
+    finally:
+        Article.objects.bulk_update(
+            summarized, ["summary", "key_highlights", "summarized_hash"]
+        )
+        # Recommendations match against the new summaries too
+        enqueue_article_embeddings(article.id for article in summarized)
@@ -0,0 +1,103 @@
+"""Streaming multipart image uploads
+
+``ImageUploadHandler`` goes in front of Django's default upload handlers
+for the views that take images, marked with ``accepts_images``. Every file
+uploaded to them is streamed chunk by chunk to a temporary file, and as
+the chunks arrive it's hashed, held to IMAGE_UPLOAD_MAX_BYTES and checked
+from its header to be an image of at most IMAGE_MAX_PIXELS pixels. Nothing
+is decoded until preprocessing reads the image back from the temporary
+file, and the hash saves reading it a second time.
+
+A file that breaks a limit isn't kept: the rest of it is read and dropped,
+and the reason is left on the file for ImageUploadField to report.
+"""
+
+import functools
+import hashlib
+import io
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+from .images import HEADER_BYTES, InvalidImage, inspect_image
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.received = 0
+        self.header = b""
+        # (format, size) once enough of the header has arrived
+        self.image_info = None
+        self.error = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.error is not None:
+            return None
+        self.received += len(raw_data)
+        if self.received > settings.IMAGE_UPLOAD_MAX_BYTES:
+            return self.reject(
+                f"Images may be at most {settings.IMAGE_UPLOAD_MAX_BYTES} bytes"
+            )
+        if self.image_info is None:
+            self.header += raw_data[: HEADER_BYTES - len(self.header)]
+            try:
+                self.image_info = inspect_image(io.BytesIO(self.header))
+            except InvalidImage as error:
+                # Most likely the header hasn't all arrived yet
+                if len(self.header) >= HEADER_BYTES:
+                    return self.reject(str(error))
+            except ValueError as error:
+                return self.reject(str(error))
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def reject(self, message):
+        self.error = message
+        self.file.seek(0)
+        self.file.truncate()
+        return None
+
+    def file_complete(self, file_size):
+        if self.error is None and self.image_info is None:
+            try:
+                self.image_info = inspect_image(io.BytesIO(self.header))
+            except ValueError as error:
+                self.reject(str(error))
+        self.header = b""
+        file = super().file_complete(self.file.tell() if self.error else file_size)
+        file.sha256 = None if self.error else self.digest.hexdigest()
+        file.image_info = self.image_info
+        file.upload_error = self.error
+        return file
+
+
+def accepts_images(view):
+    """Stream files uploaded to ``view`` through ImageUploadHandler
+
+    Goes outside any decorator that might read the request body, since the
+    handlers can only change before it's parsed. Other views keep Django's
+    default handlers.
+    """
+
+    def add_handler(request):
+        request.upload_handlers.insert(0, ImageUploadHandler(request))
+
+    if iscoroutinefunction(view):
+
+        @functools.wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            add_handler(request)
+            return await view(request, *args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        add_handler(request)
+        return view(request, *args, **kwargs)
+
+    return wrapper
@@ -5,8 +5,27 @@ from . import views
 urlpatterns = [
     path("start/", views.start_interview, name="start_interview"),
     path("list/", views.list_interviews, name="list_interviews"),
+    path("articles/search/", views.search_articles, name="search_articles"),
+    path("jobs/<uuid:job_id>/", views.get_job, name="get_job"),
+    path("images/uploads/", views.request_image_upload, name="request_image_upload"),
     path("<uuid:interview_id>/", views.get_interview, name="get_interview"),
+    path("<uuid:interview_id>/messages/", views.list_messages, name="list_messages"),
+    path(
+        "<uuid:interview_id>/messages/since/",
+        views.list_messages_since,
+        name="list_messages_since",
+    ),
     path("<uuid:interview_id>/send/", views.send_message, name="send_message"),
+    path(
+        "<uuid:interview_id>/send/stream/",
+        views.stream_message,
+        name="stream_message",
+    ),
+    path(
+        "<uuid:interview_id>/send/async/",
+        views.send_message_async,
+        name="send_message_async",
+    ),
     path("<uuid:interview_id>/end/", views.end_interview, name="end_interview"),
     path(
         "<uuid:interview_id>/articles/<uuid:article_id>/chat/",
@@ -16,9 +35,24 @@ urlpatterns = [
     path(
         "article-chat/<uuid:chat_id>/", views.get_article_chat, name="get_article_chat"
     ),
+    path(
+        "article-chat/<uuid:chat_id>/messages/",
+        views.list_article_messages,
+        name="list_article_messages",
+    ),
+    path(
+        "article-chat/<uuid:chat_id>/messages/since/",
+        views.list_article_messages_since,
+        name="list_article_messages_since",
+    ),
     path(
         "article-chat/<uuid:chat_id>/send/",
         views.send_article_message,
         name="send_article_message",
     ),
+    path(
+        "article-chat/<uuid:chat_id>/send/async/",
+        views.send_article_message_async,
+        name="send_article_message_async",
+    ),
 ]
@@ -1,15 +1,49 @@
-import base64
-import os
-
+import asyncio
+import json
+import logging
+import time
+from contextlib import aclosing
+from functools import partial
+
+import openai
 import requests
+from asgiref.sync import sync_to_async
 from bs4 import BeautifulSoup
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Prefetch, Q, Subquery, Window
+from django.db.models.functions import RowNumber, Substr
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    HttpResponseNotAllowed,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404
-from dotenv import load_dotenv
-from openai import OpenAI
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import idempotency, metrics
+from .completions import (
+    COMPLETION_JOBS,
+    article_reply,
+    enqueue_completion,
+    interview_reply,
+    prefers_async,
+)
+from .conversation import build_article_conversation, build_conversation
+from .db import write_transaction
+from .idempotency import idempotent, parse_request_data
+from .images import prepare_direct_upload, prepare_image_upload, staged_name
+from .llm import get_async_client
+from .metrics import llm_call
 from .models import (
     Article,
     ArticleChat,
@@ -17,56 +51,180 @@ from .models import (
     ImageUpload,
     Interview,
     InterviewArticle,
+    Job,
     Message,
 )
+from .pagination import InterviewCursorPagination, MessageCursorPagination
+from .prompts import ARTICLE_CHAT_PROMPT, INTERVIEW_PROMPT, record_usage
+from .recommendations import recommend_articles
+from .response_cache import (
+    cache_response,
+    get_cached_response,
+    response_key,
+    use_response_cache,
+)
+from .search import rank_articles
 from .serializers import (
+    INLINE_MESSAGES_LIMIT,
     ArticleChatSerializer,
     ArticleMessageSerializer,
+    ArticleSearchResultSerializer,
+    ArticleSearchSerializer,
     CreateInterviewSerializer,
+    ImageUploadRequestSerializer,
     InterviewSerializer,
+    InterviewSummarySerializer,
+    JobSerializer,
     MessageSerializer,
+    MessagesSinceSerializer,
     SendArticleMessageSerializer,
     SendMessageSerializer,
 )
+from .uploads import accepts_images
+
+logger = logging.getLogger(__name__)
 
-load_dotenv()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Length of the last message preview in interview listings
+PREVIEW_LENGTH = 120
 
-# System prompt for the interviewer
-SYSTEM_PROMPT = """You are an interviewer for a System Design loop. Your role is to simulate a real-world interview. Follow these instructions closely:
-	1.	Introduction:
-	•	Start by introducing yourself as the interviewer.
-	•	Present a concise, ambiguous problem statement, e.g., "Design YouTube," "Build a URL shortener," or "Create a global code deployment system."
-	2.	Interview Style:
-	•	The candidate (user) will drive the conversation by asking clarifying questions.
-	•	You should reply concisely, giving only the information specifically requested.
-	•	Avoid over-explaining or volunteering details unless explicitly asked.
-	3.	Active Interviewing:
-	•	If the candidate overlooks a key area (e.g., scaling, data modeling, consistency trade-offs, APIs, caching, monitoring, etc.), you may jump in to ask about gaps in their design, just as a real interviewer would.
-	•	Keep these interruptions natural and occasional.
-	4.	Tone & Flow:
-	•	Be professional but approachable.
-	•	Keep the session structured, realistic, and time-aware.
-	5.	Image Analysis:
-	•	If the candidate shares images (diagrams, sketches, etc.), analyze them and provide feedback on their system design approach.
-	•	Ask clarifying questions about the design elements shown in the images.
 
-Goal: Simulate a realistic, back-and-forth system design interview where the candidate must drive the design, clarify assumptions, and think through trade-offs, while you keep them honest with follow-ups.
+# Most messages returned by a single "since" request
+MESSAGES_SINCE_LIMIT = 100
 
-Do not volunteer feedback unless asked for it. If you see a gap in the design, ask about it. However, ask one question at a time.
 
-When providing feedback and questions about the design, provide feedback that is specific. Only tackle ONE specific issue at a time. 
-Don't overwhelm the interviewee with too many questions or feedback at once. Address one issue at a time. 
+# Seconds between checks on a job a client is long polling
+JOB_POLL_INTERVAL = 0.25
 
-"""
 
+def message_queryset():
+    """Messages with their images prefetched, minus cached image payloads"""
+    return Message.objects.prefetch_related(
+        Prefetch("images", queryset=ImageUpload.objects.defer("encoded_data"))
+    )
+
+
+def first_messages(messages, parent):
+    """Each transcript's first page of messages, plus one to tell if there's more
 
-def encode_image_to_base64(image_path):
-    """Encode image to base64 for OpenAI API"""
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode("utf-8")
+    Numbers the messages within each ``parent`` so a single prefetch query
+    can take the first few of every transcript.
+    """
+    return messages.annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=F(parent),
+            order_by=[F("timestamp").asc(), F("id").asc()],
+        )
+    ).filter(position__lte=INLINE_MESSAGES_LIMIT + 1)
+
+
+def interview_detail_queryset():
+    """Interviews with everything InterviewSerializer needs prefetched
+
+    Serializing one takes a fixed number of queries however long the
+    transcript is, and only its first page of messages is read. Cached
+    image payloads aren't needed for display.
+    """
+    return Interview.objects.prefetch_related(
+        Prefetch("messages", queryset=first_messages(message_queryset(), "interview")),
+        Prefetch(
+            "recommended_articles",
+            queryset=InterviewArticle.objects.select_related("article")
+            .defer("article__content", "article__embedding")
+            .order_by("-relevance_score"),
+        ),
+    )
+
+
+def article_chat_detail_queryset():
+    """Article chats with what ArticleChatSerializer needs prefetched"""
+    return ArticleChat.objects.select_related("article").prefetch_related(
+        Prefetch(
+            "messages",
+            queryset=first_messages(ArticleMessage.objects.all(), "chat"),
+        )
+    )
+
+
+def interview_summary_queryset():
+    """Interviews annotated with what InterviewSummarySerializer needs"""
+    last_message = Message.objects.filter(interview=OuterRef("pk")).order_by(
+        "-timestamp"
+    )
+    return Interview.objects.annotate(
+        message_count=Count("messages"),
+        last_message_preview=Substr(
+            Subquery(last_message.values("content")[:1]), 1, PREVIEW_LENGTH
+        ),
+        last_message_at=Subquery(last_message.values("timestamp")[:1]),
+    )
+
+
+def upstream_error_status(error):
+    """Status code and headers for a turn whose upstream LLM call failed
+
+    Calls the scheduler turned away, or that the provider kept rate limiting,
+    get a 503 with Retry-After so clients back off instead of hammering it.
+    """
+    if isinstance(error, openai.APITimeoutError):
+        return status.HTTP_504_GATEWAY_TIMEOUT, {}
+    if isinstance(error, openai.APIConnectionError):
+        return status.HTTP_502_BAD_GATEWAY, {}
+    if isinstance(error, openai.APIStatusError) and error.status_code in (429, 503):
+        retry_after = error.response.headers.get("retry-after", "1")
+        return status.HTTP_503_SERVICE_UNAVAILABLE, {"Retry-After": retry_after}
+    return status.HTTP_500_INTERNAL_SERVER_ERROR, {}
+
+
+def touch_interview(interview):
+    """Bump an interview's updated_at with a single UPDATE"""
+    interview.updated_at = timezone.now()
+    Interview.objects.filter(id=interview.id).update(updated_at=interview.updated_at)
+
+
+def save_user_message(interview, validated_data, key_record=None):
+    """Save the user's message and any uploaded images
+
+    Images are compressed and stored before the transaction opens, so the
+    database is only held for the inserts: the message, one bulk insert for
+    its images and the interview's updated_at. With ``key_record`` (the
+    request's Idempotency-Key) the message is recorded on the key, and a
+    retry after a failed reply gets back the message saved before.
+    """
+    saved = idempotency.saved_message(key_record, interview.messages)
+    if saved is not None:
+        return saved
+
+    uploads = []
+    for image in validated_data.get("images", []):
+        upload = ImageUpload(image=image)
+        prepare_image_upload(upload)
+        uploads.append(upload)
+    # Images uploaded straight to storage were only checked during validation
+    staged = []
+    for upload in validated_data.get("image_hashes", []):
+        staged.append(prepare_direct_upload(upload))
+        uploads.append(upload)
+
+    with write_transaction():
+        user_message = Message.objects.create(
+            interview=interview,
+            role="user",
+            content=validated_data.get("content", ""),
+        )
+        for upload in uploads:
+            upload.message = user_message
+        ImageUpload.objects.bulk_create(uploads)
+        touch_interview(interview)
+        idempotency.remember_message(key_record, user_message)
+        # Staged copies stay until their ImageUpload rows are safely saved,
+        # so a failed turn can be retried with the same hashes
+        storage = ImageUpload._meta.get_field("image").storage
+        for name in filter(None, staged):
+            transaction.on_commit(partial(storage.delete, name))
+
+    return user_message
 
 
 @api_view(["POST"])
@@ -74,16 +232,19 @@ def start_interview(request):
     """Start a new interview session"""
     serializer = CreateInterviewSerializer(data=request.data)
     if serializer.is_valid():
-        interview = Interview.objects.create(
-            question=serializer.validated_data.get("question", "Design a URL shortener")
-        )
+        with write_transaction():
+            interview = Interview.objects.create(
+                question=serializer.validated_data.get(
+                    "question", "Design a URL shortener"
+                )
+            )
 
-        # Create initial system message
-        initial_message = Message.objects.create(
-            interview=interview,
-            role="assistant",
-            content=f"Hello! I'm your System Design interviewer. Let's begin with today's question: {interview.question}. Please start by asking any clarifying questions you have about the requirements.",
-        )
+            # Create initial system message
+            initial_message = Message.objects.create(
+                interview=interview,
+                role="assistant",
+                content=f"Hello! I'm your System Design interviewer. Let's begin with today's question: {interview.question}. Please start by asking any clarifying questions you have about the requirements.",
+            )
 
         return Response(
             InterviewSerializer(interview).data, status=status.HTTP_201_CREATED
@@ -91,57 +252,35 @@ def start_interview(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@accepts_images
 @api_view(["POST"])
+@idempotent("interview:{interview_id}")
 def send_message(request, interview_id):
-    """Send a message in an interview and get AI response"""
+    """Send a message in an interview and get AI response
+
+    With ``Prefer: respond-async`` the reply is left to a completion job and
+    the response is a 202 pointing at it.
+    """
     interview = get_object_or_404(Interview, id=interview_id, is_active=True)
     serializer = SendMessageSerializer(data=request.data)
 
     if serializer.is_valid():
-        # Save user message
-        user_message = Message.objects.create(
-            interview=interview,
-            role="user",
-            content=serializer.validated_data.get("content", ""),
+        user_message = save_user_message(
+            interview,
+            serializer.validated_data,
+            getattr(request, "idempotency_key", None),
         )
+        if prefers_async(request):
+            job = enqueue_completion(
+                "complete_interview_turn", {"user_message_id": str(user_message.id)}
+            )
+            return accepted(job, MessageSerializer(user_message).data)
 
-        # Handle image uploads
-        images = serializer.validated_data.get("images", [])
-        for image in images:
-            ImageUpload.objects.create(message=user_message, image=image)
-
-        # Get conversation history
-        messages = interview.messages.all()
-        conversation = [{"role": "system", "content": SYSTEM_PROMPT}]
-
-        for msg in messages:
-            message_content = [{"type": "text", "text": msg.content}]
-
-            # Add images to the message if any
-            for img in msg.images.all():
-                try:
-                    image_path = img.image.path
-                    base64_image = encode_image_to_base64(image_path)
-                    message_content.append(
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
-                            },
-                        }
-                    )
-                except Exception as e:
-                    print(f"Error processing image: {e}")
-
-            conversation.append({"role": msg.role, "content": message_content})
+        conversation = build_conversation(interview)
 
         try:
             # Get AI response
-            response = client.chat.completions.create(
-                model="gpt-4o", messages=conversation, max_tokens=500, temperature=0.7
-            )
-
-            ai_response = response.choices[0].message.content
+            ai_response = interview_reply(interview, conversation)
 
             # Save AI response
             ai_message = Message.objects.create(
@@ -156,13 +295,392 @@ def send_message(request, interview_id):
             )
 
         except Exception as e:
-            return Response(
-                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            status_code, headers = upstream_error_status(e)
+            return Response({"error": str(e)}, status=status_code, headers=headers)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def accepted(job, user_message):
+    """202 for a message whose reply was left to a completion job"""
+    url = reverse("get_job", kwargs={"job_id": job.id})
+    return Response(
+        {"user_message": user_message, "job": {**JobSerializer(job).data, "url": url}},
+        status=status.HTTP_202_ACCEPTED,
+        headers={"Location": url, "Preference-Applied": "respond-async"},
+    )
+
+
+def sse_event(event, data):
+    """Format a single Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def prepare_interview_turn(interview_id, data, key_record=None):
+    """Validate and save the user's message ahead of an async AI response"""
+    interview = get_object_or_404(Interview, id=interview_id, is_active=True)
+    serializer = SendMessageSerializer(data=data)
+    if not serializer.is_valid():
+        return None, serializer.errors
+
+    user_message = save_user_message(interview, serializer.validated_data, key_record)
+    turn = {
+        "interview": interview,
+        "user_message": MessageSerializer(user_message).data,
+        "conversation": build_conversation(interview),
+    }
+    return turn, None
+
+
+def save_ai_message(interview, content):
+    """Save the AI response and return its serialized form"""
+    ai_message = Message.objects.create(
+        interview=interview, role="assistant", content=content
+    )
+    return MessageSerializer(ai_message).data
+
+
+def prepare_article_turn(chat_id, data, key_record=None):
+    """Validate the user's article chat message ahead of an async AI response
+
+    The message is saved along with the reply, see ``save_article_turn``,
+    unless an earlier attempt with the same ``key_record`` saved it already.
+    """
+    chat = get_object_or_404(
+        ArticleChat.objects.select_related("article"), id=chat_id, is_active=True
+    )
+    serializer = SendArticleMessageSerializer(data=data)
+    if not serializer.is_valid():
+        return None, serializer.errors
+
+    content = serializer.validated_data["content"]
+    user_message = idempotency.saved_message(key_record, chat.messages)
+    conversation = build_article_conversation(
+        chat, pending=None if user_message else content
+    )
+    turn = {
+        "chat": chat,
+        "content": content,
+        "user_message": user_message,
+        "key_record": key_record,
+        "conversation": conversation,
+        "cache_key": None,
+        "cached_response": None,
+    }
+    if use_response_cache(serializer.validated_data):
+        turn["cache_key"] = response_key(chat.article_id, conversation)
+        turn["cached_response"] = get_cached_response(turn["cache_key"])
+    return turn, None
+
+
+def response_cache_status(turn):
+    """X-Response-Cache header value for an article chat turn"""
+    if not turn["cache_key"]:
+        return "bypass"
+    return "miss" if turn["cached_response"] is None else "hit"
+
+
+def save_article_turn(chat, content, reply=None, user_message=None, key_record=None):
+    """Save an article chat message and its reply in one transaction
+
+    Article chats have no history cache to keep in step, so the user's
+    message can wait for the reply. Without a ``reply`` (the upstream call
+    failed) the message is saved alone; ``user_message`` is one an earlier
+    attempt under ``key_record`` saved already. Returns both messages, the
+    reply as None if there wasn't one.
+    """
+    with write_transaction():
+        if user_message is None:
+            user_message = ArticleMessage.objects.create(
+                chat=chat, role="user", content=content
+            )
+            idempotency.remember_message(key_record, user_message)
+        ai_message = None
+        if reply is not None:
+            ai_message = ArticleMessage.objects.create(
+                chat=chat, role="assistant", content=reply
+            )
+    return user_message, ai_message
+
+
+async def ai_response_events(interview, user_message, conversation, key_record=None):
+    """Yield a turn's ``(event, data)`` pairs, saving the reply once the stream closes
+
+    The events are ``user_message``, a ``token`` per chunk, then ``done`` or
+    ``error``. With ``key_record`` (the turn's Idempotency-Key), the saved
+    turn is stored for replay to retries.
+    """
+    chunks = []
+    ai_response = None
+
+    yield "user_message", user_message
+
+    try:
+        with llm_call("interview"):
+            stream = await get_async_client().chat.completions.create(
+                model=settings.LLM_INTERVIEW_MODEL,
+                messages=conversation,
+                max_tokens=500,
+                temperature=0.7,
+                prompt_cache_key=f"interview:{interview.id}",
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+        async with stream:
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    record_usage(INTERVIEW_PROMPT, chunk.usage)
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if token:
+                    chunks.append(token)
+                    yield "token", {"content": token}
+
+        ai_response = await sync_to_async(save_ai_message)(interview, "".join(chunks))
+        yield "done", {"ai_response": ai_response}
+
+    except Exception as e:
+        yield "error", {"error": str(e)}
+
+    finally:
+        # If the client disconnected (or the upstream failed) mid-stream, keep
+        # whatever was generated so the transcript matches what was shown.
+        # Exiting the ``async with`` above has already closed the upstream.
+        if chunks and ai_response is None:
+            ai_response = await sync_to_async(save_ai_message)(
+                interview, "".join(chunks)
+            )
+        if key_record is not None:
+            await sync_to_async(idempotency.complete)(
+                key_record,
+                200 if ai_response else 500,
+                {"user_message": user_message, "ai_response": ai_response},
+            )
+
+
+async def stream_ai_response(interview, user_message, conversation, key_record=None):
+    """Yield the AI response as SSE frames, saving it once the stream closes"""
+    events = ai_response_events(interview, user_message, conversation, key_record)
+    async with aclosing(events):
+        async for event, data in events:
+            yield sse_event(event, data)
+
+
+async def replay_turn(turn):
+    """SSE frames for a turn stored under an Idempotency-Key"""
+    yield sse_event("user_message", turn["user_message"])
+    yield sse_event("done", {"ai_response": turn["ai_response"]})
+
+
+def sse_response(events):
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@accepts_images
+async def stream_message(request, interview_id):
+    """Send a message in an interview and stream the AI response as Server-Sent Events
+
+    Tokens are only forwarded as they arrive when served through the ASGI
+    application; under WSGI the response is buffered until completion.
+    Retries sent with the same Idempotency-Key get the saved turn replayed.
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = parse_request_data(request)
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+    key = request.headers.get(idempotency.HEADER)
+    key_record = None
+    if key:
+        try:
+            key_record, claimed = await sync_to_async(idempotency.begin)(
+                key, f"interview:{interview_id}", data
+            )
+        except idempotency.KeyConflict as conflict:
+            return JsonResponse(
+                {"error": str(conflict)},
+                status=conflict.status_code,
+                headers=conflict.headers,
+            )
+        if not claimed:
+            if key_record.status_code != status.HTTP_200_OK:
+                return JsonResponse(key_record.response, status=key_record.status_code)
+            response = sse_response(replay_turn(key_record.response))
+            response["Idempotent-Replayed"] = "true"
+            return response
+
+    try:
+        turn, errors = await sync_to_async(prepare_interview_turn)(
+            interview_id, data, key_record
+        )
+    except BaseException:
+        if key_record is not None:
+            await sync_to_async(idempotency.release)(key_record)
+        raise
+    if errors:
+        if key_record is not None:
+            await sync_to_async(idempotency.complete)(key_record, 400, errors)
+        return JsonResponse(errors, status=400)
+
+    return sse_response(stream_ai_response(**turn, key_record=key_record))
+
+
+@accepts_images
+@idempotent("interview:{interview_id}")
+async def send_message_async(request, interview_id):
+    """Send a message in an interview and get AI response, without blocking a thread
+
+    Async counterpart of send_message for the ASGI application. ORM work runs
+    in a worker thread and the upstream call goes through the pooled
+    AsyncOpenAI client.
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = parse_request_data(request)
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+    turn, errors = await sync_to_async(prepare_interview_turn)(
+        interview_id, data, getattr(request, "idempotency_key", None)
+    )
+    if errors:
+        return JsonResponse(errors, status=400)
+
+    try:
+        # Get AI response
+        with llm_call("interview"):
+            response = await get_async_client().chat.completions.create(
+                model=settings.LLM_INTERVIEW_MODEL,
+                messages=turn["conversation"],
+                max_tokens=500,
+                temperature=0.7,
+                prompt_cache_key=f"interview:{turn['interview'].id}",
+            )
+        record_usage(INTERVIEW_PROMPT, response.usage)
+
+        ai_response = await sync_to_async(save_ai_message)(
+            turn["interview"], response.choices[0].message.content
+        )
+
+        return JsonResponse(
+            {"user_message": turn["user_message"], "ai_response": ai_response}
+        )
+
+    except Exception as e:
+        status_code, headers = upstream_error_status(e)
+        return JsonResponse({"error": str(e)}, status=status_code, headers=headers)
+
+
+@idempotent("article_chat:{chat_id}")
+async def send_article_message_async(request, chat_id):
+    """Send a message in an article chat, without blocking a thread
+
+    Async counterpart of send_article_message for the ASGI application.
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = parse_request_data(request)
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+    turn, errors = await sync_to_async(prepare_article_turn)(
+        chat_id, data, getattr(request, "idempotency_key", None)
+    )
+    if errors:
+        return JsonResponse(errors, status=400)
+
+    try:
+        content = turn["cached_response"]
+        if content is None:
+            # Get AI response
+            with llm_call("article_chat"):
+                response = await get_async_client().chat.completions.create(
+                    model=settings.LLM_ARTICLE_CHAT_MODEL,
+                    messages=turn["conversation"],
+                    max_tokens=500,
+                    temperature=0.7,
+                    prompt_cache_key=f"article:{turn['chat'].article_id}",
+                )
+            record_usage(ARTICLE_CHAT_PROMPT, response.usage)
+            content = response.choices[0].message.content
+            if turn["cache_key"]:
+                await sync_to_async(cache_response)(turn["cache_key"], content)
+
+    except Exception as e:
+        # Keep the message even though it got no reply
+        await sync_to_async(save_article_turn)(
+            turn["chat"],
+            turn["content"],
+            user_message=turn["user_message"],
+            key_record=turn["key_record"],
+        )
+        status_code, headers = upstream_error_status(e)
+        return JsonResponse({"error": str(e)}, status=status_code, headers=headers)
+
+    user_message, ai_message = await sync_to_async(save_article_turn)(
+        turn["chat"],
+        turn["content"],
+        content,
+        user_message=turn["user_message"],
+        key_record=turn["key_record"],
+    )
+    response = JsonResponse(
+        {
+            "user_message": ArticleMessageSerializer(user_message).data,
+            "ai_response": ArticleMessageSerializer(ai_message).data,
+        }
+    )
+    response["X-Response-Cache"] = response_cache_status(turn)
+    return response
+
+
+async def get_job(request, job_id):
+    """A completion job's status, and the reply once it's done
+
+    With ``?wait=<seconds>`` (up to JOB_LONG_POLL_TIMEOUT) the response is
+    held until the job finishes or the wait runs out, so clients can long
+    poll without a request per second. Serve it through the ASGI application
+    so waiting doesn't hold a thread.
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+
+    try:
+        wait = min(float(request.GET.get("wait", 0)), settings.JOB_LONG_POLL_TIMEOUT)
+    except ValueError:
+        return JsonResponse({"error": "wait must be a number of seconds"}, status=400)
+
+    jobs = Job.objects.filter(kind__in=COMPLETION_JOBS)
+    job = await sync_to_async(jobs.filter(id=job_id).first)()
+    if job is None:
+        raise Http404
+
+    deadline = time.monotonic() + wait
+    while job.status not in ("done", "failed") and time.monotonic() < deadline:
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+        await sync_to_async(job.refresh_from_db)()
+    return JsonResponse(JobSerializer(job).data)
+
+
+# Django 4.2's view decorators don't preserve coroutine functions, so mark the
+# async views as CSRF exempt directly (matching DRF's @api_view views).
+stream_message.csrf_exempt = True
+send_message_async.csrf_exempt = True
+send_article_message_async.csrf_exempt = True
+get_job.csrf_exempt = True
+
+
 @api_view(["POST"])
 def end_interview(request, interview_id):
     """End an interview session and generate article recommendations"""
@@ -170,6 +688,13 @@ def end_interview(request, interview_id):
     interview.is_active = False
     interview.save()
 
+    try:
+        recommend_articles(interview)
+    except Exception:
+        # Ending the interview shouldn't fail because ranking did
+        logger.exception("Failed to recommend articles for interview %s", interview.id)
+
+    interview = interview_detail_queryset().get(id=interview.id)
     return Response(
         {
             "message": "Interview ended successfully",
@@ -180,16 +705,72 @@ def end_interview(request, interview_id):
 
 @api_view(["GET"])
 def get_interview(request, interview_id):
-    """Get interview details and messages"""
-    interview = get_object_or_404(Interview, id=interview_id)
+    """Get interview details and its first page of messages"""
+    interview = get_object_or_404(interview_detail_queryset(), id=interview_id)
     return Response(InterviewSerializer(interview).data)
 
 
 @api_view(["GET"])
 def list_interviews(request):
-    """List all interviews"""
-    interviews = Interview.objects.all().order_by("-created_at")
-    return Response(InterviewSerializer(interviews, many=True).data)
+    """List interviews, newest first, a page at a time"""
+    paginator = InterviewCursorPagination()
+    page = paginator.paginate_queryset(interview_summary_queryset(), request)
+    return paginator.get_paginated_response(
+        InterviewSummarySerializer(page, many=True).data
+    )
+
+
+def paginated_messages(request, messages, serializer_class):
+    """Respond with one cursor-paginated page of transcript messages"""
+    paginator = MessageCursorPagination()
+    page = paginator.paginate_queryset(messages, request)
+    return paginator.get_paginated_response(serializer_class(page, many=True).data)
+
+
+def messages_since(request, messages, serializer_class):
+    """Respond with the messages that come after the ``after`` message id
+
+    Keyset lookup on (timestamp, id), so clients can fetch just the messages
+    they haven't seen. Without ``after`` it starts from the beginning.
+    """
+    params = MessagesSinceSerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    after = params.validated_data.get("after")
+    if after:
+        anchor = get_object_or_404(messages, id=after)
+        messages = messages.filter(
+            Q(timestamp__gt=anchor.timestamp)
+            | Q(timestamp=anchor.timestamp, id__gt=after)
+        )
+
+    page = list(messages.order_by("timestamp", "id")[: MESSAGES_SINCE_LIMIT + 1])
+    has_more = len(page) > MESSAGES_SINCE_LIMIT
+    page = page[:MESSAGES_SINCE_LIMIT]
+    return Response(
+        {
+            "messages": serializer_class(page, many=True).data,
+            "cursor": str(page[-1].id) if page else (str(after) if after else None),
+            "has_more": has_more,
+        }
+    )
+
+
+@api_view(["GET"])
+def list_messages(request, interview_id):
+    """List an interview's messages, oldest first, a page at a time"""
+    interview = get_object_or_404(Interview, id=interview_id)
+    messages = message_queryset().filter(interview=interview)
+    return paginated_messages(request, messages, MessageSerializer)
+
+
+@api_view(["GET"])
+def list_messages_since(request, interview_id):
+    """Get the messages in an interview after a given message"""
+    interview = get_object_or_404(Interview, id=interview_id)
+    messages = message_queryset().filter(interview=interview)
+    return messages_since(request, messages, MessageSerializer)
 
 
 @api_view(["POST"])
@@ -198,84 +779,177 @@ def start_article_chat(request, interview_id, article_id):
     interview = get_object_or_404(Interview, id=interview_id)
     article = get_object_or_404(Article, id=article_id)
 
-    # Create or get existing chat
-    chat, created = ArticleChat.objects.get_or_create(
-        interview=interview, article=article, defaults={"is_active": True}
-    )
-
-    if created:
-        # Create initial message
-        initial_message = ArticleMessage.objects.create(
-            chat=chat,
-            role="assistant",
-            content=f"Hello! I'm here to help you discuss the article '{article.title}'. What would you like to know about it?",
+    # Create or get existing chat, with its greeting in the same transaction
+    with write_transaction():
+        chat, created = ArticleChat.objects.get_or_create(
+            interview=interview, article=article, defaults={"is_active": True}
         )
 
+        if created:
+            # Create initial message
+            initial_message = ArticleMessage.objects.create(
+                chat=chat,
+                role="assistant",
+                content=f"Hello! I'm here to help you discuss the article '{article.title}'. What would you like to know about it?",
+            )
+
     return Response(ArticleChatSerializer(chat).data)
 
 
 @api_view(["POST"])
+@idempotent("article_chat:{chat_id}")
 def send_article_message(request, chat_id):
-    """Send a message in an article chat"""
+    """Send a message in an article chat
+
+    With ``Prefer: respond-async`` the reply is left to a completion job and
+    the response is a 202 pointing at it.
+    """
     chat = get_object_or_404(ArticleChat, id=chat_id, is_active=True)
     serializer = SendArticleMessageSerializer(data=request.data)
 
     if serializer.is_valid():
-        # Save user message
-        user_message = ArticleMessage.objects.create(
-            chat=chat, role="user", content=serializer.validated_data["content"]
-        )
-
-        # Create context for AI response
-        article_context = f"""
-        Article: {chat.article.title}
-        Summary: {chat.article.summary}
-        Key Highlights: {', '.join(chat.article.key_highlights)}
-        URL: {chat.article.url}
-        """
-
-        # Get conversation history
-        messages = chat.messages.all()
-        conversation = [
-            {
-                "role": "system",
-                "content": f"You are a helpful assistant discussing the article: {chat.article.title}. Use the following context to answer questions: {article_context}",
-            }
-        ]
+        content = serializer.validated_data["content"]
+        use_cache = use_response_cache(serializer.validated_data)
+        key_record = getattr(request, "idempotency_key", None)
+        saved = idempotency.saved_message(key_record, chat.messages)
+        if prefers_async(request):
+            user_message, _ = save_article_turn(
+                chat, content, user_message=saved, key_record=key_record
+            )
+            job = enqueue_completion(
+                "complete_article_turn",
+                {"user_message_id": str(user_message.id), "use_cache": use_cache},
+            )
+            return accepted(job, ArticleMessageSerializer(user_message).data)
 
-        for msg in messages:
-            conversation.append({"role": msg.role, "content": msg.content})
+        conversation = build_article_conversation(
+            chat, pending=None if saved else content
+        )
 
         try:
             # Get AI response
-            response = client.chat.completions.create(
-                model="gpt-4", messages=conversation, max_tokens=500, temperature=0.7
-            )
+            ai_response, cache_status = article_reply(chat, conversation, use_cache)
+        except Exception as e:
+            # Keep the message even though it got no reply
+            save_article_turn(chat, content, user_message=saved, key_record=key_record)
+            status_code, headers = upstream_error_status(e)
+            return Response({"error": str(e)}, status=status_code, headers=headers)
+
+        # Save the message and its reply together
+        user_message, ai_message = save_article_turn(
+            chat, content, ai_response, user_message=saved, key_record=key_record
+        )
+        return Response(
+            {
+                "user_message": ArticleMessageSerializer(user_message).data,
+                "ai_response": ArticleMessageSerializer(ai_message).data,
+            },
+            headers={"X-Response-Cache": cache_status},
+        )
 
-            ai_response = response.choices[0].message.content
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-            # Save AI response
-            ai_message = ArticleMessage.objects.create(
-                chat=chat, role="assistant", content=ai_response
-            )
 
-            return Response(
-                {
-                    "user_message": ArticleMessageSerializer(user_message).data,
-                    "ai_response": ArticleMessageSerializer(ai_message).data,
-                }
-            )
+@api_view(["GET"])
+def get_article_chat(request, chat_id):
+    """Get article chat details and its first page of messages"""
+    chat = get_object_or_404(article_chat_detail_queryset(), id=chat_id)
+    return Response(ArticleChatSerializer(chat).data)
 
-        except Exception as e:
-            return Response(
-                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
 
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+@api_view(["GET"])
+def list_article_messages(request, chat_id):
+    """List an article chat's messages, oldest first, a page at a time"""
+    chat = get_object_or_404(ArticleChat, id=chat_id)
+    return paginated_messages(request, chat.messages.all(), ArticleMessageSerializer)
 
 
 @api_view(["GET"])
-def get_article_chat(request, chat_id):
-    """Get article chat details and messages"""
+def list_article_messages_since(request, chat_id):
+    """Get the messages in an article chat after a given message"""
     chat = get_object_or_404(ArticleChat, id=chat_id)
-    return Response(ArticleChatSerializer(chat).data)
+    return messages_since(request, chat.messages.all(), ArticleMessageSerializer)
+
+
+@api_view(["GET"])
+def search_articles(request):
+    """Full-text search over article titles, summaries and highlights
+
+    Results are ranked by relevance (BM25 on SQLite) and paginated by page
+    number, since relevance order has no stable cursor.
+    """
+    params = ArticleSearchSerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+    page = params.validated_data["page"]
+    page_size = params.validated_data["page_size"]
+
+    matches = rank_articles(
+        params.validated_data["q"], page_size + 1, (page - 1) * page_size
+    )
+    has_more = len(matches) > page_size
+    scores = dict(matches[:page_size])
+    articles = Article.objects.defer("content", "embedding").in_bulk(scores)
+    results = []
+    for article_id, score in scores.items():
+        if article_id in articles:
+            articles[article_id].score = score
+            results.append(articles[article_id])
+
+    url = request.build_absolute_uri()
+    previous = None
+    if page == 2:
+        previous = remove_query_param(url, "page")
+    elif page > 2:
+        previous = replace_query_param(url, "page", page - 1)
+    return Response(
+        {
+            "next": replace_query_param(url, "page", page + 1) if has_more else None,
+            "previous": previous,
+            "results": ArticleSearchResultSerializer(results, many=True).data,
+        }
+    )
+
+
+@api_view(["POST"])
+def request_image_upload(request):
+    """Arrange for a client to upload an image straight to object storage
+
+    The client then PUTs the bytes to the returned pre-signed URL and sends
+    the image's SHA-256 in ``image_hashes``. Images already stored under the
+    same hash need no upload at all.
+    """
+    serializer = ImageUploadRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    sha256 = serializer.validated_data["sha256"]
+
+    stored = ImageUpload.objects.filter(content_hash=sha256).exclude(encoded_data="")
+    if stored.exists():
+        return Response({"sha256": sha256, "status": "stored"})
+
+    storage = ImageUpload._meta.get_field("image").storage
+    if not hasattr(storage, "presigned_upload"):
+        return Response(
+            {"error": "Direct uploads need object storage (MEDIA_STORAGE=s3)"},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+    upload = storage.presigned_upload(
+        staged_name(sha256),
+        serializer.validated_data["content_type"],
+        serializer.validated_data["size"],
+        sha256,
+    )
+    return Response({"sha256": sha256, "status": "pending", "upload": upload})
+
+
+@require_GET
+def export_metrics(request):
+    """Request, span and LLM metrics of this process for Prometheus"""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if not metrics.may_scrape(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
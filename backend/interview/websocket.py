@@ -0,0 +1,322 @@
+"""WebSocket channel for live interview sessions
+
+``/ws/interview/<id>/`` on the ASGI application keeps one connection per
+interview open. The interview is loaded once when the socket connects and
+held for the life of the connection, so a turn costs one inbound frame
+instead of a request, an interview lookup and a serialized response.
+
+Frames are JSON text. Once the socket is accepted the server sends a
+``ready`` frame carrying ``max_frame_bytes``, the largest frame the client
+may send (WEBSOCKET_MAX_FRAME_BYTES). Base64 makes images about a third
+larger, so clients send images whose frame wouldn't fit over HTTP instead.
+The client sends:
+
+- ``{"type": "image", "ref": ..., "name": ..., "data": <base64>}`` to attach
+  an image to its next message; it's validated and acknowledged with an
+  ``image_ack`` frame carrying the same ``ref``.
+- ``{"type": "message", "content": ...}`` to send a message with the images
+  attached so far, and optionally ``image_hashes`` of images uploaded
+  straight to object storage.
+
+and gets ``{"type": ..., "data": ...}`` frames back: ``user_message``, a
+``token`` per chunk of the reply and ``done`` (or ``error``), the same events
+as the SSE endpoint.
+
+The interview is re-checked as each turn starts: once it has been ended
+(e.g. over HTTP), the turn is refused with an ``error`` frame and the socket
+is closed with code 4410.
+
+A slow client can't stall the upstream stream: tokens waiting to be sent
+beyond WEBSOCKET_SEND_BUFFER frames are merged into the last waiting frame.
+"""
+
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import re
+import threading
+from collections import deque
+from contextlib import aclosing
+from urllib.parse import urlsplit
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import close_old_connections, connections
+from rest_framework import serializers
+
+from . import metrics
+from .conversation import build_conversation
+from .models import Interview
+from .serializers import ImageUploadField, MessageSerializer, SendMessageSerializer
+from .views import ai_response_events, save_user_message
+
+logger = logging.getLogger(__name__)
+
+PATH = re.compile(
+    r"^/ws/interview/(?P<interview_id>"
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})/$"
+)
+
+# Close codes for sockets that are refused
+FORBIDDEN = 4403
+NOT_FOUND = 4404
+# ...and for sockets whose interview was ended while they were open
+ENDED = 4410
+
+FRAMES = metrics.Counter(
+    "interview_websocket_frames_total",
+    "WebSocket frames by direction and type; coalesced tokens were merged "
+    "into an earlier frame for a slow client",
+    ["direction", "type"],
+)
+
+_open_sockets = 0
+_open_sockets_lock = threading.Lock()
+
+
+@metrics.collector
+def websocket_metrics():
+    with _open_sockets_lock:
+        count = _open_sockets
+    return metrics.gauge_lines(
+        "interview_websocket_connections",
+        "Interview WebSocket connections open in this process",
+        [],
+        {(): count},
+    )
+
+
+class Outbox:
+    """Frames waiting for the client, with tokens merged once it falls behind"""
+
+    def __init__(self, size):
+        self.size = size
+        self.frames = deque()
+        self.ready = asyncio.Event()
+
+    def put(self, frame):
+        last = self.frames[-1] if self.frames else None
+        if (
+            frame["type"] == "token"
+            and len(self.frames) >= self.size
+            and last["type"] == "token"
+        ):
+            last["data"]["content"] += frame["data"]["content"]
+            FRAMES.inc("out", "coalesced_token")
+        else:
+            self.frames.append(frame)
+        self.ready.set()
+
+    async def get(self):
+        while not self.frames:
+            self.ready.clear()
+            await self.ready.wait()
+        return self.frames.popleft()
+
+
+def allowed_origin(scope):
+    """Browsers may only connect from the frontend or the same host"""
+    headers = dict(scope.get("headers", []))
+    origin = headers.get(b"origin", b"").decode("latin-1")
+    if not origin:
+        return True
+    host = headers.get(b"host", b"").decode("latin-1")
+    return origin in settings.CORS_ALLOWED_ORIGINS or urlsplit(origin).netloc == host
+
+
+def load_interview(interview_id):
+    close_old_connections()
+    return Interview.objects.filter(id=interview_id, is_active=True).first()
+
+
+def decode_image(frame):
+    """Validate an image frame the way send_message validates uploads"""
+    try:
+        content = base64.b64decode(frame["data"], validate=True)
+    except (KeyError, TypeError, binascii.Error):
+        raise serializers.ValidationError("Expected base64 image data")
+    upload = SimpleUploadedFile(str(frame.get("name") or "image"), content)
+    return ImageUploadField().run_validation(upload)
+
+
+class InterviewEnded(Exception):
+    """The interview was ended while its socket was open"""
+
+
+def start_turn(interview, data, images):
+    """Save the user's message and build the conversation for its reply
+
+    ``images`` were validated as they arrived. Raises InterviewEnded if the
+    interview isn't active any more.
+    """
+    close_old_connections()
+    interview.refresh_from_db(fields=["is_active"])
+    if not interview.is_active:
+        raise InterviewEnded
+    serializer = SendMessageSerializer(data=data)
+    if not serializer.is_valid():
+        return None, None, serializer.errors
+    user_message = save_user_message(
+        interview, {**serializer.validated_data, "images": images}
+    )
+    return MessageSerializer(user_message).data, build_conversation(interview), None
+
+
+class InterviewSession:
+    """One client's connection to an interview"""
+
+    def __init__(self, interview):
+        self.interview = interview
+        self.outbox = Outbox(settings.WEBSOCKET_SEND_BUFFER)
+        self.images = []
+        self.turn = None
+
+    def send(self, event, data):
+        self.outbox.put({"type": event, "data": data})
+
+    def close_socket(self, code):
+        """Close the socket once the frames queued so far are sent"""
+        self.outbox.put({"type": "close", "code": code})
+
+    async def pump(self, send):
+        """Send queued frames as fast as the client takes them"""
+        while True:
+            frame = await self.outbox.get()
+            if frame["type"] == "close":
+                await send({"type": "websocket.close", "code": frame["code"]})
+                return
+            await send({"type": "websocket.send", "text": json.dumps(frame)})
+            FRAMES.inc("out", frame["type"])
+
+    async def receive(self, text):
+        try:
+            frame = json.loads(text)
+            kind = frame["type"]
+        except (ValueError, TypeError, KeyError):
+            self.send("error", {"error": "Frames must be JSON objects with a type"})
+            return
+        FRAMES.inc("in", str(kind))
+        if len(text.encode()) > settings.WEBSOCKET_MAX_FRAME_BYTES:
+            self.send(
+                "error",
+                {
+                    "ref": frame.get("ref"),
+                    "error": f"Frames may be at most "
+                    f"{settings.WEBSOCKET_MAX_FRAME_BYTES} bytes",
+                },
+            )
+            return
+
+        if kind == "image":
+            await self.attach_image(frame)
+        elif kind == "message":
+            self.start(frame)
+        else:
+            self.send("error", {"error": f"Unknown frame type {kind!r}"})
+
+    async def attach_image(self, frame):
+        ref = frame.get("ref")
+        if len(self.images) >= settings.WEBSOCKET_MAX_IMAGES:
+            self.send("error", {"ref": ref, "error": "Too many images attached"})
+            return
+        try:
+            image = await sync_to_async(decode_image)(frame)
+        except serializers.ValidationError as error:
+            self.send("error", {"ref": ref, "error": error.detail})
+            return
+        self.images.append(image)
+        self.send(
+            "image_ack", {"ref": ref, "size": image.size, "attached": len(self.images)}
+        )
+
+    def start(self, frame):
+        if self.turn is not None and not self.turn.done():
+            self.send("error", {"error": "Wait for the reply before sending again"})
+            return
+        data = {
+            "content": frame.get("content", ""),
+            "image_hashes": frame.get("image_hashes", []),
+        }
+        images, self.images = self.images, []
+        self.turn = asyncio.create_task(self.run_turn(data, images))
+
+    async def run_turn(self, data, images):
+        try:
+            user_message, conversation, errors = await sync_to_async(start_turn)(
+                self.interview, data, images
+            )
+        except InterviewEnded:
+            self.send("error", {"error": "This interview has ended"})
+            self.close_socket(ENDED)
+            return
+        except Exception:
+            logger.exception("Couldn't save message in interview %s", self.interview.id)
+            self.send("error", {"error": "Couldn't save the message"})
+            return
+        if errors:
+            self.send("error", {"error": errors})
+            return
+        events = ai_response_events(self.interview, user_message, conversation)
+        async with aclosing(events):
+            async for event, payload in events:
+                self.send(event, payload)
+
+    async def close(self):
+        """Stop the reply in progress, keeping what was generated of it"""
+        if self.turn is not None and not self.turn.done():
+            self.turn.cancel()
+            try:
+                await self.turn
+            except asyncio.CancelledError:
+                pass
+
+
+async def websocket_application(scope, receive, send):
+    """ASGI application for the interview WebSocket
+
+    Each connection gets its own thread for ORM work, like a Django request.
+    """
+    async with ThreadSensitiveContext():
+        await serve(scope, receive, send)
+
+
+async def serve(scope, receive, send):
+    global _open_sockets
+
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+    match = PATH.match(scope["path"])
+    if not allowed_origin(scope):
+        await send({"type": "websocket.close", "code": FORBIDDEN})
+        return
+    interview = match and await sync_to_async(load_interview)(match["interview_id"])
+    if not interview:
+        await send({"type": "websocket.close", "code": NOT_FOUND})
+        return
+
+    await send({"type": "websocket.accept"})
+    session = InterviewSession(interview)
+    session.send("ready", {"max_frame_bytes": settings.WEBSOCKET_MAX_FRAME_BYTES})
+    pump = asyncio.create_task(session.pump(send))
+    with _open_sockets_lock:
+        _open_sockets += 1
+    try:
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message["type"] == "websocket.receive" and message.get("text"):
+                await session.receive(message["text"])
+    finally:
+        with _open_sockets_lock:
+            _open_sockets -= 1
+        await session.close()
+        pump.cancel()
+        await asyncio.gather(pump, return_exceptions=True)
+        # The connection's thread goes away with it, so close its database
+        # connection rather than leaving it to CONN_MAX_AGE
+        await sync_to_async(connections.close_all)()
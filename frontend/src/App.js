@@ -4,11 +4,13 @@ import InterviewList from './components/InterviewList';
 import InterviewChat from './components/InterviewChat';
 import StartInterview from './components/StartInterview';
 import CompletedInterview from './components/CompletedInterview';
+import { withFullTranscript } from './transcript';
 
 function App() {
   const [currentView, setCurrentView] = useState('list'); // 'list', 'chat', 'start', 'completed'
   const [currentInterview, setCurrentInterview] = useState(null);
   const [interviews, setInterviews] = useState([]);
+  const [nextInterviewsUrl, setNextInterviewsUrl] = useState(null);
 
   const API_BASE_URL = "http://13.222.86.82:8000/api/interview";
 
@@ -20,7 +22,20 @@ function App() {
     try {
       const response = await fetch(`${API_BASE_URL}/list/`);
       const data = await response.json();
-      setInterviews(data);
+      setInterviews(data.results);
+      setNextInterviewsUrl(data.next);
+    } catch (error) {
+      console.error('Error fetching interviews:', error);
+    }
+  };
+
+  const fetchMoreInterviews = async () => {
+    if (!nextInterviewsUrl) return;
+    try {
+      const response = await fetch(nextInterviewsUrl);
+      const data = await response.json();
+      setInterviews(prev => [...prev, ...data.results]);
+      setNextInterviewsUrl(data.next);
     } catch (error) {
       console.error('Error fetching interviews:', error);
     }
@@ -57,12 +72,22 @@ function App() {
     }
   };
 
-  const openInterview = (interview) => {
-    setCurrentInterview(interview);
-    if (interview.is_active) {
-      setCurrentView('chat');
-    } else {
-      setCurrentView('completed');
+  const openInterview = async (summary) => {
+    // The list only carries summaries, so load the full transcript
+    try {
+      const response = await fetch(`${API_BASE_URL}/${summary.id}/`);
+      const interview = await withFullTranscript(
+        await response.json(),
+        `${API_BASE_URL}/${summary.id}/messages/since/`
+      );
+      setCurrentInterview(interview);
+      if (interview.is_active) {
+        setCurrentView('chat');
+      } else {
+        setCurrentView('completed');
+      }
+    } catch (error) {
+      console.error('Error opening interview:', error);
     }
   };
 
@@ -97,6 +122,7 @@ function App() {
             interviews={interviews}
             onStartNew={() => setCurrentView('start')}
             onOpenInterview={openInterview}
+            onLoadMore={nextInterviewsUrl ? fetchMoreInterviews : null}
           />
         );
     }
@@ -1,5 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import './CompletedInterview.css';
+import { newIdempotencyKey } from '../idempotencyKey';
+import { withFullTranscript } from '../transcript';
 
 const CompletedInterview = ({ interview, onBack }) => {
   const [selectedArticle, setSelectedArticle] = useState(null);
@@ -20,7 +22,11 @@ const CompletedInterview = ({ interview, onBack }) => {
       });
       
       if (response.ok) {
-        const chatData = await response.json();
+        const chat = await response.json();
+        const chatData = await withFullTranscript(
+          chat,
+          `${API_BASE_URL}/article-chat/${chat.id}/messages/since/`
+        );
         setArticleChat(chatData);
         setSelectedArticle(article);
       }
@@ -48,13 +54,22 @@ const CompletedInterview = ({ interview, onBack }) => {
     setIsLoading(true);
 
     try {
-      const response = await fetch(`${API_BASE_URL}/article-chat/${articleChat.id}/send/`, {
+      const idempotencyKey = newIdempotencyKey();
+      const post = () => fetch(`${API_BASE_URL}/article-chat/${articleChat.id}/send/`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          'Idempotency-Key': idempotencyKey,
         },
         body: JSON.stringify({ content: userMessage.content }),
       });
+      let response;
+      try {
+        response = await post();
+      } catch (networkError) {
+        // Retry once; the key makes sure the message is only sent once
+        response = await post();
+      }
 
       if (response.ok) {
         const data = await response.json();
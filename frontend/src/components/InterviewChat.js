@@ -1,5 +1,32 @@
 import React, { useState, useEffect, useRef } from 'react';
 import './InterviewChat.css';
+import { newIdempotencyKey } from '../idempotencyKey';
+import { interviewSocketUrl, openInterviewSocket } from '../interviewSocket';
+
+// Parse a Server-Sent Events response body, calling onEvent for each frame
+const readServerSentEvents = async (body, onEvent) => {
+  const reader = body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+    const frames = buffer.split('\n\n');
+    buffer = frames.pop();
+
+    frames.forEach(frame => {
+      const lines = frame.split('\n');
+      const event = lines.find(line => line.startsWith('event: '))?.slice(7);
+      const data = lines.find(line => line.startsWith('data: '))?.slice(6);
+      if (event && data) {
+        onEvent(event, JSON.parse(data));
+      }
+    });
+  }
+};
 
 const InterviewChat = ({ interview, onEnd, onBack, apiBaseUrl }) => {
   const [messages, setMessages] = useState([]);
@@ -9,13 +36,50 @@ const InterviewChat = ({ interview, onEnd, onBack, apiBaseUrl }) => {
   const [isDragOver, setIsDragOver] = useState(false);
   const messagesEndRef = useRef(null);
   const fileInputRef = useRef(null);
+  // Id of the newest message known to be saved on the server
+  const lastSavedIdRef = useRef(null);
+  // Live channel to the interview; sends fall back to HTTP while it's closed
+  const socketRef = useRef(null);
 
   useEffect(() => {
     if (interview && interview.messages) {
       setMessages(interview.messages);
+      const lastMessage = interview.messages[interview.messages.length - 1];
+      lastSavedIdRef.current = lastMessage ? lastMessage.id : null;
     }
   }, [interview]);
 
+  const interviewId = interview?.id;
+  const isActive = interview?.is_active;
+  useEffect(() => {
+    if (!interviewId || !isActive || typeof WebSocket === 'undefined') return;
+    const socket = openInterviewSocket(interviewSocketUrl(apiBaseUrl, interviewId));
+    socketRef.current = socket;
+    return () => {
+      socket.close();
+      socketRef.current = null;
+    };
+  }, [interviewId, isActive, apiBaseUrl]);
+
+  // Fetch only the messages saved since the newest one we have, replacing
+  // any local placeholders (unsaved user messages, partial replies)
+  const syncNewMessages = async () => {
+    const params = lastSavedIdRef.current ? `?after=${lastSavedIdRef.current}` : '';
+    const response = await fetch(`${apiBaseUrl}/${interview.id}/messages/since/${params}`);
+    if (!response.ok) {
+      throw new Error('Failed to fetch new messages');
+    }
+    const data = await response.json();
+    lastSavedIdRef.current = data.cursor;
+    if (data.messages.length > 0) {
+      setMessages(prev => [
+        ...prev.filter(msg => typeof msg.id === 'string' && !msg.id.startsWith('streaming-')),
+        ...data.messages
+      ]);
+    }
+    return data.messages;
+  };
+
   useEffect(() => {
     scrollToBottom();
   }, [messages]);
@@ -68,7 +132,42 @@ const InterviewChat = ({ interview, onEnd, onBack, apiBaseUrl }) => {
     setInputMessage('');
     setIsLoading(true);
 
+    // Render the reply as tokens arrive, then swap in the saved message
+    const streamingId = `streaming-${Date.now()}`;
+    let reply = '';
+    const handleEvent = (event, data) => {
+      if (event === 'token') {
+        reply += data.content;
+        setMessages(prev => [
+          ...prev.filter(msg => msg.id !== streamingId),
+          {
+            id: streamingId,
+            role: 'assistant',
+            content: reply,
+            timestamp: new Date().toISOString()
+          }
+        ]);
+      } else if (event === 'done') {
+        lastSavedIdRef.current = data.ai_response.id;
+        setMessages(prev => [
+          ...prev.filter(
+            msg => msg.id !== streamingId && msg.id !== data.ai_response.id
+          ),
+          data.ai_response
+        ]);
+      } else if (event === 'error') {
+        throw new Error(data.error);
+      }
+    };
+
     try {
+      const socket = socketRef.current;
+      if (socket && socket.isOpen() && socket.fits(selectedImages)) {
+        await socket.sendTurn(inputMessage.trim(), selectedImages, handleEvent);
+        setSelectedImages([]);
+        return;
+      }
+
       const formData = new FormData();
       formData.append('content', inputMessage.trim());
       
@@ -76,20 +175,38 @@ const InterviewChat = ({ interview, onEnd, onBack, apiBaseUrl }) => {
         formData.append(`images`, image);
       });
 
-      const response = await fetch(`${apiBaseUrl}/${interview.id}/send/`, {
+      const idempotencyKey = newIdempotencyKey();
+      const post = () => fetch(`${apiBaseUrl}/${interview.id}/send/stream/`, {
         method: 'POST',
+        headers: { 'Idempotency-Key': idempotencyKey },
         body: formData,
       });
+      let response;
+      try {
+        response = await post();
+      } catch (networkError) {
+        // Retry once; the key makes sure the message is only sent once
+        response = await post();
+      }
 
-      if (response.ok) {
-        const data = await response.json();
-        setMessages(prev => [...prev, data.ai_response]);
-        setSelectedImages([]);
-      } else {
+      if (!response.ok || !response.body) {
         throw new Error('Failed to send message');
       }
+
+      await readServerSentEvents(response.body, handleEvent);
+      setSelectedImages([]);
     } catch (error) {
       console.error('Error sending message:', error);
+      // The reply may still have been saved (e.g. the connection dropped
+      // mid-stream), so pick up whatever the server has before giving up
+      try {
+        const newMessages = await syncNewMessages();
+        if (newMessages.some(msg => msg.role === 'assistant')) {
+          return;
+        }
+      } catch (syncError) {
+        console.error('Error fetching new messages:', syncError);
+      }
       // Add error message to chat
       setMessages(prev => [...prev, {
         id: Date.now(),
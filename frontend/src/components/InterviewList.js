@@ -1,7 +1,7 @@
 import React from 'react';
 import './InterviewList.css';
 
-const InterviewList = ({ interviews, onStartNew, onOpenInterview }) => {
+const InterviewList = ({ interviews, onStartNew, onOpenInterview, onLoadMore }) => {
   const formatDate = (dateString) => {
     return new Date(dateString).toLocaleString();
   };
@@ -32,8 +32,13 @@ const InterviewList = ({ interviews, onStartNew, onOpenInterview }) => {
                   Status: {interview.is_active ? 'Active' : 'Completed'}
                 </p>
                 <p className="message-count">
-                  Messages: {interview.messages?.length || 0}
+                  Messages: {interview.message_count || 0}
                 </p>
+                {interview.last_message_preview && (
+                  <p className="message-preview">
+                    {interview.last_message_preview}
+                  </p>
+                )}
               </div>
                              <div className="interview-actions">
                  <button
@@ -47,6 +52,12 @@ const InterviewList = ({ interviews, onStartNew, onOpenInterview }) => {
           ))
         )}
       </div>
+
+      {onLoadMore && (
+        <button className="load-more-btn" onClick={onLoadMore}>
+          Load more
+        </button>
+      )}
     </div>
   );
 };
@@ -0,0 +1,6 @@
+// A fresh value for the Idempotency-Key header of one send. Retries of the
+// same send reuse it, so the server saves and answers the message only once.
+// crypto.randomUUID is only available on HTTPS and localhost.
+export const newIdempotencyKey = () =>
+  window.crypto?.randomUUID?.() ??
+  `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
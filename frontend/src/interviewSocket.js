@@ -0,0 +1,119 @@
+// A live connection to an interview over its WebSocket channel
+// (/ws/interview/<id>/, served by the backend's ASGI application). Each turn
+// is a few frames on the open socket instead of a full HTTP request.
+
+export const interviewSocketUrl = (apiBaseUrl, interviewId) => {
+  const url = new URL(apiBaseUrl);
+  url.protocol = url.protocol === 'https:' ? 'wss:' : 'ws:';
+  url.pathname = `/ws/interview/${interviewId}/`;
+  url.search = '';
+  return url.toString();
+};
+
+const readAsBase64 = (file) => new Promise((resolve, reject) => {
+  const reader = new FileReader();
+  reader.onload = () => resolve(reader.result.split(',')[1]);
+  reader.onerror = () => reject(reader.error);
+  reader.readAsDataURL(file);
+});
+
+// Close codes after which reconnecting can't help: a refused origin, an
+// unknown interview or one that has ended
+const FINAL_CLOSE_CODES = [4403, 4404, 4410];
+const RECONNECT_MIN_DELAY = 1000;
+const RECONNECT_MAX_DELAY = 30000;
+
+// Bytes of the frame carrying an image: base64 makes it a third larger
+const imageFrameBytes = (image) =>
+  4 * Math.ceil(image.size / 3) +
+  new TextEncoder().encode(JSON.stringify(image.name)).length +
+  64;
+
+export const openInterviewSocket = (url) => {
+  let socket = null;
+  // Largest frame the server takes, from its ready frame
+  let maxFrameBytes = 0;
+  // Callbacks of the turn in progress, if any
+  let turn = null;
+  let closed = false;
+  let reconnectDelay = RECONNECT_MIN_DELAY;
+  let reconnectTimer = null;
+
+  const finish = (error) => {
+    if (!turn) return;
+    const { resolve, reject } = turn;
+    turn = null;
+    if (error) {
+      reject(error);
+    } else {
+      resolve();
+    }
+  };
+
+  const connect = () => {
+    socket = new WebSocket(url);
+    maxFrameBytes = 0;
+
+    socket.onmessage = (message) => {
+      const { type, data } = JSON.parse(message.data);
+      if (type === 'ready') {
+        maxFrameBytes = data.max_frame_bytes;
+        reconnectDelay = RECONNECT_MIN_DELAY;
+        return;
+      }
+      if (!turn) return;
+      // Rejected images carry their ref; the message is still sent without them
+      if (type === 'error' && data.ref === undefined) {
+        finish(new Error(typeof data.error === 'string' ? data.error : 'Failed to send message'));
+        return;
+      }
+      try {
+        turn.onEvent(type, data);
+      } catch (error) {
+        finish(error);
+        return;
+      }
+      if (type === 'done') {
+        finish();
+      }
+    };
+
+    // Sends go over HTTP until the socket is back
+    socket.onclose = (event) => {
+      finish(new Error('Connection closed'));
+      if (closed || FINAL_CLOSE_CODES.includes(event.code)) return;
+      reconnectTimer = setTimeout(connect, reconnectDelay);
+      reconnectDelay = Math.min(reconnectDelay * 2, RECONNECT_MAX_DELAY);
+    };
+  };
+
+  connect();
+
+  return {
+    isOpen: () => socket.readyState === WebSocket.OPEN && maxFrameBytes > 0,
+
+    // Whether every image fits in a frame the server takes; send the
+    // message over HTTP otherwise
+    fits: (images) => images.every(image => imageFrameBytes(image) <= maxFrameBytes),
+
+    // Send a message with its images, calling onEvent for each event of the
+    // reply (the same events as the streaming endpoint). Resolves once done.
+    sendTurn: async (content, images, onEvent) => {
+      const done = new Promise((resolve, reject) => {
+        turn = { onEvent, resolve, reject };
+      });
+      for (const [index, image] of images.entries()) {
+        const data = await readAsBase64(image);
+        socket.send(JSON.stringify({ type: 'image', ref: index, name: image.name, data }));
+      }
+      socket.send(JSON.stringify({ type: 'message', content }));
+      return done;
+    },
+
+    close: () => {
+      closed = true;
+      clearTimeout(reconnectTimer);
+      socket.close();
+    },
+  };
+};
@@ -0,0 +1,20 @@
+// Interviews and article chats only inline the first page of their
+// messages. Fetch the rest from the messages/since/ endpoint at sinceUrl,
+// starting after the last inlined message, and return the record with its
+// whole transcript.
+export const withFullTranscript = async (record, sinceUrl) => {
+  let messages = record.messages;
+  let cursor = record.messages_cursor;
+  let hasMore = record.has_more_messages;
+  while (hasMore) {
+    const response = await fetch(`${sinceUrl}?after=${cursor}`);
+    if (!response.ok) {
+      throw new Error('Failed to fetch the transcript');
+    }
+    const data = await response.json();
+    messages = [...messages, ...data.messages];
+    cursor = data.cursor;
+    hasMore = data.has_more;
+  }
+  return { ...record, messages };
+};